@@ -1,51 +1,16 @@
-"""The PHQ-9 integration."""
-
-import logging
-
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers import entity_registry as er
-from homeassistant.const import EVENT_HOMEASSISTANT_STARTED
-
-from .const import DOMAIN
-
-_LOGGER = logging.getLogger(__name__)
-
-
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Set up PHQ-9 from a config entry."""
-
-    phq9_hass_data = hass.data.setdefault(DOMAIN, {})
-
-    entity_registry = er.async_get(hass)
-
-    def entity_registry_listener(event):
-        """Handle entity registry updates."""
-        if event.data["action"] == "create" and event.data["entity_id"].startswith(
-            "person."
-        ):
-            hass.async_create_task(hass.config_entries.async_reload(entry.entry_id))
-        elif event.data["action"] == "remove" and event.data["entity_id"].startswith(
-            "person."
-        ):
-            hass.async_create_task(hass.config_entries.async_reload(entry.entry_id))
-
-    phq9_hass_data["entity_registry_listener"] = hass.bus.async_listen(
-        er.EVENT_ENTITY_REGISTRY_UPDATED, entity_registry_listener
-    )
-
-    await hass.config_entries.async_forward_entry_setups(entry, ["select", "sensor"])
-
-    return True
+"""The PHQ-9 integration.
 
+The config entry is set up in entry.py, which is only imported when Home
+Assistant is installed. The scoring modules, instruments and scoring, can then
+be imported for offline analysis without it.
+"""
 
-async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Unload a config entry."""
+from importlib.util import find_spec
 
-    if listener := hass.data[DOMAIN].pop("entity_registry_listener", None):
-        listener()
+if find_spec("homeassistant") is not None:
+    from .entry import async_reload_entry, async_setup_entry, async_unload_entry
 
-    return await hass.config_entries.async_unload_platforms(entry, ["select", "sensor"])
+    __all__ = ["async_reload_entry", "async_setup_entry", "async_unload_entry"]
 
 
 """
@@ -0,0 +1,120 @@
+"""Analysis of the assessment history of several people at once.
+
+The history of each person is handed over as the flat answer and total columns
+kept by the history, which NumPy reads without copying. Every figure is then
+worked out with whole-array operations, so the time taken grows with the number
+of people rather than with the number of assessments. Nothing here needs a
+running Home Assistant instance, so it can be run in the executor.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import Any
+
+import numpy as np
+
+from .history import HistoryColumns
+from .instruments import Instrument
+
+PERCENTILES = (10, 25, 50, 75, 90)
+
+
+def analyze(
+    instrument: Instrument, columns: Mapping[str, HistoryColumns]
+) -> dict[str, Any]:
+    """Summarize the assessments of several people, keyed by person.
+
+    Returns the number of assessments and of people who completed one, the
+    mean and percentiles of the total score, how often each answer was given to
+    each item, how often the risk item was endorsed and by whom, and how many
+    times consecutive assessments of a person moved from one band to another.
+    """
+    item_count = instrument.item_count
+    answer_count = len(instrument.answer_keys)
+    band_keys = list(dict.fromkeys(band for _, band in instrument.bands))
+    band_count = len(band_keys)
+    band_by_score = np.array(
+        [band_keys.index(band) for band in instrument.interpretation_by_score],
+        dtype=np.intp,
+    )
+
+    answers_by_person = {}
+    totals_by_person = {}
+    for person, history in columns.items():
+        if not history.totals:
+            continue
+        answers_by_person[person] = np.frombuffer(
+            history.answers, dtype=np.int8
+        ).reshape(-1, item_count)
+        totals_by_person[person] = np.frombuffer(history.totals, dtype=np.int16)
+
+    answers = (
+        np.concatenate(list(answers_by_person.values()))
+        if answers_by_person
+        else np.zeros((0, item_count), dtype=np.int8)
+    )
+    totals = (
+        np.concatenate(list(totals_by_person.values()))
+        if totals_by_person
+        else np.zeros(0, dtype=np.int16)
+    )
+
+    # Count every (item, answer) pair in one pass.
+    distribution = np.bincount(
+        (np.arange(item_count) * answer_count + answers).ravel(),
+        minlength=item_count * answer_count,
+    ).reshape(item_count, answer_count)
+
+    # Count every (from band, to band) pair of consecutive assessments.
+    transitions = np.zeros(band_count * band_count, dtype=np.intp)
+    for person_totals in totals_by_person.values():
+        bands = band_by_score[person_totals]
+        transitions += np.bincount(
+            bands[:-1] * band_count + bands[1:], minlength=band_count * band_count
+        )
+    transitions = transitions.reshape(band_count, band_count)
+
+    risk = None
+    if instrument.risk_item is not None:
+        endorsed = answers[:, instrument.risk_item] > 0
+        risk = {
+            "item": instrument.risk_item + 1,
+            "endorsed": int(endorsed.sum()),
+            "rate": float(endorsed.mean()) if len(endorsed) else None,
+            "persons": [
+                person
+                for person, person_answers in answers_by_person.items()
+                if person_answers[:, instrument.risk_item].any()
+            ],
+        }
+
+    if len(totals):
+        percentiles = np.percentile(totals, PERCENTILES)
+        total = {
+            "mean": float(totals.mean()),
+            **{
+                f"p{percentile}": float(value)
+                for percentile, value in zip(PERCENTILES, percentiles)
+            },
+        }
+    else:
+        total = {
+            "mean": None,
+            **{f"p{percentile}": None for percentile in PERCENTILES},
+        }
+
+    return {
+        "assessments": len(totals),
+        "persons": len(totals_by_person),
+        "total": total,
+        "items": [
+            dict(zip(instrument.answer_keys, counts))
+            for counts in distribution.tolist()
+        ],
+        "risk_item": risk,
+        "band_transitions": {
+            band: dict(zip(band_keys, counts))
+            for band, counts in zip(band_keys, transitions.tolist())
+        },
+    }
@@ -0,0 +1,203 @@
+"""Columnar archive of the older assessments in a history.
+
+Assessments past the archive age are moved out of the JSON store into a binary
+file beside it in .storage. The file has a short header followed by one
+fixed-width column per field, and is read through a memory map: a time range is
+found by bisecting the timestamp column, and only the rows asked for are ever
+turned back into records. Nothing here needs the event loop, so every function
+is meant to be run in the executor.
+"""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+import mmap
+import os
+from pathlib import Path
+import struct
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+from .instruments import Instrument
+
+MAGIC = b"PHQ9"
+ARCHIVE_VERSION = 1
+
+# Magic, version, item count, reserved, row count and padding to 16 bytes. The
+# columns follow in this order, little-endian: the completion time in
+# microseconds since the epoch (int64), the total (int16), the difficulty
+# (int8, -1 for none) and the item answers of each row in turn (int8).
+HEADER = struct.Struct("<4sBBHI4x")
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_util.UTC)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def _to_microseconds(value: datetime) -> int:
+    """Return a time as microseconds since the epoch."""
+    return (value - EPOCH) // MICROSECOND
+
+
+def _from_microseconds(value: int) -> datetime:
+    """Return microseconds since the epoch as a local time."""
+    return dt_util.as_local(EPOCH + value * MICROSECOND)
+
+
+class PHQ9Archive:
+    """The archived rows of one history, mapped read-only from its file.
+
+    An archive never changes once mapped; compacting more rows into it writes a
+    new file and maps that instead, so readers of the old one are unaffected.
+    """
+
+    def __init__(self, path: Path, instrument: Instrument) -> None:
+        """Initialize an empty archive."""
+        self.path = path
+        self.instrument = instrument
+        self._rows = 0
+        self._times = memoryview(b"").cast("q")
+        self._totals = memoryview(b"").cast("h")
+        self._difficulty = memoryview(b"").cast("b")
+        self._answers = memoryview(b"").cast("b")
+
+    def __len__(self) -> int:
+        """Return the number of archived rows."""
+        return self._rows
+
+    @classmethod
+    def open(cls, path: Path, instrument: Instrument) -> PHQ9Archive:
+        """Map the archive at path; one that does not exist yet is empty."""
+        archive = cls(path, instrument)
+        try:
+            with open(path, "rb") as file:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return archive
+
+        magic, version, item_count, _, rows = HEADER.unpack_from(mapped)
+        if (
+            magic != MAGIC
+            or version != ARCHIVE_VERSION
+            or item_count != instrument.item_count
+            or len(mapped) != HEADER.size + rows * (11 + item_count)
+        ):
+            raise ValueError(f"{path} is not a {instrument.name} archive")
+
+        view = memoryview(mapped)
+        offset = HEADER.size
+        archive._rows = rows
+        archive._times = view[offset : offset + 8 * rows].cast("q")
+        offset += 8 * rows
+        archive._totals = view[offset : offset + 2 * rows].cast("h")
+        offset += 2 * rows
+        archive._difficulty = view[offset : offset + rows].cast("b")
+        offset += rows
+        archive._answers = view[offset:].cast("b")
+        return archive
+
+    def span(self, start: datetime | None, end: datetime | None) -> tuple[int, int]:
+        """Return the positions of the rows completed from start up to end."""
+        times = self._times
+        first = 0 if start is None else bisect_left(times, _to_microseconds(start))
+        last = self._rows if end is None else bisect_right(times, _to_microseconds(end))
+        return first, last
+
+    def last_time(self) -> datetime | None:
+        """Return the completion time of the latest row."""
+        return _from_microseconds(self._times[-1]) if self._rows else None
+
+    def records(self, first: int, last: int) -> list[dict[str, Any]]:
+        """Return the rows from first up to last as history records."""
+        instrument = self.instrument
+        item_count = instrument.item_count
+        no_difficulty = instrument.difficulty_keys is None
+        answers = self._answers[first * item_count : last * item_count].tolist()
+        return [
+            {
+                "timestamp": _from_microseconds(completed).isoformat(),
+                "answers": answers[row * item_count : (row + 1) * item_count],
+                "difficulty": None if no_difficulty else difficulty,
+                "total": total,
+                "band": instrument.interpretation_by_score[total],
+            }
+            for row, (completed, total, difficulty) in enumerate(
+                zip(
+                    self._times[first:last].tolist(),
+                    self._totals[first:last].tolist(),
+                    self._difficulty[first:last].tolist(),
+                )
+            )
+        ]
+
+    def records_at(self, times: list[datetime]) -> list[dict[str, Any]]:
+        """Return the rows completed at any of the given times."""
+        records = []
+        for completed in sorted(set(times)):
+            records.extend(self.records(*self.span(completed, completed)))
+        return records
+
+    def columns(self, first: int, last: int) -> tuple[array, array]:
+        """Return a copy of the answers and totals of the rows from first up to last."""
+        item_count = self.instrument.item_count
+        answers = array("b")
+        answers.frombytes(
+            self._answers[first * item_count : last * item_count].cast("B")
+        )
+        totals = array("h")
+        totals.frombytes(self._totals[first:last].cast("B"))
+        return answers, totals
+
+
+def write_archive(archive: PHQ9Archive, records: list[dict[str, Any]]) -> PHQ9Archive:
+    """Write the rows of an archive along with more records, and map the result.
+
+    The records are merged in by completion time, so they may be older than the
+    archived rows. The new file replaces the old one only once fully written.
+    """
+    instrument = archive.instrument
+    item_count = instrument.item_count
+    rows = len(archive)
+
+    times = array("q")
+    times.frombytes(archive._times.cast("B"))
+    totals = array("h")
+    totals.frombytes(archive._totals.cast("B"))
+    difficulty = array("b")
+    difficulty.frombytes(archive._difficulty.cast("B"))
+    answers = array("b")
+    answers.frombytes(archive._answers.cast("B"))
+    for record in records:
+        times.append(_to_microseconds(dt_util.parse_datetime(record["timestamp"])))
+        totals.append(record["total"])
+        difficulty.append(-1 if record["difficulty"] is None else record["difficulty"])
+        answers.extend(record["answers"])
+
+    rows += len(records)
+    if any(times[row] > times[row + 1] for row in range(rows - 1)):
+        # A stable sort, so rows completed at the same time keep their order.
+        order = sorted(range(rows), key=times.__getitem__)
+        times = array("q", [times[row] for row in order])
+        totals = array("h", [totals[row] for row in order])
+        difficulty = array("b", [difficulty[row] for row in order])
+        answers = array(
+            "b",
+            [
+                answer
+                for row in order
+                for answer in answers[row * item_count : (row + 1) * item_count]
+            ],
+        )
+
+    temporary = archive.path.with_name(f"{archive.path.name}.tmp")
+    archive.path.parent.mkdir(parents=True, exist_ok=True)
+    with open(temporary, "wb") as file:
+        file.write(HEADER.pack(MAGIC, ARCHIVE_VERSION, item_count, 0, rows))
+        for column in (times, totals, difficulty, answers):
+            file.write(column.tobytes())
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, archive.path)
+    return PHQ9Archive.open(archive.path, instrument)
@@ -0,0 +1,407 @@
+"""In-memory scoring state of one questionnaire for a single person."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Sequence
+from datetime import datetime, timedelta
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_ARCHIVE_AGE,
+    CONF_COALESCE_WINDOW,
+    CONF_MEAN_WINDOW,
+    CONF_SLOPE_WINDOW,
+    DEFAULT_ARCHIVE_AGE,
+    DEFAULT_COALESCE_WINDOW,
+    DEFAULT_MEAN_WINDOW,
+    DEFAULT_SLOPE_WINDOW,
+    DOMAIN,
+    EVENT_ASSESSMENT_COMPLETED,
+)
+from .counters import PHQ9Counters, PHQ9PersonCounters
+from .history import PHQ9History, record_time
+from .instruments import PHQ9, Instrument
+from .statistics import async_import_statistics
+from .trend import PHQ9Trend
+
+
+class PHQ9Assessment:
+    """The current answers and score of one person for one instrument.
+
+    The question selects feed their answers in directly; the total is kept up to
+    date by delta from the instrument's score tables and pushed to the sensors in
+    a single pass, without reading anything back from the state machine. Once
+    every question has been answered since the last completed assessment, the
+    answers are completed as a new one when the score is next pushed.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        unique_id: str,
+        person_unique_id: str,
+        name: str,
+        instrument: Instrument,
+        trend: PHQ9Trend,
+        counters: PHQ9PersonCounters,
+        coalesce_window: float = DEFAULT_COALESCE_WINDOW,
+        archive_age: float = DEFAULT_ARCHIVE_AGE,
+    ) -> None:
+        """Initialize the assessment with every answer at its first option."""
+        self.hass = hass
+        self.unique_id = unique_id
+        self.person_unique_id = person_unique_id
+        self.name = name
+        self.instrument = instrument
+        self.device_info = DeviceInfo(
+            identifiers={(DOMAIN, person_unique_id)},
+            name=name,
+            entry_type=dr.DeviceEntryType.SERVICE,
+        )
+        self.history = PHQ9History(
+            hass,
+            unique_id,
+            instrument,
+            timedelta(days=archive_age) if archive_age else None,
+        )
+        self.trend = trend
+        self.counters = counters
+        self.coalesce_window = coalesce_window
+        self._cancel_publish: CALLBACK_TYPE | None = None
+        self.answers = [0] * instrument.answer_count
+        # The questions answered since the last completed assessment.
+        self._answered: set[int] = set()
+        self.total = 0
+        self.last_evaluated: datetime | None = None
+        self._listeners: dict[Callable[[], None], None] = {}
+        self._answer_listeners: dict[int, dict[Callable[[], None], None]] = {}
+
+    @property
+    def interpretation(self) -> str:
+        """Return the interpretation band of the total score."""
+        return self.instrument.interpretation_by_score[self.total]
+
+    @property
+    def subscriptions(self) -> int:
+        """Return the number of active listeners."""
+        return len(self._listeners) + sum(
+            len(listeners) for listeners in self._answer_listeners.values()
+        )
+
+    @callback
+    def async_add_listener(self, update_callback: Callable[[], None]) -> CALLBACK_TYPE:
+        """Listen for changes to the score; returns a function to stop listening."""
+        self._listeners[update_callback] = None
+
+        @callback
+        def remove_listener() -> None:
+            """Stop listening for changes."""
+            self._listeners.pop(update_callback, None)
+
+        return remove_listener
+
+    @callback
+    def async_add_answer_listener(
+        self, index: int, update_callback: Callable[[], None]
+    ) -> CALLBACK_TYPE:
+        """Listen for changes to a single answer."""
+        listeners = self._answer_listeners.setdefault(index, {})
+        listeners[update_callback] = None
+
+        @callback
+        def remove_listener() -> None:
+            """Stop listening for changes."""
+            listeners.pop(update_callback, None)
+
+        return remove_listener
+
+    @callback
+    def async_restore_answer(self, index: int, value: int) -> None:
+        """Restore a previously saved answer without notifying any listener."""
+        if index != self.instrument.difficulty_index:
+            scores = self.instrument.item_scores[index]
+            self.total += scores[value] - scores[self.answers[index]]
+        self.answers[index] = value
+
+    @callback
+    def async_restore_last_evaluated(self, last_evaluated: datetime) -> None:
+        """Restore the previously saved time of the last evaluation."""
+        if self.last_evaluated is None or self.last_evaluated < last_evaluated:
+            self.last_evaluated = last_evaluated
+
+    async def async_restore_trend(self, scores: list[int] | None = None) -> None:
+        """Refill an empty trend from saved scores, or else from the history.
+
+        The trend entities restore it as they are added; one that saved no
+        scores, or is disabled, leaves it to the latest completed assessments.
+        """
+        if not scores and not self.trend.scores:
+            scores = [
+                record["total"]
+                for record in await self.history.async_get_latest(self.trend.size)
+            ]
+        self.trend.restore(scores or [])
+
+    @callback
+    def async_set_answer(self, index: int, value: int) -> None:
+        """Record the answer at index, after the items for the difficulty.
+
+        Answering a question again with the same answer still counts towards
+        completing the assessment.
+        """
+        self._answered.add(index)
+        previous = self.answers[index]
+        if previous == value and not self._completed:
+            return
+
+        if previous != value:
+            self.answers[index] = value
+            if index != self.instrument.difficulty_index:
+                scores = self.instrument.item_scores[index]
+                self.total += scores[value] - scores[previous]
+            self._async_update_answer_listeners(index)
+        self.counters.recomputes += 1
+        self.last_evaluated = dt_util.now()
+        if not self.coalesce_window:
+            self._async_publish()
+        elif self._cancel_publish is None:
+            # Further answers within the window are pushed along with this one.
+            self._cancel_publish = async_call_later(
+                self.hass, self.coalesce_window, self._async_publish
+            )
+
+    @callback
+    def async_submit(self, answers: Sequence[int]) -> None:
+        """Record a whole questionnaire, the items followed by any difficulty.
+
+        Every answer is applied before anything is pushed, so listeners only see
+        the final score and each affected entity writes its state once.
+        """
+        changed = [
+            index
+            for index, (previous, value) in enumerate(zip(self.answers, answers))
+            if previous != value
+        ]
+        self.answers = list(answers)
+        self.total = self.instrument.score(self.answers)
+        self.counters.recomputes += 1
+        self.last_evaluated = dt_util.now()
+        record = self._async_complete()
+        for index in changed:
+            self._async_update_answer_listeners(index)
+        self.async_update_listeners()
+        self._async_fire_completed(record)
+
+    async def async_import(self, records: list[dict[str, Any]]) -> int:
+        """Add a batch of previously completed assessments to the history.
+
+        They go into the history and the statistics only; nothing is pushed to
+        the entities until async_refresh is called once every batch is in.
+        Assessments already in the history are skipped; returns how many were
+        added.
+        """
+        records = await self.history.async_import(records)
+        if records:
+            await async_import_statistics(
+                self.hass,
+                self.unique_id,
+                self.instrument,
+                self.name,
+                self.history,
+                records,
+            )
+        return len(records)
+
+    async def async_refresh(self) -> None:
+        """Catch up with imported assessments, then push the result once.
+
+        The trend is rebuilt from the history and the answers follow the latest
+        assessment, so each affected entity writes its state at most once
+        however many assessments were imported.
+        """
+        if not (latest_records := await self.history.async_get_latest(self.trend.size)):
+            return
+        self.trend.clear()
+        self.trend.restore([record["total"] for record in latest_records])
+        self.counters.recomputes += 1
+
+        changed = []
+        latest = latest_records[-1]
+        completed = record_time(latest)
+        if self.last_evaluated is None or self.last_evaluated < completed:
+            answers = latest["answers"][:]
+            if self.instrument.difficulty_index is not None:
+                answers.append(latest["difficulty"])
+            changed = [
+                index
+                for index, (previous, value) in enumerate(zip(self.answers, answers))
+                if previous != value
+            ]
+            self.answers = answers
+            self.total = latest["total"]
+            self.last_evaluated = completed
+
+        for index in changed:
+            self._async_update_answer_listeners(index)
+        self.async_update_listeners()
+
+    @property
+    def _completed(self) -> bool:
+        """Return whether every question has been answered since the last time."""
+        return len(self._answered) == self.instrument.answer_count
+
+    @callback
+    def _async_complete(self) -> dict[str, Any]:
+        """Record the current answers as a completed assessment."""
+        self._answered.clear()
+        self.trend.add(self.total)
+        record = assessment_record(self.instrument, self.last_evaluated, self.answers)
+        self.history.async_append(record)
+        self.hass.async_create_task(
+            async_import_statistics(
+                self.hass,
+                self.unique_id,
+                self.instrument,
+                self.name,
+                self.history,
+                [record],
+            )
+        )
+        return record
+
+    @callback
+    def _async_fire_completed(self, record: dict[str, Any]) -> None:
+        """Fire an event with everything an automation needs to know.
+
+        It is fired once the sensors have been updated, so automations that go
+        on to read them see the new score.
+        """
+        instrument = self.instrument
+        person = self.hass.data[DOMAIN]["persons"].get(self.person_unique_id)
+        difficulty = record["difficulty"]
+        if difficulty is not None:
+            difficulty = instrument.difficulty_keys[difficulty]
+        self.hass.bus.async_fire(
+            EVENT_ASSESSMENT_COMPLETED,
+            {
+                "person": None if person is None else person.registry_entry.entity_id,
+                "instrument": instrument.key,
+                "timestamp": record["timestamp"],
+                "answers": [
+                    instrument.answer_keys[answer] for answer in record["answers"]
+                ],
+                "difficulty": difficulty,
+                "total": record["total"],
+                "band": record["band"],
+                "change": self.trend.change,
+            },
+        )
+
+    @callback
+    def _async_update_answer_listeners(self, index: int) -> None:
+        """Notify the listeners of a single answer."""
+        for update_callback in list(self._answer_listeners.get(index, ())):
+            update_callback()
+
+    @callback
+    def _async_publish(self, _now: datetime | None = None) -> None:
+        """Push the score, completing the assessment if every answer is in.
+
+        Without a coalescing window this follows every answer, otherwise it is
+        called once the window has closed.
+        """
+        self._cancel_publish = None
+        record = self._async_complete() if self._completed else None
+        self.async_update_listeners()
+        if record is not None:
+            self._async_fire_completed(record)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Push the current score to every listener."""
+        self.async_shutdown()
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    @callback
+    def async_flush(self) -> None:
+        """Push a score waiting for its coalescing window straight away."""
+        if self._cancel_publish is not None:
+            self._async_publish()
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Cancel a pending push of the score."""
+        if self._cancel_publish is not None:
+            self._cancel_publish()
+            self._cancel_publish = None
+
+
+def assessment_record(
+    instrument: Instrument, completed: datetime, answers: Sequence[int]
+) -> dict[str, Any]:
+    """Score a questionnaire, the items followed by any difficulty.
+
+    Returns the record kept in the history of the person.
+    """
+    total = instrument.score(answers)
+    difficulty_index = instrument.difficulty_index
+    return {
+        "timestamp": completed.isoformat(),
+        "answers": list(answers[: instrument.item_count]),
+        "difficulty": None if difficulty_index is None else answers[difficulty_index],
+        "total": total,
+        "band": instrument.interpretation_by_score[total],
+    }
+
+
+def assessment_id(person_unique_id: str, instrument: Instrument) -> str:
+    """Return the id of the assessment of a person for an instrument.
+
+    The PHQ-9 assessment keeps the bare id of the person, which its entities,
+    history and statistics have always been keyed by.
+    """
+    if instrument is PHQ9:
+        return person_unique_id
+    return f"{person_unique_id}_{instrument.key}"
+
+
+@callback
+def async_get_assessment(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    person_entity: er.RegistryEntry,
+    instrument: Instrument,
+) -> PHQ9Assessment:
+    """Return the assessment of a person, creating it on first use."""
+    assessments: dict[str, PHQ9Assessment] = hass.data[DOMAIN].setdefault(
+        "assessments", {}
+    )
+    counters: PHQ9Counters = hass.data[DOMAIN]["counters"]
+    unique_id = assessment_id(person_entity.unique_id, instrument)
+    if (assessment := assessments.get(unique_id)) is None:
+        assessment = assessments[unique_id] = PHQ9Assessment(
+            hass,
+            unique_id,
+            person_entity.unique_id,
+            person_entity.name
+            or person_entity.original_name
+            or person_entity.entity_id,
+            instrument,
+            PHQ9Trend(
+                entry.options.get(CONF_MEAN_WINDOW, DEFAULT_MEAN_WINDOW),
+                entry.options.get(CONF_SLOPE_WINDOW, DEFAULT_SLOPE_WINDOW),
+                instrument.meaningful_change,
+            ),
+            counters.person(unique_id),
+            entry.options.get(CONF_COALESCE_WINDOW, DEFAULT_COALESCE_WINDOW),
+            entry.options.get(CONF_ARCHIVE_AGE, DEFAULT_ARCHIVE_AGE),
+        )
+    return assessment
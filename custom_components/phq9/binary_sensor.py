@@ -0,0 +1,121 @@
+"""Platform for PHQ-9 binary sensors.
+
+Kroenke K, Spitzer RL, Williams JB. The PHQ-9: validity of a brief depression severity measure. J Gen Intern Med. 2001 Sep;16(9):606-13. doi: 10.1046/j.1525-1497.2001.016009606.x. PMID: 11556941; PMCID: PMC1495268.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from homeassistant.components.binary_sensor import ENTITY_ID_FORMAT, BinarySensorEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.restore_state import RestoreEntity
+
+from .assessment import PHQ9Assessment, async_get_assessment
+from .const import CONF_COMPACT, DEFAULT_COMPACT, DOMAIN, SIGNAL_PERSON_ADDED
+from .entity import PHQ9Entity
+from .instruments import enabled_instruments
+from .person_index import PHQ9PersonIndex
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up the PHQ-9 binary sensors."""
+    if entry.options.get(CONF_COMPACT, DEFAULT_COMPACT):
+        # The assessment sensor holds whether the change was meaningful.
+        return
+
+    persons: PHQ9PersonIndex = hass.data[DOMAIN]["persons"]
+
+    binary_sensors = []
+    for person in persons:
+        binary_sensors.extend(
+            _async_person_binary_sensors(hass, entry, person.registry_entry)
+        )
+
+    async_add_entities(binary_sensors)
+
+    @callback
+    def async_add_person(person_entity: er.RegistryEntry) -> None:
+        """Add the binary sensors for a person created after setup."""
+        async_add_entities(_async_person_binary_sensors(hass, entry, person_entity))
+
+    entry.async_on_unload(
+        async_dispatcher_connect(hass, SIGNAL_PERSON_ADDED, async_add_person)
+    )
+
+
+@callback
+def _async_person_binary_sensors(
+    hass: HomeAssistant, entry: ConfigEntry, person_entity: er.RegistryEntry
+) -> list[BinarySensorEntity]:
+    """Create the binary sensors of every enabled instrument for a single person."""
+    binary_sensors: list[BinarySensorEntity] = []
+    for instrument in enabled_instruments(entry.options):
+        assessment = async_get_assessment(hass, entry, person_entity, instrument)
+        binary_sensors.append(
+            PHQ9MeaningfulChangeBinarySensor(
+                hass,
+                person_entity,
+                assessment.device_info,
+                f"{assessment.unique_id}_meaningful_change",
+                assessment,
+            )
+        )
+
+    return binary_sensors
+
+
+class PHQ9MeaningfulChangeBinarySensor(PHQ9Entity, BinarySensorEntity, RestoreEntity):
+    """Representation of a PHQ-9 clinically meaningful change binary sensor."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        person_entity: er.RegistryEntry,
+        device_info: DeviceInfo,
+        unique_id: str,
+        assessment: PHQ9Assessment,
+    ):
+        """Initialize the binary sensor."""
+        self.hass = hass
+        self._person_entity = person_entity
+        self._attr_device_info = device_info
+        self._attr_unique_id = unique_id
+        self.entity_id = ENTITY_ID_FORMAT.format(f"{DOMAIN}_{unique_id}")
+        self._assessment = assessment
+        self._attr_is_on = assessment.trend.meaningful_change
+        self._attr_translation_key = f"{assessment.instrument.key}_meaningful_change"
+        self._attr_has_entity_name = True
+        self._attr_should_poll = False
+
+    async def async_added_to_hass(self) -> None:
+        """Restore the last state and listen for completed assessments."""
+        await super().async_added_to_hass()
+        await self._assessment.async_restore_trend()
+        self._attr_is_on = self._assessment.trend.meaningful_change
+        if (last_state := await self.async_get_last_state()) is not None:
+            if last_state.state in (STATE_ON, STATE_OFF):
+                self._attr_is_on = last_state.state == STATE_ON
+        self.async_on_remove(
+            self._assessment.async_add_listener(self._async_update_meaningful_change)
+        )
+
+    @callback
+    def _async_update_meaningful_change(self) -> None:
+        """Update whether the score moved by a clinically meaningful amount."""
+        if self._attr_is_on == self._assessment.trend.meaningful_change:
+            return
+        self._attr_is_on = self._assessment.trend.meaningful_change
+        self.async_write_ha_state()
@@ -1,7 +1,30 @@
 """Config flow for PHQ-9."""
 
+import voluptuous as vol
+
 from homeassistant import config_entries
-from .const import DOMAIN
+from homeassistant.core import callback
+from homeassistant.helpers import config_validation as cv, entity_registry as er
+
+from .const import (
+    CONF_ARCHIVE_AGE,
+    CONF_COALESCE_WINDOW,
+    CONF_COMPACT,
+    CONF_INSTRUMENTS,
+    CONF_MEAN_WINDOW,
+    CONF_PERSONS,
+    CONF_REMINDER_INTERVAL,
+    CONF_SLOPE_WINDOW,
+    DEFAULT_ARCHIVE_AGE,
+    DEFAULT_COALESCE_WINDOW,
+    DEFAULT_COMPACT,
+    DEFAULT_INSTRUMENTS,
+    DEFAULT_MEAN_WINDOW,
+    DEFAULT_REMINDER_INTERVAL,
+    DEFAULT_SLOPE_WINDOW,
+    DOMAIN,
+)
+from .instruments import INSTRUMENTS
 
 
 class PHQ9ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -18,3 +41,85 @@ class PHQ9ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             return self.async_create_entry(title="", data={})
 
         return self.async_show_form(step_id="user")
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Get the options flow for this handler."""
+        return PHQ9OptionsFlowHandler(config_entry)
+
+
+class PHQ9OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle the options for PHQ-9."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize the options flow."""
+        self._entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self._entry.options
+        # Everyone, including people added later, is enrolled while the
+        # selection is left empty.
+        persons = {
+            registry_entry.unique_id: registry_entry.name
+            or registry_entry.original_name
+            or registry_entry.entity_id
+            for registry_entry in er.async_get(self.hass).entities.values()
+            if registry_entry.domain == "person"
+        }
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_PERSONS,
+                        default=[
+                            unique_id
+                            for unique_id in options.get(CONF_PERSONS, [])
+                            if unique_id in persons
+                        ],
+                    ): cv.multi_select(persons),
+                    vol.Required(
+                        CONF_MEAN_WINDOW,
+                        default=options.get(CONF_MEAN_WINDOW, DEFAULT_MEAN_WINDOW),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=52)),
+                    vol.Required(
+                        CONF_SLOPE_WINDOW,
+                        default=options.get(CONF_SLOPE_WINDOW, DEFAULT_SLOPE_WINDOW),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=2, max=52)),
+                    vol.Required(
+                        CONF_COALESCE_WINDOW,
+                        default=options.get(
+                            CONF_COALESCE_WINDOW, DEFAULT_COALESCE_WINDOW
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=300)),
+                    vol.Required(
+                        CONF_INSTRUMENTS,
+                        default=options.get(CONF_INSTRUMENTS, DEFAULT_INSTRUMENTS),
+                    ): cv.multi_select(
+                        {
+                            key: instrument.name
+                            for key, instrument in INSTRUMENTS.items()
+                        }
+                    ),
+                    vol.Required(
+                        CONF_REMINDER_INTERVAL,
+                        default=options.get(
+                            CONF_REMINDER_INTERVAL, DEFAULT_REMINDER_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=365)),
+                    vol.Required(
+                        CONF_COMPACT,
+                        default=options.get(CONF_COMPACT, DEFAULT_COMPACT),
+                    ): bool,
+                    vol.Required(
+                        CONF_ARCHIVE_AGE,
+                        default=options.get(CONF_ARCHIVE_AGE, DEFAULT_ARCHIVE_AGE),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=3650)),
+                }
+            ),
+        )
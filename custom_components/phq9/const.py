@@ -2,6 +2,29 @@
 
 DOMAIN = "phq9"
 
+PLATFORMS = ["binary_sensor", "select", "sensor"]
+
+CONF_ARCHIVE_AGE = "archive_age"
+CONF_COALESCE_WINDOW = "coalesce_window"
+CONF_COMPACT = "compact"
+CONF_INSTRUMENTS = "instruments"
+CONF_MEAN_WINDOW = "mean_window"
+CONF_PERSONS = "persons"
+CONF_REMINDER_INTERVAL = "reminder_interval"
+CONF_SLOPE_WINDOW = "slope_window"
+
+# Days after which assessments move to the columnar archive; 0 never archives.
+DEFAULT_ARCHIVE_AGE = 365
+# Seconds over which answer changes are batched; 0 publishes every change.
+DEFAULT_COALESCE_WINDOW = 0
+# A single assessment sensor per person instead of one entity per question.
+DEFAULT_COMPACT = False
+DEFAULT_INSTRUMENTS = ["phq9"]
+DEFAULT_MEAN_WINDOW = 4
+# Days without an evaluation before a reminder is due; 0 turns reminders off.
+DEFAULT_REMINDER_INTERVAL = 14
+DEFAULT_SLOPE_WINDOW = 6
+
 PHQ9_ANSWER_KEYS = [
     "not_at_all",
     "several_days",
@@ -16,4 +39,37 @@ DIFFICULTY_ANSWER_KEYS = [
     "extremely_difficult",
 ]
 
-SCORE_MAP = {answer_key: i for i, answer_key in enumerate(PHQ9_ANSWER_KEYS)}
+QUESTION_COUNT = 9
+
+# Upper bound (inclusive) of the total score for each interpretation band.
+INTERPRETATION_BANDS = (
+    (4, "none_minimal"),
+    (9, "mild"),
+    (14, "moderate"),
+    (19, "moderately_severe"),
+    (27, "severe"),
+)
+
+SIGNAL_PERSON_ADDED = f"{DOMAIN}_person_added"
+
+EVENT_ASSESSMENT_COMPLETED = f"{DOMAIN}_assessment_completed"
+EVENT_REASSESSMENT_DUE = f"{DOMAIN}_reassessment_due"
+
+ATTR_ANSWER = "answer"
+ATTR_ANSWERS = "answers"
+ATTR_ASSESSMENTS = "assessments"
+ATTR_DIFFICULTY = "difficulty"
+ATTR_END = "end"
+ATTR_FILENAME = "filename"
+ATTR_FORMAT = "format"
+ATTR_INSTRUMENT = "instrument"
+ATTR_OVERWRITE = "overwrite"
+ATTR_PERSON = "person"
+ATTR_QUESTION = "question"
+ATTR_START = "start"
+
+SERVICE_ANALYZE = "analyze"
+SERVICE_EXPORT = "export"
+SERVICE_IMPORT = "import"
+SERVICE_SET_ANSWER = "set_answer"
+SERVICE_SUBMIT_ASSESSMENT = "submit_assessment"
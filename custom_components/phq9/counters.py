@@ -0,0 +1,62 @@
+"""Counters of the work done by the PHQ-9 integration."""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from typing import Any
+
+
+@dataclass
+class PHQ9PersonCounters:
+    """Work done for a single person."""
+
+    recomputes: int = 0
+    state_writes: int = 0
+
+
+class PHQ9Counters:
+    """Work done by the integration, per person and in total.
+
+    The counters are plain integers bumped on the hot paths; anything that can
+    be worked out when the diagnostics are downloaded is left until then.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self.persons: dict[str, PHQ9PersonCounters] = {}
+        self.reloads = 0
+        self.persons_added = 0
+        self.persons_removed = 0
+        self.platform_setup_seconds: dict[str, float] = {}
+
+    def person(self, unique_id: str) -> PHQ9PersonCounters:
+        """Return the counters of a person."""
+        if (counters := self.persons.get(unique_id)) is None:
+            counters = self.persons[unique_id] = PHQ9PersonCounters()
+        return counters
+
+    def person_as_dict(self, unique_id: str, subscriptions: int) -> dict[str, Any]:
+        """Return the counters of a person, given their active subscriptions."""
+        return {
+            **asdict(self.persons.get(unique_id) or PHQ9PersonCounters()),
+            "subscriptions": subscriptions,
+        }
+
+    def as_dict(self, subscriptions: dict[str, int]) -> dict[str, Any]:
+        """Return the counters, given the active subscriptions of each person."""
+        persons = {
+            unique_id: self.person_as_dict(unique_id, subscriptions.get(unique_id, 0))
+            for unique_id in self.persons
+        }
+
+        return {
+            "total": {
+                key: sum(counters[key] for counters in persons.values())
+                for key in ("recomputes", "state_writes", "subscriptions")
+            },
+            "reloads": self.reloads,
+            "persons_added": self.persons_added,
+            "persons_removed": self.persons_removed,
+            "platform_setup_seconds": dict(self.platform_setup_seconds),
+            "persons": persons,
+        }
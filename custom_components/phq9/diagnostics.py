@@ -0,0 +1,74 @@
+"""Diagnostics support for the PHQ-9 integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr
+
+from .assessment import PHQ9Assessment, assessment_id
+from .const import DOMAIN
+from .counters import PHQ9Counters
+from .person_index import PHQ9PersonIndex
+from .reminders import PHQ9ReminderScheduler
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry.
+
+    Only counts are included; the answers and scores of each person are not.
+    """
+    counters: PHQ9Counters = hass.data[DOMAIN]["counters"]
+    persons: PHQ9PersonIndex = hass.data[DOMAIN]["persons"]
+    assessments: dict[str, PHQ9Assessment] = hass.data[DOMAIN].get("assessments", {})
+    reminders: PHQ9ReminderScheduler | None = hass.data[DOMAIN].get("reminders")
+
+    return {
+        "options": dict(entry.options),
+        "persons": len(persons),
+        "reminders": 0 if reminders is None else reminders.pending,
+        "counters": counters.as_dict(
+            {
+                unique_id: assessment.subscriptions
+                for unique_id, assessment in assessments.items()
+            }
+        ),
+    }
+
+
+async def async_get_device_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry, device: dr.DeviceEntry
+) -> dict[str, Any]:
+    """Return diagnostics for the device of a person.
+
+    The device is the one place that links the generated entities back to the
+    person they were generated for, rather than an attribute on every state.
+    """
+    counters: PHQ9Counters = hass.data[DOMAIN]["counters"]
+    persons: PHQ9PersonIndex = hass.data[DOMAIN]["persons"]
+    assessments: dict[str, PHQ9Assessment] = hass.data[DOMAIN].get("assessments", {})
+    unique_id = next(
+        identifier for domain, identifier in device.identifiers if domain == DOMAIN
+    )
+    if (person := persons.get(unique_id)) is None:
+        return {}
+
+    return {
+        "person": person.registry_entry.entity_id,
+        "entities": sorted(person.entity_ids.values()),
+        "counters": {
+            instrument.key: counters.person_as_dict(
+                key := assessment_id(unique_id, instrument),
+                (
+                    assessment.subscriptions
+                    if (assessment := assessments.get(key)) is not None
+                    else 0
+                ),
+            )
+            for instrument in person.instruments
+        },
+    }
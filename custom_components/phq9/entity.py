@@ -0,0 +1,20 @@
+"""Base entity for the PHQ-9 integration."""
+
+from __future__ import annotations
+
+from homeassistant.core import callback
+from homeassistant.helpers.entity import Entity
+
+from .assessment import PHQ9Assessment
+
+
+class PHQ9Entity(Entity):
+    """An entity fed by the assessment of a person."""
+
+    _assessment: PHQ9Assessment
+
+    @callback
+    def async_write_ha_state(self) -> None:
+        """Write the state, counting the write against the person."""
+        self._assessment.counters.state_writes += 1
+        super().async_write_ha_state()
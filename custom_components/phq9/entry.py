@@ -0,0 +1,198 @@
+"""Setting up and unloading the PHQ-9 config entry."""
+
+import asyncio
+from datetime import timedelta
+import logging
+from time import perf_counter
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+
+from .assessment import assessment_id
+from .const import (
+    CONF_COMPACT,
+    CONF_PERSONS,
+    CONF_REMINDER_INTERVAL,
+    DEFAULT_COMPACT,
+    DEFAULT_REMINDER_INTERVAL,
+    DOMAIN,
+    PLATFORMS,
+    SIGNAL_PERSON_ADDED,
+)
+from .counters import PHQ9Counters
+from .instruments import enabled_instruments
+from .person_index import PHQ9PersonIndex
+from .reminders import PHQ9ReminderScheduler
+from .services import async_setup_services, async_unload_services
+from .websocket_api import async_setup_websocket_api
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Set up PHQ-9 from a config entry."""
+
+    phq9_hass_data = hass.data.setdefault(DOMAIN, {})
+    # The counters outlive reloads of the config entry.
+    counters: PHQ9Counters = phq9_hass_data.setdefault("counters", PHQ9Counters())
+
+    entity_registry = er.async_get(hass)
+    device_registry = dr.async_get(hass)
+
+    instruments = enabled_instruments(entry.options)
+    persons = phq9_hass_data["persons"] = PHQ9PersonIndex(
+        entity_registry,
+        instruments,
+        entry.options.get(CONF_COMPACT, DEFAULT_COMPACT),
+        entry.options.get(CONF_PERSONS),
+    )
+
+    # Remove the entities of instruments that were disabled, of the other mode
+    # after switching compact mode, of people that are no longer enrolled, or
+    # of people that were removed while Home Assistant was not running.
+    generated = {unique_id for person in persons for unique_id in person.entity_ids}
+    for registry_entry in er.async_entries_for_config_entry(
+        entity_registry, entry.entry_id
+    ):
+        if registry_entry.unique_id not in generated:
+            entity_registry.async_remove(registry_entry.entity_id)
+    for device in dr.async_entries_for_config_entry(device_registry, entry.entry_id):
+        if not any(
+            persons.get(identifier)
+            for domain, identifier in device.identifiers
+            if domain == DOMAIN
+        ):
+            device_registry.async_update_device(
+                device.id, remove_config_entry_id=entry.entry_id
+            )
+
+    @callback
+    def entity_registry_listener(event):
+        """Handle entity registry updates.
+
+        Only the entities of the person that changed are added or removed; the
+        rest of the config entry is left untouched.
+        """
+        entity_id = event.data["entity_id"]
+        if not entity_id.startswith("person."):
+            return
+
+        if event.data["action"] == "create":
+            if (
+                person_entity := entity_registry.async_get(entity_id)
+            ) is None or not persons.is_enrolled(person_entity.unique_id):
+                return
+            persons.async_add(person_entity)
+            counters.persons_added += 1
+            # The platforms create the assessments of the person straight away.
+            async_dispatcher_send(hass, SIGNAL_PERSON_ADDED, person_entity)
+            if reminders := phq9_hass_data.get("reminders"):
+                assessments = phq9_hass_data.get("assessments", {})
+                for instrument in instruments:
+                    if assessment := assessments.get(
+                        assessment_id(person_entity.unique_id, instrument)
+                    ):
+                        reminders.async_track(assessment)
+        elif event.data["action"] == "remove":
+            if (person := persons.async_remove(entity_id)) is None:
+                return
+            unique_id = person.unique_id
+            counters.persons_removed += 1
+            assessments = phq9_hass_data.get("assessments", {})
+            reminders = phq9_hass_data.get("reminders")
+            for instrument in instruments:
+                unique_assessment_id = assessment_id(unique_id, instrument)
+                if reminders:
+                    reminders.async_untrack(unique_assessment_id)
+                if assessment := assessments.pop(unique_assessment_id, None):
+                    assessment.async_shutdown()
+            # Removing the registry entries removes the entities, which in turn
+            # cancels their listeners.
+            if device := device_registry.async_get_device(
+                identifiers={(DOMAIN, unique_id)}
+            ):
+                for registry_entry in er.async_entries_for_device(
+                    entity_registry, device.id, include_disabled_entities=True
+                ):
+                    entity_registry.async_remove(registry_entry.entity_id)
+                device_registry.async_update_device(
+                    device.id, remove_config_entry_id=entry.entry_id
+                )
+        elif (old_entity_id := event.data.get("old_entity_id")) and (
+            person_entity := entity_registry.async_get(entity_id)
+        ):
+            persons.async_rename(old_entity_id, person_entity)
+
+    phq9_hass_data["entity_registry_listener"] = hass.bus.async_listen(
+        er.EVENT_ENTITY_REGISTRY_UPDATED, entity_registry_listener
+    )
+
+    async def async_forward_entry_setup(platform: str) -> None:
+        """Set up a platform, recording how long it took."""
+        start = perf_counter()
+        await hass.config_entries.async_forward_entry_setups(entry, [platform])
+        counters.platform_setup_seconds[platform] = perf_counter() - start
+
+    await asyncio.gather(
+        *(async_forward_entry_setup(platform) for platform in PLATFORMS)
+    )
+
+    # The assessments are created, and their last evaluation restored, by the
+    # platforms, so they are only scheduled once every platform is set up.
+    if reminder_interval := entry.options.get(
+        CONF_REMINDER_INTERVAL, DEFAULT_REMINDER_INTERVAL
+    ):
+        reminders = phq9_hass_data["reminders"] = PHQ9ReminderScheduler(
+            hass, timedelta(days=reminder_interval)
+        )
+        await reminders.async_load()
+        for assessment in phq9_hass_data.get("assessments", {}).values():
+            reminders.async_track(assessment)
+
+    async_setup_services(hass)
+    async_setup_websocket_api(hass)
+
+    @callback
+    def async_flush_assessments(_event: Event) -> None:
+        """Push any coalesced answers before the sensors save their state."""
+        for assessment in phq9_hass_data.get("assessments", {}).values():
+            assessment.async_flush()
+
+    entry.async_on_unload(
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, async_flush_assessments)
+    )
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
+    return True
+
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the config entry when its options change."""
+    hass.data[DOMAIN]["counters"].reloads += 1
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Unload a config entry."""
+
+    async_unload_services(hass)
+
+    if listener := hass.data[DOMAIN].pop("entity_registry_listener", None):
+        listener()
+    hass.data[DOMAIN].pop("persons", None)
+    if reminders := hass.data[DOMAIN].pop("reminders", None):
+        reminders.async_shutdown()
+        await reminders.async_flush()
+    # Push any coalesced answers so the sensors save the current score, and
+    # write the histories before the reloaded entry reads them.
+    assessments = hass.data[DOMAIN].pop("assessments", {}).values()
+    for assessment in assessments:
+        assessment.async_flush()
+    await asyncio.gather(
+        *(assessment.history.async_flush() for assessment in assessments)
+    )
+
+    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
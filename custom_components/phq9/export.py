@@ -0,0 +1,118 @@
+"""Export of completed assessments to CSV or JSON Lines."""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+import csv
+from datetime import datetime
+import json
+from pathlib import Path
+from typing import Any, TextIO
+
+from homeassistant.core import HomeAssistant
+
+from .history import PHQ9History
+from .instruments import Instrument
+
+EXPORT_FORMAT_CSV = "csv"
+EXPORT_FORMAT_JSONL = "jsonl"
+EXPORT_FORMATS = [EXPORT_FORMAT_CSV, EXPORT_FORMAT_JSONL]
+
+# Records formatted and written per job in the executor.
+CHUNK_SIZE = 500
+
+
+def fields(instrument: Instrument) -> list[str]:
+    """Return the fields of an exported record of the instrument."""
+    return [
+        "person",
+        "timestamp",
+        *(f"q{i + 1}" for i in range(instrument.item_count)),
+        "difficulty",
+        "total",
+        "band",
+    ]
+
+
+def _row(instrument: Instrument, person: str, record: dict[str, Any]) -> list[Any]:
+    """Return a record as a row of values in the order of its fields."""
+    difficulty = record["difficulty"]
+    return [
+        person,
+        record["timestamp"],
+        *record["answers"],
+        "" if difficulty is None else instrument.difficulty_keys[difficulty],
+        record["total"],
+        record["band"],
+    ]
+
+
+def _open(
+    path: Path, export_format: str, instrument: Instrument, overwrite: bool
+) -> TextIO:
+    """Create the export file, starting with the header of a CSV file.
+
+    Raises FileExistsError if the file exists and may not be overwritten.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    file = path.open("w" if overwrite else "x", encoding="utf-8", newline="")
+    if export_format == EXPORT_FORMAT_CSV:
+        csv.writer(file).writerow(fields(instrument))
+    return file
+
+
+def _write_chunk(
+    file: TextIO,
+    export_format: str,
+    instrument: Instrument,
+    person: str,
+    records: Sequence[dict[str, Any]],
+) -> None:
+    """Write a chunk of the records of one person."""
+    if export_format == EXPORT_FORMAT_CSV:
+        csv.writer(file).writerows(
+            _row(instrument, person, record) for record in records
+        )
+        return
+    keys = fields(instrument)
+    file.writelines(
+        json.dumps(dict(zip(keys, _row(instrument, person, record)))) + "\n"
+        for record in records
+    )
+
+
+async def async_export(
+    hass: HomeAssistant,
+    path: Path,
+    export_format: str,
+    instrument: Instrument,
+    persons: Sequence[tuple[str, PHQ9History]],
+    start: datetime | None = None,
+    end: datetime | None = None,
+    overwrite: bool = False,
+) -> int:
+    """Write the records of each person from start up to end to a file.
+
+    Returns how many were written. The records are read from the history, and
+    all file I/O happens in the executor, a chunk at a time, so neither the
+    records nor the formatted export are ever held in memory as a whole. An
+    existing file is only replaced if overwrite is set.
+    """
+    file = await hass.async_add_executor_job(
+        _open, path, export_format, instrument, overwrite
+    )
+    count = 0
+    try:
+        for person, history in persons:
+            first, last = await history.async_get_span(start, end)
+            for position in range(first, last, CHUNK_SIZE):
+                chunk = await history.async_get_slice(
+                    position, min(position + CHUNK_SIZE, last)
+                )
+                await hass.async_add_executor_job(
+                    _write_chunk, file, export_format, instrument, person, chunk
+                )
+                count += len(chunk)
+    finally:
+        await hass.async_add_executor_job(file.close)
+    return count
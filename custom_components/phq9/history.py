@@ -0,0 +1,333 @@
+"""Persistent history of completed PHQ-9 assessments."""
+
+from __future__ import annotations
+
+from array import array
+import asyncio
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import STORAGE_DIR, Store
+from homeassistant.util import dt as dt_util
+
+from .archive import PHQ9Archive, write_archive
+from .const import DOMAIN
+from .instruments import Instrument
+
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.history"
+
+# Seconds to wait before writing, so a burst of assessments is written once.
+SAVE_DELAY = 10
+
+# Records past the archive age are only moved into the archive this many at a
+# time, so the archive file is rewritten rarely.
+ARCHIVE_BATCH = 50
+
+
+def record_time(record: dict[str, Any]) -> datetime:
+    """Return the time a record was completed."""
+    return dt_util.parse_datetime(record["timestamp"])
+
+
+def _record_key(record: dict[str, Any]) -> tuple:
+    """Return what makes a record the same assessment as another."""
+    return record_time(record), tuple(record["answers"]), record["difficulty"]
+
+
+class HistoryColumns(NamedTuple):
+    """The item answers and totals of a run of records, as flat arrays."""
+
+    # The item answers of each record in turn, without the difficulty.
+    answers: array
+    totals: array
+
+
+class PHQ9History:
+    """Append-only history of the completed assessments of one person.
+
+    Each person has their own store, which is only read from disk the first
+    time the history is used rather than at startup. Records older than the
+    archive age are moved on to a columnar archive file, which is memory-mapped
+    rather than parsed, so only the recent records are ever held in memory.
+
+    Positions count the archived records first, then the recent ones. The
+    completion times of the recent records are kept alongside them, in the
+    same order, so a time range is found by bisection without parsing any
+    timestamps. Their answers and totals are kept in flat arrays too, so they
+    can be analysed without walking the records.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        unique_id: str,
+        instrument: Instrument,
+        archive_age: timedelta | None = None,
+    ) -> None:
+        """Initialize the history."""
+        self._hass = hass
+        self._store: Store[dict[str, list[dict[str, Any]]]] = Store(
+            hass,
+            STORAGE_VERSION,
+            f"{STORAGE_KEY}.{unique_id}",
+            private=True,
+            atomic_writes=True,
+        )
+        self._archive = PHQ9Archive(
+            Path(hass.config.path(STORAGE_DIR, f"{STORAGE_KEY}.{unique_id}.archive")),
+            instrument,
+        )
+        self._archive_age = archive_age
+        self._lock = asyncio.Lock()
+        self._records: list[dict[str, Any]] | None = None
+        self._times: list[datetime] = []
+        self._answers = array("b")
+        self._totals = array("h")
+        self._pending: list[dict[str, Any]] = []
+
+    async def _async_load(self) -> None:
+        """Read the history from disk on first use."""
+        async with self._lock:
+            if self._records is not None:
+                return
+            data = await self._store.async_load()
+            self._archive = await self._hass.async_add_executor_job(
+                PHQ9Archive.open, self._archive.path, self._archive.instrument
+            )
+            records = data["records"] if data else []
+            if (archived := self._archive.last_time()) is not None:
+                # Left behind if the store was not saved after the last archiving.
+                records = [
+                    record for record in records if record_time(record) > archived
+                ]
+            self._records = records
+            self._async_index()
+            pending, self._pending = self._pending, []
+            for record in pending:
+                self._async_insert(record)
+            if pending:
+                self._async_schedule_save()
+            await self._async_archive()
+
+    async def async_get_span(
+        self, start: datetime | None, end: datetime | None
+    ) -> tuple[int, int]:
+        """Return the positions of the records completed from start up to end.
+
+        The records in the span are those from the first position up to, but
+        not including, the second.
+        """
+        await self._async_load()
+        archive = self._archive
+        archived = len(archive)
+        times = self._times
+        recent_first = 0 if start is None else bisect_left(times, start)
+        recent_last = len(times) if end is None else bisect_right(times, end)
+        first = last = archived
+        if archived:
+            first, last = await self._hass.async_add_executor_job(
+                archive.span, start, end
+            )
+        # Every archived record is older than the recent ones.
+        if first == archived:
+            first += recent_first
+        if last == archived:
+            last += recent_last
+        return first, max(first, last)
+
+    async def async_get_slice(self, first: int, last: int) -> list[dict[str, Any]]:
+        """Return the records, oldest first, from the first position up to last."""
+        await self._async_load()
+        archive = self._archive
+        archived = len(archive)
+        recent = self._records[max(first - archived, 0) : max(last - archived, 0)]
+        if first >= archived:
+            return recent
+        records = await self._hass.async_add_executor_job(
+            archive.records, first, min(last, archived)
+        )
+        return records + recent
+
+    async def async_get_records_between(
+        self, start: datetime | None, end: datetime | None
+    ) -> list[dict[str, Any]]:
+        """Return the records, oldest first, completed from start up to end."""
+        return await self.async_get_slice(*await self.async_get_span(start, end))
+
+    async def async_get_latest(self, count: int) -> list[dict[str, Any]]:
+        """Return up to count of the latest records, oldest first."""
+        await self._async_load()
+        size = len(self._archive) + len(self._records)
+        return await self.async_get_slice(max(size - count, 0), size)
+
+    async def async_get_columns(
+        self, start: datetime | None, end: datetime | None
+    ) -> HistoryColumns:
+        """Return a copy of the answers and totals completed from start up to end."""
+        first, last = await self.async_get_span(start, end)
+        archive = self._archive
+        archived = len(archive)
+        width = archive.instrument.item_count
+        recent_first = max(first - archived, 0)
+        recent_last = max(last - archived, 0)
+        answers = self._answers[recent_first * width : recent_last * width]
+        totals = self._totals[recent_first:recent_last]
+        if first >= archived:
+            return HistoryColumns(answers, totals)
+        archived_answers, archived_totals = await self._hass.async_add_executor_job(
+            archive.columns, first, min(last, archived)
+        )
+        return HistoryColumns(archived_answers + answers, archived_totals + totals)
+
+    @callback
+    def async_append(self, record: dict[str, Any]) -> None:
+        """Append a completed assessment."""
+        if self._records is None:
+            # Keep the record until the history has been read from disk.
+            self._pending.append(record)
+            if len(self._pending) == 1:
+                self._hass.async_create_task(self._async_load())
+            return
+
+        self._async_insert(record)
+        self._async_schedule_save()
+        if (
+            self._archive_age is not None
+            and len(self._records) >= ARCHIVE_BATCH
+            and self._times[ARCHIVE_BATCH - 1] < dt_util.now() - self._archive_age
+        ):
+            self._hass.async_create_task(self._async_archive_locked())
+
+    @callback
+    def _async_insert(self, record: dict[str, Any]) -> None:
+        """Add a record in order of completion, normally at the end."""
+        completed = record_time(record)
+        answers = array("b", record["answers"])
+        if not self._times or self._times[-1] <= completed:
+            self._records.append(record)
+            self._times.append(completed)
+            self._answers.extend(answers)
+            self._totals.append(record["total"])
+            return
+        position = bisect_right(self._times, completed)
+        self._records.insert(position, record)
+        insort(self._times, completed)
+        width = len(answers)
+        self._answers[position * width : position * width] = answers
+        self._totals.insert(position, record["total"])
+
+    @callback
+    def _async_index(self) -> None:
+        """Rebuild the completion times and columns from the recent records."""
+        self._times = [record_time(record) for record in self._records]
+        self._answers = array(
+            "b", [answer for record in self._records for answer in record["answers"]]
+        )
+        self._totals = array("h", [record["total"] for record in self._records])
+
+    async def _async_archive_locked(self) -> None:
+        """Archive the records past the archive age, once nothing else is."""
+        async with self._lock:
+            await self._async_archive()
+
+    async def _async_archive(self, records: list[dict[str, Any]] | None = None) -> None:
+        """Move the records past the archive age, and any given, to the archive.
+
+        The lock must be held. Nothing is moved until enough records are past
+        the archive age, unless records are given.
+        """
+        count = 0
+        if self._archive_age is not None:
+            count = bisect_left(self._times, dt_util.now() - self._archive_age)
+            if count < ARCHIVE_BATCH:
+                count = 0
+        if not count and not records:
+            return
+
+        self._archive = await self._hass.async_add_executor_job(
+            write_archive, self._archive, (records or []) + self._records[:count]
+        )
+        if count:
+            width = self._archive.instrument.item_count
+            del self._records[:count]
+            del self._times[:count]
+            del self._answers[: count * width]
+            del self._totals[:count]
+        # The archived records must leave the store before anything else moves.
+        await self._store.async_save(self._data_to_save())
+
+    async def async_import(self, records: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Merge a batch of previously completed assessments in.
+
+        Returns those added. Assessments the history already holds, such as
+        those of an exported file imported back, are skipped. Only the batch is
+        sorted; each record is then inserted in place, so the recent records
+        are never sorted or indexed again as a whole.
+        """
+        await self._async_load()
+        async with self._lock:
+            records = sorted(await self._async_new_records(records), key=record_time)
+            # Records no newer than the archive go straight into it, to keep
+            # every archived record older than the recent ones.
+            older = []
+            if (archived := self._archive.last_time()) is not None:
+                split = bisect_right(records, archived, key=record_time)
+                older, records = records[:split], records[split:]
+            for record in records:
+                self._async_insert(record)
+            self._async_schedule_save()
+            await self._async_archive(older)
+        return older + records
+
+    async def _async_new_records(
+        self, records: list[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
+        """Return the records not yet in the history, each only once."""
+        archive = self._archive
+        archived = archive.last_time()
+        keys = [_record_key(record) for record in records]
+        seen = set()
+        if older := [key[0] for key in keys if archived and key[0] <= archived]:
+            # The archived records completed at the time of each older record.
+            seen.update(
+                _record_key(record)
+                for record in await self._hass.async_add_executor_job(
+                    archive.records_at, older
+                )
+            )
+        new_records = []
+        for record, key in zip(records, keys):
+            first = bisect_left(self._times, key[0])
+            last = bisect_right(self._times, key[0])
+            if key in seen or any(
+                _record_key(candidate) == key for candidate in self._records[first:last]
+            ):
+                continue
+            seen.add(key)
+            new_records.append(record)
+        return new_records
+
+    async def async_flush(self) -> None:
+        """Write any change still waiting for the save delay straight away.
+
+        A reloaded config entry reads the history afresh, so nothing may be
+        left waiting when the old one is unloaded.
+        """
+        if self._records is None and not self._pending:
+            return
+        await self._async_load()
+        await self._store.async_save(self._data_to_save())
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        """Write the history once things have been quiet for a while."""
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict[str, list[dict[str, Any]]]:
+        """Return the data to write to disk."""
+        return {"records": self._records or []}
@@ -0,0 +1,138 @@
+"""Import of previously completed assessments from CSV or JSON Lines."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Iterator, Sequence
+import csv
+from itertools import islice
+import json
+from pathlib import Path
+from typing import Any, TextIO
+
+from homeassistant.core import HomeAssistant, split_entity_id, valid_entity_id
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.util import dt as dt_util
+
+from .assessment import assessment_record
+from .export import EXPORT_FORMAT_CSV
+from .instruments import Instrument
+
+# Rows read and validated per job in the executor, and written to the history
+# in one batch.
+CHUNK_SIZE = 500
+
+Rows = Iterator[tuple[int, Any]]
+
+
+def _answer(row: dict[str, Any], field: str, answer_keys: Sequence[str]) -> int:
+    """Return the score of an answer, given as an answer key or as its score.
+
+    Errors name the field rather than repeat its value, so reading a file
+    that is not an import never shows what it holds.
+    """
+    text = str(row.get(field)).strip()
+    if text in answer_keys:
+        return answer_keys.index(text)
+    if text.isdigit() and int(text) < len(answer_keys):
+        return int(text)
+    raise ValueError(f"{field} is not one of {', '.join(answer_keys)}")
+
+
+def _parse_row(
+    row: Any, instrument: Instrument, person: str | None
+) -> tuple[str, dict[str, Any]]:
+    """Validate and score a single row; returns the person and its record."""
+    if not isinstance(row, dict):
+        raise ValueError("expected an object")
+    if not (person := row.get("person") or person):
+        raise ValueError("no person given")
+    if (
+        not isinstance(person, str)
+        or not valid_entity_id(person)
+        or split_entity_id(person)[0] != "person"
+    ):
+        raise ValueError("person is not the entity id of a person")
+    if (completed := dt_util.parse_datetime(str(row.get("timestamp")))) is None:
+        raise ValueError("timestamp is not a date and time")
+    if completed.tzinfo is None:
+        completed = completed.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+
+    answers = [
+        _answer(row, f"q{i + 1}", instrument.answer_keys)
+        for i in range(instrument.item_count)
+    ]
+    if instrument.difficulty_keys is not None:
+        answers.append(_answer(row, "difficulty", instrument.difficulty_keys))
+    return person, assessment_record(instrument, completed, answers)
+
+
+def _open(path: Path, import_format: str) -> tuple[TextIO, Rows]:
+    """Open the file to import; returns it along with its numbered rows."""
+    file = path.open(encoding="utf-8", newline="")
+    if import_format == EXPORT_FORMAT_CSV:
+        reader = csv.DictReader(file)
+        return file, ((reader.line_num, row) for row in reader)
+    return file, (
+        (line_num, line) for line_num, line in enumerate(file, 1) if line.strip()
+    )
+
+
+def _read_chunk(
+    rows: Rows, import_format: str, instrument: Instrument, person: str | None
+) -> list[tuple[str, dict[str, Any]]]:
+    """Read, validate and score the next chunk of rows."""
+    chunk = []
+    line_num = 0
+    try:
+        for line_num, row in islice(rows, CHUNK_SIZE):
+            if import_format != EXPORT_FORMAT_CSV:
+                row = json.loads(row)
+            chunk.append(_parse_row(row, instrument, person))
+    except (ValueError, csv.Error) as err:
+        raise ServiceValidationError(f"Line {line_num}: {err}") from err
+    return chunk
+
+
+async def async_read_chunks(
+    hass: HomeAssistant,
+    path: Path,
+    import_format: str,
+    instrument: Instrument,
+    person: str | None,
+) -> AsyncIterator[list[tuple[str, dict[str, Any]]]]:
+    """Read the records in a file a chunk at a time, each with its person.
+
+    Each chunk is read and validated in the executor, and only one is held in
+    memory at a time. Rows without a person of their own belong to the given
+    person.
+    """
+    try:
+        file, rows = await hass.async_add_executor_job(_open, path, import_format)
+    except OSError as err:
+        raise ServiceValidationError(f"Cannot read {path}: {err}") from err
+
+    try:
+        while chunk := await hass.async_add_executor_job(
+            _read_chunk, rows, import_format, instrument, person
+        ):
+            yield chunk
+    finally:
+        await hass.async_add_executor_job(file.close)
+
+
+async def async_read_persons(
+    hass: HomeAssistant,
+    path: Path,
+    import_format: str,
+    instrument: Instrument,
+    person: str | None,
+) -> set[str]:
+    """Validate every row of a file; returns the entity ids of its people.
+
+    Nothing but the people is kept, so a file can be checked as a whole before
+    any of it is imported, however large it is.
+    """
+    persons = set()
+    async for chunk in async_read_chunks(hass, path, import_format, instrument, person):
+        persons.update(entity_id for entity_id, _ in chunk)
+    return persons
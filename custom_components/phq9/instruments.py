@@ -0,0 +1,119 @@
+"""Definitions of the questionnaires the integration can score.
+
+Each instrument is described by a table of its items, answers, weights and
+severity bands, which is compiled once into lookup tables. The assessment,
+entities and services are written against these tables only, so adding an
+instrument needs no code beyond its definition here and its translations.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+from .const import (
+    CONF_INSTRUMENTS,
+    DEFAULT_INSTRUMENTS,
+    DIFFICULTY_ANSWER_KEYS,
+    INTERPRETATION_BANDS,
+    PHQ9_ANSWER_KEYS,
+    QUESTION_COUNT,
+)
+
+
+@dataclass(frozen=True)
+class Instrument:
+    """A questionnaire whose answers are summed into a total score."""
+
+    key: str
+    name: str
+    item_count: int
+    answer_keys: tuple[str, ...]
+    # Upper bound (inclusive) of the total score for each severity band.
+    bands: tuple[tuple[int, str], ...]
+    # A change of at least this many points is considered clinically meaningful.
+    meaningful_change: int
+    # Answer keys of the closing difficulty question, which is not scored.
+    difficulty_keys: tuple[str, ...] | None = None
+    # Multiplier of each item's answer score; every item counts once if left out.
+    item_weights: tuple[int, ...] | None = None
+    # Position of the item asking about thoughts of self-harm, if there is one.
+    risk_item: int | None = None
+
+    # Compiled from the definition above.
+    item_scores: tuple[tuple[int, ...], ...] = field(init=False, repr=False)
+    max_score: int = field(init=False, repr=False)
+    interpretation_by_score: tuple[str, ...] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        """Compile the lookup tables used when scoring."""
+        weights = self.item_weights or (1,) * self.item_count
+        item_scores = tuple(
+            tuple(weight * score for score in range(len(self.answer_keys)))
+            for weight in weights
+        )
+        max_score = sum(scores[-1] for scores in item_scores)
+        object.__setattr__(self, "item_scores", item_scores)
+        object.__setattr__(self, "max_score", max_score)
+        object.__setattr__(
+            self,
+            "interpretation_by_score",
+            tuple(
+                next(band for upper, band in self.bands if score <= upper)
+                for score in range(max_score + 1)
+            ),
+        )
+
+    @property
+    def difficulty_index(self) -> int | None:
+        """Return the position of the difficulty answer, after the items."""
+        return None if self.difficulty_keys is None else self.item_count
+
+    @property
+    def answer_count(self) -> int:
+        """Return the number of answers, the items followed by the difficulty."""
+        return self.item_count + (self.difficulty_keys is not None)
+
+    def score(self, answers: list[int]) -> int:
+        """Return the total score of the answers."""
+        return sum(scores[answer] for scores, answer in zip(self.item_scores, answers))
+
+
+PHQ9 = Instrument(
+    key="phq9",
+    name="PHQ-9",
+    item_count=QUESTION_COUNT,
+    answer_keys=tuple(PHQ9_ANSWER_KEYS),
+    bands=INTERPRETATION_BANDS,
+    meaningful_change=5,
+    difficulty_keys=tuple(DIFFICULTY_ANSWER_KEYS),
+    risk_item=8,
+)
+
+PHQ2 = Instrument(
+    key="phq2",
+    name="PHQ-2",
+    item_count=2,
+    answer_keys=tuple(PHQ9_ANSWER_KEYS),
+    bands=((2, "negative"), (6, "positive")),
+    meaningful_change=2,
+)
+
+GAD7 = Instrument(
+    key="gad7",
+    name="GAD-7",
+    item_count=7,
+    answer_keys=tuple(PHQ9_ANSWER_KEYS),
+    bands=((4, "minimal"), (9, "mild"), (14, "moderate"), (21, "severe")),
+    meaningful_change=4,
+    difficulty_keys=tuple(DIFFICULTY_ANSWER_KEYS),
+)
+
+INSTRUMENTS = {instrument.key: instrument for instrument in (PHQ9, PHQ2, GAD7)}
+
+
+def enabled_instruments(options: Mapping[str, Any]) -> list[Instrument]:
+    """Return the instruments enabled in the options of the config entry."""
+    keys = options.get(CONF_INSTRUMENTS, DEFAULT_INSTRUMENTS)
+    return [instrument for key, instrument in INSTRUMENTS.items() if key in keys]
@@ -0,0 +1,138 @@
+"""Index of the people assessed by the PHQ-9 integration."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+
+from homeassistant.core import callback
+from homeassistant.helpers import entity_registry as er
+
+from .assessment import assessment_id
+from .const import DOMAIN
+from .instruments import Instrument
+
+# Suffixes of the unique ids generated for each instrument, by platform, besides
+# the selects of its questions.
+GENERATED_KEYS: dict[str, tuple[str, ...]] = {
+    "sensor": (
+        "score",
+        "last_evaluated",
+        "score_interpretation",
+        "rolling_mean",
+        "score_change",
+        "score_slope",
+    ),
+    "binary_sensor": ("meaningful_change",),
+}
+
+# In compact mode each instrument only has its assessment sensor.
+COMPACT_KEYS: dict[str, tuple[str, ...]] = {"sensor": ("assessment",)}
+
+
+@dataclass
+class PHQ9Person:
+    """A person along with the entities generated for them."""
+
+    registry_entry: er.RegistryEntry
+    instruments: list[Instrument]
+    compact: bool = False
+    entity_ids: dict[str, str] = field(init=False)
+
+    def __post_init__(self) -> None:
+        """Work out the entity id of every generated entity."""
+        self.entity_ids = {}
+        for instrument in self.instruments:
+            unique_id = assessment_id(self.registry_entry.unique_id, instrument)
+            if self.compact:
+                generated = COMPACT_KEYS
+            else:
+                select_keys = [f"q{i + 1}" for i in range(instrument.item_count)]
+                if instrument.difficulty_keys is not None:
+                    select_keys.append("difficulty")
+                generated = {"select": tuple(select_keys), **GENERATED_KEYS}
+            for platform, keys in generated.items():
+                for key in keys:
+                    entity_id = f"{platform}.{DOMAIN}_{unique_id}_{key}"
+                    self.entity_ids[f"{unique_id}_{key}"] = entity_id
+
+    @property
+    def unique_id(self) -> str:
+        """Return the unique id of the person."""
+        return self.registry_entry.unique_id
+
+
+class PHQ9PersonIndex:
+    """The people known to a config entry, keyed by unique id.
+
+    The entity registry is scanned once when the config entry is set up and the
+    index is then kept current from registry events, so the platforms and the
+    services never have to search the registry themselves. Only the enrolled
+    people are indexed; everyone is enrolled unless a selection was made, and
+    an empty selection enrolls everyone too.
+    """
+
+    def __init__(
+        self,
+        entity_registry: er.EntityRegistry,
+        instruments: list[Instrument],
+        compact: bool = False,
+        enrolled: list[str] | None = None,
+    ) -> None:
+        """Build the index from the person entities in the registry."""
+        self._instruments = instruments
+        self._compact = compact
+        self._enrolled = set(enrolled) if enrolled else None
+        self._persons: dict[str, PHQ9Person] = {}
+        # The registry only reports the entity_id of a removed person.
+        self._unique_ids: dict[str, str] = {}
+        for registry_entry in entity_registry.entities.values():
+            if registry_entry.domain == "person" and self.is_enrolled(
+                registry_entry.unique_id
+            ):
+                self.async_add(registry_entry)
+
+    def __iter__(self) -> Iterator[PHQ9Person]:
+        """Iterate over the people in the index."""
+        return iter(self._persons.values())
+
+    def __len__(self) -> int:
+        """Return the number of people in the index."""
+        return len(self._persons)
+
+    def get(self, unique_id: str) -> PHQ9Person | None:
+        """Return the person with the given unique id."""
+        return self._persons.get(unique_id)
+
+    def is_enrolled(self, unique_id: str) -> bool:
+        """Return whether the person with the given unique id is assessed."""
+        return self._enrolled is None or unique_id in self._enrolled
+
+    def get_unique_id(self, entity_id: str) -> str | None:
+        """Return the unique id of the person with the given entity id."""
+        return self._unique_ids.get(entity_id)
+
+    @callback
+    def async_add(self, registry_entry: er.RegistryEntry) -> PHQ9Person:
+        """Add a person to the index."""
+        person = self._persons[registry_entry.unique_id] = PHQ9Person(
+            registry_entry, self._instruments, self._compact
+        )
+        self._unique_ids[registry_entry.entity_id] = registry_entry.unique_id
+        return person
+
+    @callback
+    def async_remove(self, entity_id: str) -> PHQ9Person | None:
+        """Remove the person with the given entity id from the index."""
+        if (unique_id := self._unique_ids.pop(entity_id, None)) is None:
+            return None
+        return self._persons.pop(unique_id, None)
+
+    @callback
+    def async_rename(
+        self, old_entity_id: str, registry_entry: er.RegistryEntry
+    ) -> None:
+        """Follow a person whose entity id changed."""
+        if self._unique_ids.pop(old_entity_id, None) is None:
+            return
+        self.async_add(registry_entry)
@@ -0,0 +1,189 @@
+"""Reminders to retake a questionnaire once it has not been answered for a while."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from heapq import heapify, heappop, heappush
+from itertools import count
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_time
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .assessment import PHQ9Assessment
+from .const import DOMAIN, EVENT_REASSESSMENT_DUE
+from .person_index import PHQ9PersonIndex
+
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.reminders"
+
+# Seconds to wait before writing, so reminders due together are written once.
+SAVE_DELAY = 10
+
+
+class PHQ9ReminderScheduler:
+    """A single schedule of the reminders of every person.
+
+    The due times are kept in a min-heap and only the earliest one has a timer,
+    so there is one timer however many people there are. A new evaluation just
+    pushes the new due time; the entry it replaces is skipped when it reaches
+    the top of the heap rather than searched for. The evaluation each reminder
+    was sent for is stored, so a restart or reload does not send it again.
+    """
+
+    def __init__(self, hass: HomeAssistant, interval: timedelta) -> None:
+        """Initialize an empty schedule."""
+        self.hass = hass
+        self.interval = interval
+        self._heap: list[tuple[datetime, int, str]] = []
+        # The current due time of each assessment; heap entries that disagree
+        # with it are stale.
+        self._due: dict[str, datetime] = {}
+        self._assessments: dict[str, PHQ9Assessment] = {}
+        self._unsubscribe: dict[str, CALLBACK_TYPE] = {}
+        self._store: Store[dict[str, dict[str, str]]] = Store(
+            hass, STORAGE_VERSION, STORAGE_KEY
+        )
+        # The last evaluation of each assessment a reminder was sent for.
+        self._sent: dict[str, datetime] = {}
+        self._sequence = count()
+        self._armed: datetime | None = None
+        self._cancel_timer: CALLBACK_TYPE | None = None
+
+    @property
+    def pending(self) -> int:
+        """Return the number of reminders waiting to become due."""
+        return len(self._due)
+
+    async def async_load(self) -> None:
+        """Read which reminders were already sent, before tracking anything."""
+        data = await self._store.async_load() or {}
+        self._sent = {
+            unique_id: dt_util.parse_datetime(last_evaluated)
+            for unique_id, last_evaluated in data.get("sent", {}).items()
+        }
+
+    async def async_flush(self) -> None:
+        """Write which reminders were sent straight away."""
+        await self._store.async_save(self._data_to_save())
+
+    @callback
+    def _data_to_save(self) -> dict[str, dict[str, str]]:
+        """Return the data to write to disk."""
+        return {
+            "sent": {
+                unique_id: last_evaluated.isoformat()
+                for unique_id, last_evaluated in self._sent.items()
+            }
+        }
+
+    @callback
+    def async_track(self, assessment: PHQ9Assessment) -> None:
+        """Remind the person whenever the assessment goes unanswered too long."""
+        unique_id = assessment.unique_id
+        if unique_id in self._assessments:
+            return
+        self._assessments[unique_id] = assessment
+
+        @callback
+        def async_evaluated() -> None:
+            """Move the reminder on from the latest evaluation."""
+            self.async_schedule(assessment)
+
+        self._unsubscribe[unique_id] = assessment.async_add_listener(async_evaluated)
+        self.async_schedule(assessment)
+
+    @callback
+    def async_untrack(self, unique_id: str) -> None:
+        """Stop reminding the person about an assessment."""
+        self._assessments.pop(unique_id, None)
+        if unsubscribe := self._unsubscribe.pop(unique_id, None):
+            unsubscribe()
+        if self._sent.pop(unique_id, None) is not None:
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        if self._due.pop(unique_id, None) is not None:
+            self._async_arm()
+
+    @callback
+    def async_schedule(self, assessment: PHQ9Assessment) -> None:
+        """Set the reminder of an assessment from its last evaluation."""
+        if assessment.last_evaluated is None:
+            return
+        sent = self._sent.get(assessment.unique_id)
+        if sent is not None and assessment.last_evaluated <= sent:
+            return
+        due = assessment.last_evaluated + self.interval
+        unique_id = assessment.unique_id
+        if self._due.get(unique_id) == due:
+            return
+        self._due[unique_id] = due
+        heappush(self._heap, (due, next(self._sequence), unique_id))
+        # Drop the stale entries once they outnumber the current ones.
+        if len(self._heap) > 2 * len(self._due) + 16:
+            self._heap = [
+                entry for entry in self._heap if self._due.get(entry[2]) == entry[0]
+            ]
+            heapify(self._heap)
+        self._async_arm()
+
+    @callback
+    def _async_arm(self) -> None:
+        """Set the timer for the earliest reminder, if it changed."""
+        heap = self._heap
+        while heap and self._due.get(heap[0][2]) != heap[0][0]:
+            heappop(heap)
+        due = heap[0][0] if heap else None
+        if due == self._armed:
+            return
+        if self._cancel_timer is not None:
+            self._cancel_timer()
+            self._cancel_timer = None
+        self._armed = due
+        if due is not None:
+            self._cancel_timer = async_track_point_in_time(
+                self.hass, self._async_remind, due
+            )
+
+    @callback
+    def _async_remind(self, now: datetime) -> None:
+        """Fire the reminders that have become due and set the next timer."""
+        self._cancel_timer = None
+        self._armed = None
+        heap = self._heap
+        persons: PHQ9PersonIndex | None = self.hass.data[DOMAIN].get("persons")
+        while heap and heap[0][0] <= now:
+            due, _, unique_id = heappop(heap)
+            if self._due.get(unique_id) != due:
+                continue
+            del self._due[unique_id]
+            assessment = self._assessments[unique_id]
+            self._sent[unique_id] = assessment.last_evaluated
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+            entity_id = None
+            if persons and (person := persons.get(assessment.person_unique_id)):
+                entity_id = person.registry_entry.entity_id
+            self.hass.bus.async_fire(
+                EVENT_REASSESSMENT_DUE,
+                {
+                    "person": entity_id,
+                    "instrument": assessment.instrument.key,
+                    "last_evaluated": assessment.last_evaluated.isoformat(),
+                    "due": due.isoformat(),
+                },
+            )
+        self._async_arm()
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Cancel the timer and stop following every assessment."""
+        if self._cancel_timer is not None:
+            self._cancel_timer()
+            self._cancel_timer = None
+        for unsubscribe in self._unsubscribe.values():
+            unsubscribe()
+        self._unsubscribe.clear()
+        self._assessments.clear()
+        self._due.clear()
+        self._heap.clear()
+        self._armed = None
@@ -0,0 +1,79 @@
+"""Batch scoring of questionnaires, for offline analysis of many assessments.
+
+Nothing here needs a running Home Assistant instance. The scores come from the
+same compiled tables of the instrument that the entities score a single
+assessment with, so both always agree. NumPy is used when it is installed;
+otherwise the answers are scored in plain Python.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Any, NamedTuple
+
+from .instruments import Instrument
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - tested by patching np
+    np = None
+
+
+class BatchScores(NamedTuple):
+    """The total score and interpretation band of each assessment in a batch.
+
+    Both are NumPy arrays when NumPy is available, and lists otherwise.
+    """
+
+    totals: Any
+    bands: Any
+
+
+def score_batch(
+    instrument: Instrument, responses: Sequence[Sequence[int]] | Any
+) -> BatchScores:
+    """Score many assessments at once.
+
+    Each response holds the answer score of every item, in order, as stored in
+    the history; a trailing difficulty answer is ignored. Raises ValueError if
+    a response is too short or an answer is out of range.
+    """
+    if np is not None:
+        return _score_batch_numpy(instrument, responses)
+    return _score_batch_python(instrument, responses)
+
+
+def _score_batch_numpy(instrument: Instrument, responses: Any) -> BatchScores:
+    """Score a batch with a single table lookup and sum over every item."""
+    item_count = instrument.item_count
+    answer_count = len(instrument.answer_keys)
+    answers = np.asarray(responses, dtype=np.intp)
+    if answers.size == 0:
+        return BatchScores(np.zeros(0, dtype=np.intp), np.array([], dtype=object))
+    if answers.ndim != 2 or answers.shape[1] < item_count:
+        raise ValueError(f"{instrument.name} responses need {item_count} answers")
+    answers = answers[:, :item_count]
+    if answers.min() < 0 or answers.max() >= answer_count:
+        raise ValueError(f"Answers must be from 0 to {answer_count - 1}")
+
+    item_scores = np.array(instrument.item_scores, dtype=np.intp)
+    totals = item_scores[np.arange(item_count), answers].sum(axis=1)
+    bands = np.array(instrument.interpretation_by_score, dtype=object)[totals]
+    return BatchScores(totals, bands)
+
+
+def _score_batch_python(
+    instrument: Instrument, responses: Sequence[Sequence[int]]
+) -> BatchScores:
+    """Score a batch one assessment at a time."""
+    item_count = instrument.item_count
+    answer_count = len(instrument.answer_keys)
+    totals = []
+    for response in responses:
+        if len(response) < item_count:
+            raise ValueError(f"{instrument.name} responses need {item_count} answers")
+        if any(not 0 <= answer < answer_count for answer in response[:item_count]):
+            raise ValueError(f"Answers must be from 0 to {answer_count - 1}")
+        totals.append(instrument.score(response))
+    bands = [instrument.interpretation_by_score[total] for total in totals]
+    return BatchScores(totals, bands)
@@ -7,16 +7,22 @@ from typing import Iterable
 
 import logging
 
-from homeassistant.components.select import SelectEntity
+from homeassistant.components.select import ENTITY_ID_FORMAT, SelectEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.helpers.translation import async_get_translations
 
 
-from .const import DOMAIN, PHQ9_ANSWER_KEYS, DIFFICULTY_ANSWER_KEYS
+from .assessment import PHQ9Assessment, async_get_assessment
+from .const import CONF_COMPACT, DEFAULT_COMPACT, DOMAIN, SIGNAL_PERSON_ADDED
+from .entity import PHQ9Entity
+from .instruments import enabled_instruments
+from .person_index import PHQ9PersonIndex
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -27,48 +33,70 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the PHQ-9 input selects."""
+    if entry.options.get(CONF_COMPACT, DEFAULT_COMPACT):
+        # The answers are set through the phq9.set_answer service instead.
+        return
 
-    entity_registry = er.async_get(hass)
+    persons: PHQ9PersonIndex = hass.data[DOMAIN]["persons"]
 
-    person_entities = [
-        entry for entry in entity_registry.entities.values() if entry.domain == "person"
-    ]
+    entities = []
+    for person in persons:
+        entities.extend(_async_person_selects(hass, entry, person.registry_entry))
+
+    async_add_entities(entities)
+
+    @callback
+    def async_add_person(person_entity: er.RegistryEntry) -> None:
+        """Add the input selects for a person created after setup."""
+        async_add_entities(_async_person_selects(hass, entry, person_entity))
+
+    entry.async_on_unload(
+        async_dispatcher_connect(hass, SIGNAL_PERSON_ADDED, async_add_person)
+    )
 
+
+@callback
+def _async_person_selects(
+    hass: HomeAssistant, entry: ConfigEntry, person_entity: er.RegistryEntry
+) -> list[PHQ9QuestionSelect]:
+    """Create the input selects of every enabled instrument for a single person."""
     entities = []
-    for person_entity in person_entities:
-        device_info = DeviceInfo(
-            identifiers={(DOMAIN, person_entity.unique_id)},
-            name=f"PHQ-9 {person_entity.name}",
-            entry_type=dr.DeviceEntryType.SERVICE,
-        )
+    for instrument in enabled_instruments(entry.options):
+        assessment = async_get_assessment(hass, entry, person_entity, instrument)
+        device_info = assessment.device_info
 
-        for i in range(9):
+        for i in range(instrument.item_count):
             entities.append(
                 PHQ9QuestionSelect(
                     hass,
                     person_entity,
                     device_info,
-                    f"{person_entity.unique_id}_q{i+1}",
-                    f"phq9_question_{i+1}",
-                    PHQ9_ANSWER_KEYS,
+                    f"{assessment.unique_id}_q{i+1}",
+                    f"{instrument.key}_question_{i+1}",
+                    list(instrument.answer_keys),
+                    assessment,
+                    i,
                 )
             )
 
-        entities.append(
-            PHQ9QuestionSelect(
-                hass,
-                person_entity,
-                device_info,
-                f"{person_entity.unique_id}_difficulty",
-                "phq9_difficulty",
-                DIFFICULTY_ANSWER_KEYS,
+        if instrument.difficulty_keys is not None:
+            entities.append(
+                PHQ9QuestionSelect(
+                    hass,
+                    person_entity,
+                    device_info,
+                    f"{assessment.unique_id}_difficulty",
+                    f"{instrument.key}_difficulty",
+                    list(instrument.difficulty_keys),
+                    assessment,
+                    instrument.difficulty_index,
+                )
             )
-        )
 
-    async_add_entities(entities)
+    return entities
 
 
-class PHQ9QuestionSelect(SelectEntity):
+class PHQ9QuestionSelect(PHQ9Entity, SelectEntity, RestoreEntity):
     """Representation of a PHQ-9 Question input select."""
 
     def __init__(
@@ -79,25 +107,44 @@ class PHQ9QuestionSelect(SelectEntity):
         unique_id: str,
         translation_key: str,
         options: list[str],
+        assessment: PHQ9Assessment,
+        answer_index: int,
     ):
         """Initialize the input select."""
         self.hass = hass
         self._person_entity = person_entity
         self._attr_device_info = device_info
         self._attr_unique_id = unique_id
+        self.entity_id = ENTITY_ID_FORMAT.format(f"{DOMAIN}_{unique_id}")
         self._attr_translation_key = translation_key
         self._attr_options = options
-        self._attr_current_option = options[0] if options else None
         self._attr_has_entity_name = True
+        self._attr_should_poll = False
+        self._assessment = assessment
+        self._answer_index = answer_index
+
+    async def async_added_to_hass(self) -> None:
+        """Restore the last answer and listen for changes to it."""
+        await super().async_added_to_hass()
+        if (
+            last_state := await self.async_get_last_state()
+        ) is not None and last_state.state in self._attr_options:
+            self._assessment.async_restore_answer(
+                self._answer_index, self._attr_options.index(last_state.state)
+            )
+        self.async_on_remove(
+            self._assessment.async_add_answer_listener(
+                self._answer_index, self.async_write_ha_state
+            )
+        )
 
     @property
-    def extra_state_attributes(self):
-        """Return the state attributes."""
-        return {
-            "person_entity_id": self._person_entity.entity_id,
-        }
+    def current_option(self) -> str:
+        """Return the answer currently held by the person's assessment."""
+        return self._attr_options[self._assessment.answers[self._answer_index]]
 
     async def async_select_option(self, option: str) -> None:
-        """Update the current option."""
-        self._attr_current_option = option
-        self.async_write_ha_state()
+        """Feed the selected option to the person's assessment."""
+        self._assessment.async_set_answer(
+            self._answer_index, self._attr_options.index(option)
+        )
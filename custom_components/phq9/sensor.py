@@ -4,24 +4,64 @@ Kroenke K, Spitzer RL, Williams JB. The PHQ-9: validity of a brief depression se
 """
 
 from __future__ import annotations
-import asyncio
 
-import logging
+from dataclasses import dataclass
 from datetime import datetime
-
-from homeassistant.components.sensor import SensorEntity
+import logging
+from typing import Any
+
+from homeassistant.components.sensor import (
+    ENTITY_ID_FORMAT,
+    RestoreSensor,
+    SensorDeviceClass,
+    SensorEntity,
+    SensorExtraStoredData,
+    SensorStateClass,
+)
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.entity import DeviceInfo
-from homeassistant.helpers.event import async_track_state_change_event
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN, SCORE_MAP
+from .assessment import PHQ9Assessment, async_get_assessment
+from .const import CONF_COMPACT, DEFAULT_COMPACT, DOMAIN, SIGNAL_PERSON_ADDED
+from .entity import PHQ9Entity
+from .instruments import enabled_instruments
+from .person_index import PHQ9PersonIndex
 
 _LOGGER = logging.getLogger(__name__)
 
 
+@dataclass
+class PHQ9TrendExtraStoredData(SensorExtraStoredData):
+    """Sensor data along with the scores held by the person's trend."""
+
+    scores: list[int]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a dict representation of the sensor and trend data."""
+        return {**super().as_dict(), "scores": self.scores}
+
+
+@dataclass
+class PHQ9AssessmentExtraStoredData(PHQ9TrendExtraStoredData):
+    """Trend data along with the answers and time of the assessment."""
+
+    answers: list[int]
+    last_evaluated: str | None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a dict representation of the assessment data."""
+        return {
+            **super().as_dict(),
+            "answers": self.answers,
+            "last_evaluated": self.last_evaluated,
+        }
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
@@ -29,51 +69,69 @@ async def async_setup_entry(
 ) -> None:
     """Set up the PHQ-9 sensors."""
 
-    entity_registry = er.async_get(hass)
-
-    person_entities = [
-        entry for entry in entity_registry.entities.values() if entry.domain == "person"
-    ]
+    persons: PHQ9PersonIndex = hass.data[DOMAIN]["persons"]
 
     sensors = []
-    for person_entity in person_entities:
-        device_info = DeviceInfo(
-            identifiers={(DOMAIN, person_entity.unique_id)},
-            name=person_entity.name,
-            entry_type=dr.DeviceEntryType.SERVICE,
-        )
+    for person in persons:
+        sensors.extend(_async_person_sensors(hass, entry, person.registry_entry))
 
-        sensors.append(
-            PHQ9TotalScoreSensor(
-                hass,
-                person_entity,
-                device_info,
-                f"{person_entity.unique_id}_score",
-            )
-        )
+    async_add_entities(sensors)
 
-        sensors.append(
-            PHQ9LastEvaluatedSensor(
-                hass,
-                person_entity,
-                device_info,
-                f"{person_entity.unique_id}_last_evaluated",
+    @callback
+    def async_add_person(person_entity: er.RegistryEntry) -> None:
+        """Add the sensors for a person created after setup."""
+        async_add_entities(_async_person_sensors(hass, entry, person_entity))
+
+    entry.async_on_unload(
+        async_dispatcher_connect(hass, SIGNAL_PERSON_ADDED, async_add_person)
+    )
+
+
+@callback
+def _async_person_sensors(
+    hass: HomeAssistant, entry: ConfigEntry, person_entity: er.RegistryEntry
+) -> list[SensorEntity]:
+    """Create the sensors of every enabled instrument for a single person."""
+    compact = entry.options.get(CONF_COMPACT, DEFAULT_COMPACT)
+    sensors: list[SensorEntity] = []
+    for instrument in enabled_instruments(entry.options):
+        assessment = async_get_assessment(hass, entry, person_entity, instrument)
+        device_info = assessment.device_info
+
+        if compact:
+            sensors.append(
+                PHQ9AssessmentSensor(
+                    hass,
+                    person_entity,
+                    device_info,
+                    f"{assessment.unique_id}_assessment",
+                    assessment,
+                )
             )
-        )
+            continue
 
-        sensors.append(
-            PHQ9ScoreInterpretationSensor(
+        sensors.extend(
+            sensor_class(
                 hass,
                 person_entity,
                 device_info,
-                f"{person_entity.unique_id}_score_interpretation",
+                f"{assessment.unique_id}_{key}",
+                assessment,
+            )
+            for key, sensor_class in (
+                ("score", PHQ9TotalScoreSensor),
+                ("last_evaluated", PHQ9LastEvaluatedSensor),
+                ("score_interpretation", PHQ9ScoreInterpretationSensor),
+                ("rolling_mean", PHQ9RollingMeanSensor),
+                ("score_change", PHQ9ScoreChangeSensor),
+                ("score_slope", PHQ9ScoreSlopeSensor),
             )
         )
 
-    async_add_entities(sensors)
+    return sensors
 
 
-class PHQ9TotalScoreSensor(SensorEntity):
+class PHQ9TotalScoreSensor(PHQ9Entity, RestoreSensor):
     """Representation of a PHQ-9 Total Score sensor."""
 
     def __init__(
@@ -82,62 +140,86 @@ class PHQ9TotalScoreSensor(SensorEntity):
         person_entity: er.RegistryEntry,
         device_info: DeviceInfo,
         unique_id: str,
+        assessment: PHQ9Assessment,
     ):
         """Initialize the sensor."""
         self.hass = hass
         self._person_entity = person_entity
         self._attr_device_info = device_info
         self._attr_unique_id = unique_id
-        self._attr_native_value = 0
-        self._question_entity_ids = []
-        self._attr_translation_key = "phq9_total_score"
+        self.entity_id = ENTITY_ID_FORMAT.format(f"{DOMAIN}_{unique_id}")
+        self._assessment = assessment
+        self._attr_native_value = assessment.total
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_translation_key = f"{assessment.instrument.key}_total_score"
         self._attr_has_entity_name = True
+        self._attr_should_poll = False
 
     async def async_added_to_hass(self) -> None:
-        """Register state change listener and discover entity IDs."""
+        """Restore the last value and listen for score changes."""
         await super().async_added_to_hass()
+        if (last_sensor_data := await self.async_get_last_sensor_data()) is not None:
+            self._attr_native_value = last_sensor_data.native_value
+        self.async_on_remove(
+            self._assessment.async_add_listener(self._async_update_score)
+        )
 
-        async def _find_question_entities_with_retry():
-            """Find the question entities, retrying if necessary."""
-            entity_registry = er.async_get(self.hass)
-            self._question_entity_ids = []
-            for i in range(9):
-                unique_id = f"{self._person_entity.unique_id}_q{i+1}"
-                entity_id = entity_registry.async_get_entity_id(
-                    "select", DOMAIN, unique_id
-                )
+    @callback
+    def _async_update_score(self) -> None:
+        """Update the total score."""
+        if self._attr_native_value == self._assessment.total:
+            return
+        self._attr_native_value = self._assessment.total
+        self.async_write_ha_state()
 
-                if entity_id:
-                    self._question_entity_ids.append(entity_id)
 
-            self.async_on_remove(
-                async_track_state_change_event(
-                    self.hass,
-                    self._question_entity_ids,
-                    self._async_update_score,
-                )
-            )
-            self.hass.async_create_task(self._async_update_score(None))
-            return
+class PHQ9LastEvaluatedSensor(PHQ9Entity, RestoreSensor):
+    """Representation of a PHQ-9 Last Evaluated sensor."""
 
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        person_entity: er.RegistryEntry,
+        device_info: DeviceInfo,
+        unique_id: str,
+        assessment: PHQ9Assessment,
+    ):
+        """Initialize the sensor."""
+        self.hass = hass
+        self._person_entity = person_entity
+        self._attr_device_info = device_info
+        self._attr_unique_id = unique_id
+        self.entity_id = ENTITY_ID_FORMAT.format(f"{DOMAIN}_{unique_id}")
+        self._assessment = assessment
+        self._attr_native_value = assessment.last_evaluated
+        self._attr_device_class = SensorDeviceClass.TIMESTAMP
+        self._attr_translation_key = f"{assessment.instrument.key}_last_evaluated"
+        self._attr_has_entity_name = True
+        self._attr_should_poll = False
 
-        self.hass.async_create_task(_find_question_entities_with_retry())
+    async def async_added_to_hass(self) -> None:
+        """Restore the last value and listen for answer changes of the person."""
+        await super().async_added_to_hass()
+        if (
+            last_sensor_data := await self.async_get_last_sensor_data()
+        ) is not None and isinstance(last_sensor_data.native_value, datetime):
+            self._attr_native_value = last_sensor_data.native_value
+            self._assessment.async_restore_last_evaluated(last_sensor_data.native_value)
+        self.async_on_remove(
+            self._assessment.async_add_listener(self._async_update_timestamp)
+        )
 
     @callback
-    async def _async_update_score(self, event) -> None:
-        """Update the total score."""
-        score = 0
-        for entity_id in self._question_entity_ids:
-            state = self.hass.states.get(entity_id)
-            if state:
-                score += SCORE_MAP.get(state.state, 0)
-
-        self._attr_native_value = score
+    def _async_update_timestamp(self) -> None:
+        """Update the timestamp."""
+        if self._attr_native_value == self._assessment.last_evaluated:
+            return
+        self._attr_native_value = self._assessment.last_evaluated
         self.async_write_ha_state()
 
 
-class PHQ9LastEvaluatedSensor(SensorEntity):
-    """Representation of a PHQ-9 Last Evaluated sensor."""
+class PHQ9ScoreInterpretationSensor(PHQ9Entity, RestoreSensor):
+    """Representation of a PHQ-9 Score Interpretation sensor."""
 
     def __init__(
         self,
@@ -145,70 +227,95 @@ class PHQ9LastEvaluatedSensor(SensorEntity):
         person_entity: er.RegistryEntry,
         device_info: DeviceInfo,
         unique_id: str,
+        assessment: PHQ9Assessment,
     ):
         """Initialize the sensor."""
         self.hass = hass
         self._person_entity = person_entity
         self._attr_device_info = device_info
         self._attr_unique_id = unique_id
-        self._attr_native_value = None
-        self._all_question_entity_ids = []
-        self._attr_translation_key = "phq9_last_evaluated"
+        self.entity_id = ENTITY_ID_FORMAT.format(f"{DOMAIN}_{unique_id}")
+        self._assessment = assessment
+        self._attr_native_value = assessment.interpretation
+        self._attr_translation_key = f"{assessment.instrument.key}_score_interpretation"
         self._attr_has_entity_name = True
+        self._attr_should_poll = False
 
     async def async_added_to_hass(self) -> None:
-        """Register state change listener and discover entity IDs."""
+        """Restore the last value and listen for score changes."""
         await super().async_added_to_hass()
+        if (last_sensor_data := await self.async_get_last_sensor_data()) is not None:
+            self._attr_native_value = last_sensor_data.native_value
+        self.async_on_remove(
+            self._assessment.async_add_listener(self._async_update_interpretation)
+        )
+
+    @callback
+    def _async_update_interpretation(self) -> None:
+        """Update the score interpretation."""
+        if self._attr_native_value == self._assessment.interpretation:
+            return
+        self._attr_native_value = self._assessment.interpretation
+        self.async_write_ha_state()
 
-        async def _find_question_entities_with_retry():
-            """Find the question entities"""
 
-            entity_registry = er.async_get(self.hass)
-            self._all_question_entity_ids = []
-            for i in range(9):
-                unique_id = f"{self._person_entity.unique_id}_{i+1}"
-                entity_id = entity_registry.async_get_entity_id(
-                    "select", DOMAIN, unique_id
-                )
-                if entity_id:
-                    self._all_question_entity_ids.append(entity_id)
+class PHQ9RollingMeanSensor(PHQ9Entity, RestoreSensor):
+    """Representation of a PHQ-9 rolling mean score sensor."""
 
-            difficulty_unique_id = (
-                f"{self._person_entity.unique_id}_difficulty"
-            )
-            difficulty_entity_id = entity_registry.async_get_entity_id(
-                "select", DOMAIN, difficulty_unique_id
-            )
-            if difficulty_entity_id:
-                self._all_question_entity_ids.append(difficulty_entity_id)
-
-            self.async_on_remove(
-                async_track_state_change_event(
-                    self.hass,
-                    self._all_question_entity_ids,
-                    self._async_update_timestamp,
-                )
-            )
-            return
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        person_entity: er.RegistryEntry,
+        device_info: DeviceInfo,
+        unique_id: str,
+        assessment: PHQ9Assessment,
+    ):
+        """Initialize the sensor."""
+        self.hass = hass
+        self._person_entity = person_entity
+        self._attr_device_info = device_info
+        self._attr_unique_id = unique_id
+        self.entity_id = ENTITY_ID_FORMAT.format(f"{DOMAIN}_{unique_id}")
+        self._assessment = assessment
+        self._attr_native_value = assessment.trend.mean
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_suggested_display_precision = 1
+        self._attr_translation_key = f"{assessment.instrument.key}_rolling_mean"
+        self._attr_has_entity_name = True
+        self._attr_should_poll = False
 
-        self.hass.async_create_task(_find_question_entities_with_retry())
+    async def async_added_to_hass(self) -> None:
+        """Restore the person's trend and listen for completed assessments."""
+        await super().async_added_to_hass()
+        scores = None
+        if (last_extra_data := await self.async_get_last_extra_data()) is not None:
+            scores = last_extra_data.as_dict().get("scores")
+        await self._assessment.async_restore_trend(scores)
+        self._attr_native_value = self._assessment.trend.mean
+        self.async_on_remove(
+            self._assessment.async_add_listener(self._async_update_mean)
+        )
+
+    @property
+    def extra_restore_state_data(self) -> PHQ9TrendExtraStoredData:
+        """Return the sensor data and the scores of the person's trend."""
+        return PHQ9TrendExtraStoredData(
+            self.native_value,
+            self.native_unit_of_measurement,
+            self._assessment.trend.scores,
+        )
 
     @callback
-    async def _async_update_timestamp(self, event) -> None:
-        """Update the timestamp."""
-        old_state = event.data.get("old_state")
-        new_state = event.data.get("new_state")
-        if (
-            old_state is not None
-            and new_state is not None
-            and old_state.state != new_state.state
-        ):
-            self._attr_native_value = datetime.now().isoformat()
-            self.async_write_ha_state()
+    def _async_update_mean(self) -> None:
+        """Update the rolling mean."""
+        if self._attr_native_value == self._assessment.trend.mean:
+            return
+        self._attr_native_value = self._assessment.trend.mean
+        self.async_write_ha_state()
 
 
-class PHQ9ScoreInterpretationSensor(SensorEntity):
-    """Representation of a PHQ-9 Score Interpretation sensor."""
+class PHQ9ScoreChangeSensor(PHQ9Entity, RestoreSensor):
+    """Representation of a PHQ-9 change since previous assessment sensor."""
 
     def __init__(
         self,
@@ -216,60 +323,177 @@ class PHQ9ScoreInterpretationSensor(SensorEntity):
         person_entity: er.RegistryEntry,
         device_info: DeviceInfo,
         unique_id: str,
+        assessment: PHQ9Assessment,
     ):
         """Initialize the sensor."""
         self.hass = hass
         self._person_entity = person_entity
         self._attr_device_info = device_info
         self._attr_unique_id = unique_id
-        self._attr_native_value = "none_minimal"
-        self._total_score_entity_id = None
-        self._attr_translation_key = "phq9_score_interpretation"
+        self.entity_id = ENTITY_ID_FORMAT.format(f"{DOMAIN}_{unique_id}")
+        self._assessment = assessment
+        self._attr_native_value = assessment.trend.change
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_translation_key = f"{assessment.instrument.key}_score_change"
         self._attr_has_entity_name = True
+        self._attr_should_poll = False
 
     async def async_added_to_hass(self) -> None:
-        """Register state change listener."""
+        """Restore the last value and listen for completed assessments."""
         await super().async_added_to_hass()
+        await self._assessment.async_restore_trend()
+        if (last_sensor_data := await self.async_get_last_sensor_data()) is not None:
+            self._attr_native_value = last_sensor_data.native_value
+        else:
+            self._attr_native_value = self._assessment.trend.change
+        self.async_on_remove(
+            self._assessment.async_add_listener(self._async_update_change)
+        )
 
-        async def _find_score_entity_with_retry():
-            """Find the score entity, retrying if necessary."""
-            entity_registry = er.async_get(self.hass)
-            unique_id = f"{self._person_entity.unique_id}_score"
-            self._total_score_entity_id = entity_registry.async_get_entity_id(
-                "sensor", DOMAIN, unique_id
-            )
+    @callback
+    def _async_update_change(self) -> None:
+        """Update the change since the previous assessment."""
+        if self._attr_native_value == self._assessment.trend.change:
+            return
+        self._attr_native_value = self._assessment.trend.change
+        self.async_write_ha_state()
 
-            if self._total_score_entity_id:
-                self.async_on_remove(
-                    async_track_state_change_event(
-                        self.hass,
-                        self._total_score_entity_id,
-                        self._async_update_interpretation,
-                    )
-                )
-                self.hass.async_create_task(self._async_update_interpretation(None))
-                return
 
-        self.hass.async_create_task(_find_score_entity_with_retry())
+class PHQ9ScoreSlopeSensor(PHQ9Entity, RestoreSensor):
+    """Representation of a PHQ-9 score slope sensor."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        person_entity: er.RegistryEntry,
+        device_info: DeviceInfo,
+        unique_id: str,
+        assessment: PHQ9Assessment,
+    ):
+        """Initialize the sensor."""
+        self.hass = hass
+        self._person_entity = person_entity
+        self._attr_device_info = device_info
+        self._attr_unique_id = unique_id
+        self.entity_id = ENTITY_ID_FORMAT.format(f"{DOMAIN}_{unique_id}")
+        self._assessment = assessment
+        self._attr_native_value = assessment.trend.slope
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_suggested_display_precision = 2
+        self._attr_translation_key = f"{assessment.instrument.key}_score_slope"
+        self._attr_has_entity_name = True
+        self._attr_should_poll = False
+
+    async def async_added_to_hass(self) -> None:
+        """Restore the last value and listen for completed assessments."""
+        await super().async_added_to_hass()
+        await self._assessment.async_restore_trend()
+        if (last_sensor_data := await self.async_get_last_sensor_data()) is not None:
+            self._attr_native_value = last_sensor_data.native_value
+        else:
+            self._attr_native_value = self._assessment.trend.slope
+        self.async_on_remove(
+            self._assessment.async_add_listener(self._async_update_slope)
+        )
 
     @callback
-    async def _async_update_interpretation(self, event) -> None:
-        """Update the score interpretation."""
-        state = self.hass.states.get(self._total_score_entity_id)
-        if state and state.state is not None:
-            try:
-                score = int(state.state)
-                if 0 <= score <= 4:
-                    self._attr_native_value = "none_minimal"
-                elif 5 <= score <= 9:
-                    self._attr_native_value = "mild"
-                elif 10 <= score <= 14:
-                    self._attr_native_value = "moderate"
-                elif 15 <= score <= 19:
-                    self._attr_native_value = "moderately_severe"
-                else:  # 20 <= score <= 27:
-                    self._attr_native_value = "severe"
-                self.async_write_ha_state()
-            except (ValueError, TypeError):
-                self._attr_native_value = "unknown"
-                self.async_write_ha_state()
+    def _async_update_slope(self) -> None:
+        """Update the slope of the total score."""
+        if self._attr_native_value == self._assessment.trend.slope:
+            return
+        self._attr_native_value = self._assessment.trend.slope
+        self.async_write_ha_state()
+
+
+class PHQ9AssessmentSensor(PHQ9Entity, RestoreSensor):
+    """The whole assessment of a person as a single sensor, for compact mode.
+
+    The state is the total score; the answers, interpretation, time of the last
+    evaluation and the trend are attributes, so a person costs one entity
+    rather than one per question and score.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        person_entity: er.RegistryEntry,
+        device_info: DeviceInfo,
+        unique_id: str,
+        assessment: PHQ9Assessment,
+    ):
+        """Initialize the sensor."""
+        self.hass = hass
+        self._person_entity = person_entity
+        self._attr_device_info = device_info
+        self._attr_unique_id = unique_id
+        self.entity_id = ENTITY_ID_FORMAT.format(f"{DOMAIN}_{unique_id}")
+        self._assessment = assessment
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_translation_key = f"{assessment.instrument.key}_assessment"
+        self._attr_has_entity_name = True
+        self._attr_should_poll = False
+
+    async def async_added_to_hass(self) -> None:
+        """Restore the assessment and listen for changes to it."""
+        await super().async_added_to_hass()
+        scores = None
+        if (last_extra_data := await self.async_get_last_extra_data()) is not None:
+            data = last_extra_data.as_dict()
+            answers = data.get("answers") or []
+            if len(answers) == self._assessment.instrument.answer_count:
+                for index, value in enumerate(answers):
+                    self._assessment.async_restore_answer(index, value)
+            if (last_evaluated := data.get("last_evaluated")) and (
+                parsed := dt_util.parse_datetime(last_evaluated)
+            ):
+                self._assessment.async_restore_last_evaluated(parsed)
+            scores = data.get("scores")
+        await self._assessment.async_restore_trend(scores)
+        self.async_on_remove(
+            self._assessment.async_add_listener(self.async_write_ha_state)
+        )
+
+    @property
+    def native_value(self) -> int:
+        """Return the total score."""
+        return self._assessment.total
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the answers, interpretation and trend of the assessment."""
+        assessment = self._assessment
+        instrument = assessment.instrument
+        trend = assessment.trend
+        attributes: dict[str, Any] = {
+            "answers": [
+                instrument.answer_keys[answer]
+                for answer in assessment.answers[: instrument.item_count]
+            ],
+        }
+        if (difficulty_index := instrument.difficulty_index) is not None:
+            attributes["difficulty"] = instrument.difficulty_keys[
+                assessment.answers[difficulty_index]
+            ]
+        attributes.update(
+            {
+                "interpretation": assessment.interpretation,
+                "last_evaluated": assessment.last_evaluated,
+                "rolling_mean": trend.mean,
+                "score_change": trend.change,
+                "score_slope": trend.slope,
+                "meaningful_change": trend.meaningful_change,
+            }
+        )
+        return attributes
+
+    @property
+    def extra_restore_state_data(self) -> PHQ9AssessmentExtraStoredData:
+        """Return the sensor data along with the answers and trend."""
+        last_evaluated = self._assessment.last_evaluated
+        return PHQ9AssessmentExtraStoredData(
+            self.native_value,
+            self.native_unit_of_measurement,
+            self._assessment.trend.scores,
+            list(self._assessment.answers),
+            None if last_evaluated is None else last_evaluated.isoformat(),
+        )
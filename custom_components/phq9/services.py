@@ -0,0 +1,422 @@
+"""Services for the PHQ-9 integration."""
+
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable
+from contextlib import aclosing
+from datetime import datetime
+import os
+from pathlib import Path
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import (
+    ServiceValidationError,
+    Unauthorized,
+    UnknownUser,
+)
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .analysis import analyze
+from .assessment import PHQ9Assessment, assessment_id
+from .const import (
+    ATTR_ANSWER,
+    ATTR_ANSWERS,
+    ATTR_ASSESSMENTS,
+    ATTR_DIFFICULTY,
+    ATTR_END,
+    ATTR_FILENAME,
+    ATTR_FORMAT,
+    ATTR_INSTRUMENT,
+    ATTR_OVERWRITE,
+    ATTR_PERSON,
+    ATTR_QUESTION,
+    ATTR_START,
+    DOMAIN,
+    SERVICE_ANALYZE,
+    SERVICE_EXPORT,
+    SERVICE_IMPORT,
+    SERVICE_SET_ANSWER,
+    SERVICE_SUBMIT_ASSESSMENT,
+)
+from .export import (
+    EXPORT_FORMAT_CSV,
+    EXPORT_FORMAT_JSONL,
+    EXPORT_FORMATS,
+    async_export,
+)
+from .importer import async_read_chunks, async_read_persons
+from .instruments import INSTRUMENTS, PHQ9, Instrument
+from .person_index import PHQ9PersonIndex
+
+INSTRUMENT_SCHEMA = vol.All(vol.In(INSTRUMENTS), INSTRUMENTS.get)
+
+# The answers are checked against the instrument once it is known.
+ASSESSMENT_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_PERSON): cv.entity_domain("person"),
+        vol.Optional(ATTR_INSTRUMENT, default=PHQ9.key): INSTRUMENT_SCHEMA,
+        vol.Required(ATTR_ANSWERS): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_DIFFICULTY): cv.string,
+    }
+)
+
+SUBMIT_ASSESSMENT_SCHEMA = vol.Any(
+    ASSESSMENT_SCHEMA,
+    vol.Schema(
+        {
+            vol.Required(ATTR_ASSESSMENTS): vol.All(
+                cv.ensure_list, vol.Length(min=1), [ASSESSMENT_SCHEMA]
+            )
+        }
+    ),
+)
+
+SET_ANSWER_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_PERSON): cv.entity_domain("person"),
+        vol.Optional(ATTR_INSTRUMENT, default=PHQ9.key): INSTRUMENT_SCHEMA,
+        # The number of a question, or difficulty for the closing question.
+        vol.Required(ATTR_QUESTION): vol.Any(
+            ATTR_DIFFICULTY, vol.All(vol.Coerce(int), vol.Range(min=1))
+        ),
+        vol.Required(ATTR_ANSWER): cv.string,
+    }
+)
+
+EXPORT_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_PERSON): vol.All(
+            cv.ensure_list, [cv.entity_domain("person")]
+        ),
+        vol.Optional(ATTR_INSTRUMENT, default=PHQ9.key): INSTRUMENT_SCHEMA,
+        vol.Optional(ATTR_FORMAT, default=EXPORT_FORMAT_CSV): vol.In(EXPORT_FORMATS),
+        vol.Optional(ATTR_START): cv.datetime,
+        vol.Optional(ATTR_END): cv.datetime,
+        vol.Optional(ATTR_FILENAME): cv.string,
+        vol.Optional(ATTR_OVERWRITE, default=False): cv.boolean,
+    }
+)
+
+ANALYZE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_PERSON): vol.All(
+            cv.ensure_list, [cv.entity_domain("person")]
+        ),
+        vol.Optional(ATTR_INSTRUMENT, default=PHQ9.key): INSTRUMENT_SCHEMA,
+        vol.Optional(ATTR_START): cv.datetime,
+        vol.Optional(ATTR_END): cv.datetime,
+    }
+)
+
+IMPORT_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_FILENAME): cv.string,
+        vol.Optional(ATTR_INSTRUMENT, default=PHQ9.key): INSTRUMENT_SCHEMA,
+        vol.Optional(ATTR_FORMAT): vol.In(EXPORT_FORMATS),
+        vol.Optional(ATTR_PERSON): cv.entity_domain("person"),
+    }
+)
+
+
+def _as_aware(value: datetime | None) -> datetime | None:
+    """Return a datetime with a time zone, taking naive ones as local time."""
+    if value is None or value.tzinfo is not None:
+        return value
+    return value.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+
+
+def _get_assessment(
+    hass: HomeAssistant, entity_id: str, instrument: Instrument
+) -> PHQ9Assessment:
+    """Return the assessment of a person for an enabled instrument."""
+    persons: PHQ9PersonIndex = hass.data[DOMAIN]["persons"]
+    assessments: dict[str, PHQ9Assessment] = hass.data[DOMAIN]["assessments"]
+    if (unique_id := persons.get_unique_id(entity_id)) is None:
+        raise ServiceValidationError(f"{entity_id} is not a person known to PHQ-9")
+    if (assessment := assessments.get(assessment_id(unique_id, instrument))) is None:
+        raise ServiceValidationError(f"{instrument.name} is not enabled")
+    return assessment
+
+
+def _selected_assessments(
+    hass: HomeAssistant, entity_ids: list[str] | None, instrument: Instrument
+) -> list[tuple[str, PHQ9Assessment]]:
+    """Return the assessments of the given people, or of everyone if None."""
+    if entity_ids is not None:
+        return [
+            (entity_id, _get_assessment(hass, entity_id, instrument))
+            for entity_id in entity_ids
+        ]
+    persons: PHQ9PersonIndex = hass.data[DOMAIN]["persons"]
+    assessments: dict[str, PHQ9Assessment] = hass.data[DOMAIN]["assessments"]
+    return [
+        (person.registry_entry.entity_id, assessment)
+        for person in persons
+        if (assessment := assessments.get(assessment_id(person.unique_id, instrument)))
+        is not None
+    ]
+
+
+def _submitted_answers(submission: dict[str, Any]) -> list[int]:
+    """Return the answers of a submission, checked against its instrument."""
+    instrument: Instrument = submission[ATTR_INSTRUMENT]
+    answers = submission[ATTR_ANSWERS]
+    if len(answers) != instrument.item_count:
+        raise ServiceValidationError(
+            f"{instrument.name} needs {instrument.item_count} answers"
+        )
+    if invalid := [
+        answer for answer in answers if answer not in instrument.answer_keys
+    ]:
+        raise ServiceValidationError(
+            f"{', '.join(invalid)} are not {instrument.name} answers"
+        )
+    scores = [instrument.answer_keys.index(answer) for answer in answers]
+
+    if instrument.difficulty_keys is None:
+        if ATTR_DIFFICULTY in submission:
+            raise ServiceValidationError(f"{instrument.name} has no difficulty")
+        return scores
+    if ATTR_DIFFICULTY not in submission:
+        raise ServiceValidationError(f"{instrument.name} needs a difficulty")
+    if (difficulty := submission[ATTR_DIFFICULTY]) not in instrument.difficulty_keys:
+        raise ServiceValidationError(
+            f"{difficulty} is not a {instrument.name} difficulty"
+        )
+    scores.append(instrument.difficulty_keys.index(difficulty))
+    return scores
+
+
+async def _async_file_path(hass: HomeAssistant, filename: str) -> Path:
+    """Return the path of a file the export may write or the import read.
+
+    A relative name is taken from the phq9 folder of the configuration
+    directory, and may not leave it. An absolute one must be in a directory
+    listed in allowlist_external_dirs.
+    """
+    folder = Path(hass.config.path(DOMAIN))
+    path = Path(os.path.normpath(folder / filename))
+    if path.is_relative_to(folder) and path != folder:
+        return path
+    if os.path.isabs(filename) and await hass.async_add_executor_job(
+        hass.config.is_allowed_path, str(path)
+    ):
+        return path
+    raise ServiceValidationError(
+        f"{filename} is not in the {DOMAIN} folder or an allowed directory"
+    )
+
+
+@callback
+def _async_register_admin_service(
+    hass: HomeAssistant,
+    service: str,
+    service_func: Callable[[ServiceCall], Awaitable[ServiceResponse]],
+    schema: vol.Schema,
+    supports_response: SupportsResponse,
+) -> None:
+    """Register a service only an administrator may call.
+
+    This is what async_register_admin_service does, but that cannot register
+    a service that responds.
+    """
+
+    async def async_admin_service(call: ServiceCall) -> ServiceResponse:
+        """Refuse the call unless it comes from an administrator."""
+        if call.context.user_id:
+            user = await hass.auth.async_get_user(call.context.user_id)
+            if user is None:
+                raise UnknownUser(context=call.context)
+            if not user.is_admin:
+                raise Unauthorized(context=call.context)
+        return await service_func(call)
+
+    hass.services.async_register(
+        DOMAIN,
+        service,
+        async_admin_service,
+        schema=schema,
+        supports_response=supports_response,
+    )
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the PHQ-9 services."""
+
+    @callback
+    def async_submit_assessment(call: ServiceCall) -> None:
+        """Record one or more complete questionnaires at once."""
+        # Resolve every submission before applying any, so a bad entry in a
+        # batch leaves all assessments untouched.
+        submissions = []
+        for submission in call.data.get(ATTR_ASSESSMENTS, [call.data]):
+            assessment = _get_assessment(
+                hass, submission[ATTR_PERSON], submission[ATTR_INSTRUMENT]
+            )
+            submissions.append((assessment, _submitted_answers(submission)))
+
+        for assessment, answers in submissions:
+            assessment.async_submit(answers)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SUBMIT_ASSESSMENT,
+        async_submit_assessment,
+        schema=SUBMIT_ASSESSMENT_SCHEMA,
+    )
+
+    @callback
+    def async_set_answer(call: ServiceCall) -> None:
+        """Answer a single question, as its select would."""
+        instrument: Instrument = call.data[ATTR_INSTRUMENT]
+        assessment = _get_assessment(hass, call.data[ATTR_PERSON], instrument)
+        question = call.data[ATTR_QUESTION]
+        if question == ATTR_DIFFICULTY:
+            if instrument.difficulty_keys is None:
+                raise ServiceValidationError(f"{instrument.name} has no difficulty")
+            index = instrument.difficulty_index
+            answer_keys = instrument.difficulty_keys
+        else:
+            if question > instrument.item_count:
+                raise ServiceValidationError(
+                    f"{instrument.name} has {instrument.item_count} questions"
+                )
+            index = question - 1
+            answer_keys = instrument.answer_keys
+        if (answer := call.data[ATTR_ANSWER]) not in answer_keys:
+            raise ServiceValidationError(
+                f"{answer} is not one of {', '.join(answer_keys)}"
+            )
+        assessment.async_set_answer(index, answer_keys.index(answer))
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_SET_ANSWER, async_set_answer, schema=SET_ANSWER_SCHEMA
+    )
+
+    async def async_export_assessments(call: ServiceCall) -> ServiceResponse:
+        """Write the completed assessments of one or more people to a file."""
+        instrument: Instrument = call.data[ATTR_INSTRUMENT]
+        selected = _selected_assessments(hass, call.data.get(ATTR_PERSON), instrument)
+
+        export_format = call.data[ATTR_FORMAT]
+        filename = call.data.get(
+            ATTR_FILENAME,
+            f"{instrument.key}_export_{dt_util.now():%Y%m%d_%H%M%S}.{export_format}",
+        )
+        path = await _async_file_path(hass, filename)
+
+        start = _as_aware(call.data.get(ATTR_START))
+        end = _as_aware(call.data.get(ATTR_END))
+        try:
+            count = await async_export(
+                hass,
+                path,
+                export_format,
+                instrument,
+                [(entity_id, assessment.history) for entity_id, assessment in selected],
+                start,
+                end,
+                call.data[ATTR_OVERWRITE],
+            )
+        except FileExistsError as err:
+            raise ServiceValidationError(
+                f"{filename} already exists; set overwrite to replace it"
+            ) from err
+        return {"path": str(path), "assessments": count}
+
+    _async_register_admin_service(
+        hass,
+        SERVICE_EXPORT,
+        async_export_assessments,
+        EXPORT_SCHEMA,
+        SupportsResponse.OPTIONAL,
+    )
+
+    async def async_analyze_assessments(call: ServiceCall) -> ServiceResponse:
+        """Summarize the completed assessments of one or more people."""
+        instrument: Instrument = call.data[ATTR_INSTRUMENT]
+        selected = _selected_assessments(hass, call.data.get(ATTR_PERSON), instrument)
+        start = _as_aware(call.data.get(ATTR_START))
+        end = _as_aware(call.data.get(ATTR_END))
+        columns = {
+            entity_id: await assessment.history.async_get_columns(start, end)
+            for entity_id, assessment in selected
+        }
+        return await hass.async_add_executor_job(analyze, instrument, columns)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_ANALYZE,
+        async_analyze_assessments,
+        schema=ANALYZE_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def async_import_assessments(call: ServiceCall) -> ServiceResponse:
+        """Add the completed assessments in a file to the history."""
+        instrument: Instrument = call.data[ATTR_INSTRUMENT]
+        path = await _async_file_path(hass, call.data[ATTR_FILENAME])
+        import_format = call.data.get(
+            ATTR_FORMAT,
+            EXPORT_FORMAT_JSONL if path.suffix == ".jsonl" else EXPORT_FORMAT_CSV,
+        )
+        # Check the whole file and resolve every person before importing
+        # anything, so an invalid row or an unknown person leaves every history
+        # untouched.
+        persons = await async_read_persons(
+            hass, path, import_format, instrument, call.data.get(ATTR_PERSON)
+        )
+        for entity_id in persons:
+            _get_assessment(hass, entity_id, instrument)
+
+        # Then read the file again, writing each chunk to the histories.
+        added = 0
+        updated: dict[PHQ9Assessment, None] = {}
+        async with aclosing(
+            async_read_chunks(
+                hass, path, import_format, instrument, call.data.get(ATTR_PERSON)
+            )
+        ) as chunks:
+            async for chunk in chunks:
+                batches: dict[str, list[dict[str, Any]]] = {}
+                for entity_id, record in chunk:
+                    batches.setdefault(entity_id, []).append(record)
+                for entity_id, records in batches.items():
+                    assessment = _get_assessment(hass, entity_id, instrument)
+                    if count := await assessment.async_import(records):
+                        added += count
+                        updated[assessment] = None
+
+        for assessment in updated:
+            await assessment.async_refresh()
+
+        return {"persons": len(persons), "assessments": added}
+
+    _async_register_admin_service(
+        hass,
+        SERVICE_IMPORT,
+        async_import_assessments,
+        IMPORT_SCHEMA,
+        SupportsResponse.OPTIONAL,
+    )
+
+
+@callback
+def async_unload_services(hass: HomeAssistant) -> None:
+    """Remove the PHQ-9 services."""
+    hass.services.async_remove(DOMAIN, SERVICE_SUBMIT_ASSESSMENT)
+    hass.services.async_remove(DOMAIN, SERVICE_SET_ANSWER)
+    hass.services.async_remove(DOMAIN, SERVICE_EXPORT)
+    hass.services.async_remove(DOMAIN, SERVICE_IMPORT)
+    hass.services.async_remove(DOMAIN, SERVICE_ANALYZE)
@@ -0,0 +1,92 @@
+"""Long-term statistics for completed PHQ-9 assessments."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from typing import Any
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util, slugify
+
+from .const import DOMAIN
+from .history import PHQ9History
+from .instruments import Instrument
+
+# The last moment of an hour, as the end of a history range is inclusive.
+HOUR = timedelta(hours=1) - timedelta(microseconds=1)
+
+
+def _hour_start(record: dict[str, Any]) -> datetime:
+    """Return the start of the hour, in UTC, a record was completed in."""
+    return dt_util.as_utc(dt_util.parse_datetime(record["timestamp"])).replace(
+        minute=0, second=0, microsecond=0
+    )
+
+
+async def async_import_statistics(
+    hass: HomeAssistant,
+    unique_id: str,
+    instrument: Instrument,
+    name: str,
+    history: PHQ9History,
+    records: Iterable[dict[str, Any]],
+) -> None:
+    """Add completed assessments to the long-term statistics of a person.
+
+    The statistic ids start with the id of the assessment. The total and each
+    question are kept as external statistics, one row per hour holding the
+    mean, minimum and maximum of the assessments in that hour. A row replaces
+    any earlier one for its hour, so each hour the records fall in is worked
+    out again from every assessment in the history, which already holds them.
+    The history is read once, over the span of those hours.
+    """
+    if "recorder" not in hass.config.components:
+        return
+
+    starts = {_hour_start(record) for record in records}
+    if not starts:
+        return
+
+    # Read every hour at once, rather than going back to the history (and the
+    # archive) once for each hour of a long import.
+    hours: dict[datetime, list[list[int]]] = {start: [] for start in sorted(starts)}
+    for record in await history.async_get_records_between(
+        min(starts), max(starts) + HOUR
+    ):
+        start = _hour_start(record)
+        if start in hours:
+            hours[start].append([record["total"], *record["answers"]])
+
+    object_id = slugify(unique_id)
+    # The total followed by each question, in the order of the values above.
+    suffixes = ("total", *(f"q{i + 1}" for i in range(instrument.item_count)))
+    for column, suffix in enumerate(suffixes):
+        metadata = StatisticMetaData(
+            has_mean=True,
+            has_sum=False,
+            name=(
+                f"{instrument.name} {name} total score"
+                if column == 0
+                else f"{instrument.name} {name} question {column}"
+            ),
+            source=DOMAIN,
+            statistic_id=f"{DOMAIN}:{object_id}_{suffix}",
+            unit_of_measurement=None,
+        )
+        statistics = []
+        for start, rows in hours.items():
+            if not rows:
+                continue
+            values = [row[column] for row in rows]
+            statistics.append(
+                StatisticData(
+                    start=start,
+                    mean=sum(values) / len(values),
+                    min=min(values),
+                    max=max(values),
+                )
+            )
+        async_add_external_statistics(hass, metadata, statistics)
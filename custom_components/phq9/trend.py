@@ -0,0 +1,124 @@
+"""Rolling trend of a person's PHQ-9 total score."""
+
+from __future__ import annotations
+
+from collections import deque
+
+
+class PHQ9Trend:
+    """Trend of the total score over the most recent completed assessments.
+
+    The scores are kept in two fixed-size ring buffers, one per window, along
+    with running sums, so each new assessment is folded in with constant work
+    and the history is never rescanned.
+    """
+
+    def __init__(
+        self,
+        mean_window: int,
+        slope_window: int,
+        meaningful_change: int,
+    ) -> None:
+        """Initialize an empty trend."""
+        self._meaningful_change = meaningful_change
+        self._mean_scores: deque[int] = deque(maxlen=mean_window)
+        self._mean_sum = 0
+        # The slope is fitted against the sequence number of each assessment.
+        self._slope_scores: deque[int] = deque(maxlen=slope_window)
+        self._slope_sum = 0
+        self._slope_weighted_sum = 0
+        self._count = 0
+        self.previous: int | None = None
+        self.latest: int | None = None
+
+    @property
+    def scores(self) -> list[int]:
+        """Return the scores in the larger of the two windows, oldest first."""
+        if len(self._mean_scores) > len(self._slope_scores):
+            return list(self._mean_scores)
+        return list(self._slope_scores)
+
+    @property
+    def size(self) -> int:
+        """Return how many of the latest scores make up the trend."""
+        # The change needs the two latest scores even with smaller windows.
+        return max(self._mean_scores.maxlen, self._slope_scores.maxlen, 2)
+
+    def restore(self, scores: list[int]) -> None:
+        """Refill an empty trend with previously saved scores, oldest first."""
+        if self._count:
+            return
+        for total in scores[-self.size :]:
+            self.add(total)
+
+    def clear(self) -> None:
+        """Forget every score."""
+        self._mean_scores.clear()
+        self._mean_sum = 0
+        self._slope_scores.clear()
+        self._slope_sum = 0
+        self._slope_weighted_sum = 0
+        self._count = 0
+        self.previous = None
+        self.latest = None
+
+    def add(self, total: int) -> None:
+        """Fold in the total score of a newly completed assessment."""
+        if len(self._mean_scores) == self._mean_scores.maxlen:
+            self._mean_sum -= self._mean_scores[0]
+        self._mean_scores.append(total)
+        self._mean_sum += total
+
+        if len(self._slope_scores) == self._slope_scores.maxlen:
+            oldest = self._slope_scores[0]
+            self._slope_sum -= oldest
+            self._slope_weighted_sum -= oldest * (self._count - len(self._slope_scores))
+        self._slope_scores.append(total)
+        self._slope_sum += total
+        self._slope_weighted_sum += total * self._count
+
+        self._count += 1
+        self.previous = self.latest
+        self.latest = total
+
+    @property
+    def mean(self) -> float | None:
+        """Return the mean total score over the mean window."""
+        if not self._mean_scores:
+            return None
+        return self._mean_sum / len(self._mean_scores)
+
+    @property
+    def change(self) -> int | None:
+        """Return the change in total score since the previous assessment."""
+        if self.previous is None or self.latest is None:
+            return None
+        return self.latest - self.previous
+
+    @property
+    def slope(self) -> float | None:
+        """Return the least-squares slope, in points per assessment."""
+        n = len(self._slope_scores)
+        if n < 2:
+            return None
+        # Sums of the sequence numbers (and their squares) in the window.
+        first = self._count - n
+        x_sum = n * first + n * (n - 1) // 2
+        x_squared_sum = sum_of_squares(first + n - 1) - sum_of_squares(first - 1)
+        return (n * self._slope_weighted_sum - x_sum * self._slope_sum) / (
+            n * x_squared_sum - x_sum * x_sum
+        )
+
+    @property
+    def meaningful_change(self) -> bool | None:
+        """Return whether the score moved by a clinically meaningful amount."""
+        if (change := self.change) is None:
+            return None
+        return abs(change) >= self._meaningful_change
+
+
+def sum_of_squares(n: int) -> int:
+    """Return 0² + 1² + ... + n²."""
+    if n < 0:
+        return 0
+    return n * (n + 1) * (2 * n + 1) // 6
@@ -0,0 +1,189 @@
+"""Websocket commands for reading the assessment history of a person."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .assessment import PHQ9Assessment, assessment_id
+from .const import ATTR_END, ATTR_INSTRUMENT, ATTR_PERSON, ATTR_START, DOMAIN
+from .history import PHQ9History, record_time
+from .instruments import INSTRUMENTS, PHQ9, Instrument
+from .person_index import PHQ9PersonIndex
+
+ATTR_CURSOR = "cursor"
+ATTR_LIMIT = "limit"
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+HISTORY_SCHEMA = {
+    vol.Required(ATTR_PERSON): cv.entity_domain("person"),
+    vol.Optional(ATTR_INSTRUMENT, default=PHQ9.key): vol.In(INSTRUMENTS),
+    vol.Optional(ATTR_START): cv.datetime,
+    vol.Optional(ATTR_END): cv.datetime,
+}
+
+
+@callback
+def async_setup_websocket_api(hass: HomeAssistant) -> None:
+    """Register the PHQ-9 websocket commands."""
+    websocket_api.async_register_command(hass, websocket_list_assessments)
+    websocket_api.async_register_command(hass, websocket_aggregate_assessments)
+
+
+def _get_assessment(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict
+) -> PHQ9Assessment | None:
+    """Return the assessment asked for, or send an error and return None."""
+    data = hass.data.get(DOMAIN, {})
+    persons: PHQ9PersonIndex | None = data.get("persons")
+    instrument = INSTRUMENTS[msg[ATTR_INSTRUMENT]]
+    if (
+        persons is None
+        or (unique_id := persons.get_unique_id(msg[ATTR_PERSON])) is None
+    ):
+        connection.send_error(
+            msg["id"],
+            websocket_api.ERR_NOT_FOUND,
+            f"{msg[ATTR_PERSON]} is not a person known to PHQ-9",
+        )
+        return None
+    assessments: dict[str, PHQ9Assessment] = data.get("assessments", {})
+    if (assessment := assessments.get(assessment_id(unique_id, instrument))) is None:
+        connection.send_error(
+            msg["id"], websocket_api.ERR_NOT_FOUND, f"{instrument.name} is not enabled"
+        )
+        return None
+    return assessment
+
+
+def _as_aware(value: datetime | None) -> datetime | None:
+    """Return a datetime with a time zone, taking naive ones as local time."""
+    if value is None or value.tzinfo is not None:
+        return value
+    return value.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+
+
+async def _async_cursor(
+    history: PHQ9History, record: dict[str, Any], position: int
+) -> str:
+    """Return the cursor of the record at position.
+
+    The cursor is the completion time of the record along with how many earlier
+    records share that time, so it stays valid when older assessments are
+    imported between pages.
+    """
+    completed = record_time(record)
+    first, _ = await history.async_get_span(completed, None)
+    return f"{completed.isoformat()}|{position - first}"
+
+
+def _parse_cursor(cursor: str) -> tuple[datetime, int] | None:
+    """Return the time and repeat count of a cursor, or None if invalid."""
+    timestamp, _, repeats = cursor.rpartition("|")
+    completed = dt_util.parse_datetime(timestamp)
+    if completed is None or completed.tzinfo is None or not repeats.isdigit():
+        return None
+    return completed, int(repeats)
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/assessments/list",
+        **HISTORY_SCHEMA,
+        vol.Optional(ATTR_CURSOR): cv.string,
+        vol.Optional(ATTR_LIMIT, default=DEFAULT_LIMIT): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=MAX_LIMIT)
+        ),
+    }
+)
+@websocket_api.async_response
+async def websocket_list_assessments(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict
+) -> None:
+    """List a page of the completed assessments of a person, oldest first.
+
+    Pass the cursor of a page to get the page after it; the last page has no
+    cursor.
+    """
+    if (assessment := _get_assessment(hass, connection, msg)) is None:
+        return
+    history = assessment.history
+
+    first, last = await history.async_get_span(
+        _as_aware(msg.get(ATTR_START)), _as_aware(msg.get(ATTR_END))
+    )
+    if ATTR_CURSOR in msg:
+        if (cursor := _parse_cursor(msg[ATTR_CURSOR])) is None:
+            connection.send_error(
+                msg["id"], websocket_api.ERR_INVALID_FORMAT, "Invalid cursor"
+            )
+            return
+        completed, repeats = cursor
+        after, _ = await history.async_get_span(completed, None)
+        first = max(first, after + repeats + 1)
+
+    page_end = min(last, first + msg[ATTR_LIMIT])
+    records = await history.async_get_slice(first, page_end)
+    connection.send_result(
+        msg["id"],
+        {
+            "assessments": records,
+            "cursor": (
+                await _async_cursor(history, records[-1], page_end - 1)
+                if page_end < last
+                else None
+            ),
+        },
+    )
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/assessments/aggregate",
+        **HISTORY_SCHEMA,
+    }
+)
+@websocket_api.async_response
+async def websocket_aggregate_assessments(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict
+) -> None:
+    """Summarize the completed assessments of a person within a time range."""
+    if (assessment := _get_assessment(hass, connection, msg)) is None:
+        return
+    records = await assessment.history.async_get_records_between(
+        _as_aware(msg.get(ATTR_START)), _as_aware(msg.get(ATTR_END))
+    )
+    connection.send_result(msg["id"], aggregate(assessment.instrument, records))
+
+
+def aggregate(instrument: Instrument, records: list[dict[str, Any]]) -> dict[str, Any]:
+    """Return the count, total score range, item means and bands of records."""
+    count = len(records)
+    item_sums = [0] * instrument.item_count
+    totals = []
+    bands = {band: 0 for _, band in instrument.bands}
+    for record in records:
+        for index, answer in enumerate(record["answers"]):
+            item_sums[index] += answer
+        totals.append(record["total"])
+        bands[record["band"]] += 1
+
+    return {
+        "count": count,
+        "total": {
+            "min": min(totals, default=None),
+            "max": max(totals, default=None),
+            "mean": sum(totals) / count if count else None,
+        },
+        "items": [item_sum / count if count else None for item_sum in item_sums],
+        "bands": bands,
+    }
@@ -1,9 +1,47 @@
 """Fixtures for the phq9 integration tests."""
 
+import json
+
 import pytest
 
 
+def pytest_addoption(parser: pytest.Parser) -> None:
+    """Add the options for the scaling benchmarks."""
+    parser.addoption(
+        "--benchmark",
+        action="store_true",
+        help="Run the PHQ-9 scaling benchmarks.",
+    )
+    parser.addoption(
+        "--benchmark-json",
+        metavar="PATH",
+        help="Write the PHQ-9 benchmark results to PATH as JSON.",
+    )
+
+
+def pytest_collection_modifyitems(
+    config: pytest.Config, items: list[pytest.Item]
+) -> None:
+    """Skip the benchmarks unless they were asked for."""
+    if config.getoption("--benchmark"):
+        return
+    skip_benchmark = pytest.mark.skip(reason="needs --benchmark to run")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip_benchmark)
+
+
 @pytest.fixture(autouse=True)
 def auto_enable_custom_integrations(enable_custom_integrations):
     """Enable custom integrations defined in the test dir."""
     yield
+
+
+@pytest.fixture(scope="session")
+def benchmark_results(pytestconfig: pytest.Config):
+    """Collect the benchmark results and write them out at the end."""
+    results: list[dict] = []
+    yield results
+    if results and (path := pytestconfig.getoption("--benchmark-json")):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"benchmarks": results}, file, indent=2)
@@ -0,0 +1,210 @@
+"""Scaling benchmarks for the phq9 integration.
+
+These only run when pytest is given ``--benchmark``, and their results are
+written as JSON when it is also given ``--benchmark-json PATH``:
+
+    pytest tests/test_benchmark.py --benchmark --benchmark-json benchmark.json
+"""
+
+import random
+from statistics import median
+from time import perf_counter
+
+import pytest
+
+from homeassistant.const import (
+    EVENT_HOMEASSISTANT_STARTED,
+    EVENT_STATE_CHANGED,
+    MATCH_ALL,
+)
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.phq9.const import DOMAIN, QUESTION_COUNT
+from custom_components.phq9 import scoring
+from custom_components.phq9.instruments import PHQ9
+
+PERSON_COUNTS = (1, 10, 100, 1000)
+ASSESSMENT_COUNT = 50_000
+
+ANSWER = "nearly_every_day"
+DIFFICULTY = "very_difficult"
+SUBMITTED_ANSWER = "several_days"
+SUBMITTED_DIFFICULTY = "somewhat_difficult"
+
+
+class EventCounter:
+    """Count the events fired on the bus, and the state writes among them."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Start counting."""
+        self.events = 0
+        self.state_writes = 0
+        self._remove = hass.bus.async_listen(MATCH_ALL, self._async_count)
+
+    @callback
+    def _async_count(self, event: Event) -> None:
+        """Count a single event."""
+        self.events += 1
+        if event.event_type == EVENT_STATE_CHANGED:
+            self.state_writes += 1
+
+    def stop(self) -> None:
+        """Stop counting."""
+        self._remove()
+
+
+async def _async_select(hass: HomeAssistant, entity_id: str, option: str) -> None:
+    """Answer a question through its select."""
+    await hass.services.async_call(
+        "select",
+        "select_option",
+        {"entity_id": entity_id, "option": option},
+        blocking=True,
+    )
+
+
+async def _async_time(awaitable) -> float:
+    """Return the seconds taken to await something."""
+    start = perf_counter()
+    await awaitable
+    return perf_counter() - start
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("person_count", PERSON_COUNTS)
+async def test_scaling(
+    hass: HomeAssistant, benchmark_results: list[dict], person_count: int
+) -> None:
+    """Measure the main paths with the given number of people."""
+    entity_registry = er.async_get(hass)
+    for i in range(person_count):
+        entity_registry.async_get_or_create(
+            "person", "person", f"p{i}", suggested_object_id=f"person_{i}"
+        )
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STARTED)
+    await hass.async_block_till_done()
+
+    entry = MockConfigEntry(domain=DOMAIN, data={})
+    entry.add_to_hass(hass)
+
+    async def async_setup() -> None:
+        await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    setup_time = await _async_time(async_setup())
+    assert hass.states.get(f"sensor.phq9_p{person_count - 1}_score") is not None
+
+    # Answer one questionnaire through the selects, timing each answer until
+    # the total and interpretation of the person have caught up.
+    counter = EventCounter(hass)
+    latencies = []
+    for question in range(QUESTION_COUNT):
+
+        async def async_answer() -> None:
+            await _async_select(hass, f"select.phq9_p0_q{question + 1}", ANSWER)
+
+        latencies.append(await _async_time(async_answer()))
+        total = 3 * (question + 1)
+        assert hass.states.get("sensor.phq9_p0_score").state == str(total)
+        assert (
+            hass.states.get("sensor.phq9_p0_score_interpretation").state
+            == PHQ9.interpretation_by_score[total]
+        )
+    await _async_select(hass, "select.phq9_p0_difficulty", DIFFICULTY)
+    await hass.async_block_till_done()
+    counter.stop()
+    select_events, select_state_writes = counter.events, counter.state_writes
+
+    # A different questionnaire for the same person, submitted in one call.
+    counter = EventCounter(hass)
+    await hass.services.async_call(
+        DOMAIN,
+        "submit_assessment",
+        {
+            "person": "person.person_0",
+            "answers": [SUBMITTED_ANSWER] * QUESTION_COUNT,
+            "difficulty": SUBMITTED_DIFFICULTY,
+        },
+        blocking=True,
+    )
+    await hass.async_block_till_done()
+    counter.stop()
+    submit_events, submit_state_writes = counter.events, counter.state_writes
+
+    async def async_add_person() -> None:
+        entity_registry.async_get_or_create(
+            "person", "person", "added", suggested_object_id="added"
+        )
+        await hass.async_block_till_done()
+
+    add_person_time = await _async_time(async_add_person())
+    assert hass.states.get("sensor.phq9_added_score") is not None
+
+    async def async_remove_person() -> None:
+        entity_registry.async_remove("person.added")
+        await hass.async_block_till_done()
+
+    remove_person_time = await _async_time(async_remove_person())
+    assert hass.states.get("sensor.phq9_added_score") is None
+
+    async def async_reload() -> None:
+        await hass.config_entries.async_reload(entry.entry_id)
+        await hass.async_block_till_done()
+
+    reload_time = await _async_time(async_reload())
+    assert hass.states.get("sensor.phq9_p0_score").state == str(QUESTION_COUNT)
+
+    benchmark_results.append(
+        {
+            "persons": person_count,
+            "entities": len(hass.states.async_entity_ids()),
+            "setup_seconds": setup_time,
+            "reload_seconds": reload_time,
+            "add_person_seconds": add_person_time,
+            "remove_person_seconds": remove_person_time,
+            "answer_latency_seconds": {
+                "median": median(latencies),
+                "max": max(latencies),
+            },
+            "select_questionnaire": {
+                "state_writes": select_state_writes,
+                "events": select_events,
+            },
+            "submit_questionnaire": {
+                "state_writes": submit_state_writes,
+                "events": submit_events,
+            },
+        }
+    )
+
+
+@pytest.mark.benchmark
+def test_batch_scoring(
+    benchmark_results: list[dict], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Measure scoring a large batch of historical assessments."""
+    rng = random.Random(0)
+    responses = [
+        [rng.randrange(4) for _ in range(QUESTION_COUNT)]
+        for _ in range(ASSESSMENT_COUNT)
+    ]
+
+    start = perf_counter()
+    numpy_scores = scoring.score_batch(PHQ9, responses)
+    numpy_time = perf_counter() - start
+
+    monkeypatch.setattr(scoring, "np", None)
+    start = perf_counter()
+    python_scores = scoring.score_batch(PHQ9, responses)
+    python_time = perf_counter() - start
+
+    assert list(numpy_scores.totals) == python_scores.totals
+    benchmark_results.append(
+        {
+            "assessments": ASSESSMENT_COUNT,
+            "batch_scoring_seconds": {"numpy": numpy_time, "python": python_time},
+        }
+    )
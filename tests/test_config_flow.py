@@ -0,0 +1,43 @@
+"""Tests for the phq9 config flow."""
+
+from homeassistant.core import HomeAssistant
+from homeassistant.data_entry_flow import FlowResultType
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.phq9.const import DOMAIN
+
+
+async def test_options_flow(hass: HomeAssistant) -> None:
+    """Test that the trend and coalescing windows can be changed."""
+    entry = MockConfigEntry(domain=DOMAIN, data={})
+    entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["type"] == FlowResultType.FORM
+    assert result["step_id"] == "init"
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        user_input={
+            "mean_window": 8,
+            "slope_window": 12,
+            "coalesce_window": 10,
+            "instruments": ["phq9", "gad7"],
+        },
+    )
+    await hass.async_block_till_done()
+
+    assert result["type"] == FlowResultType.CREATE_ENTRY
+    assert entry.options == {
+        "persons": [],
+        "mean_window": 8,
+        "slope_window": 12,
+        "coalesce_window": 10,
+        "instruments": ["phq9", "gad7"],
+        "reminder_interval": 14,
+        "compact": False,
+        "archive_age": 365,
+    }
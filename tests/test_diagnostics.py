@@ -0,0 +1,79 @@
+"""Tests for the phq9 diagnostics."""
+
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+from homeassistant.const import EVENT_HOMEASSISTANT_STARTED
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.helpers import device_registry as dr
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.phq9.const import DOMAIN, PLATFORMS
+from custom_components.phq9.diagnostics import (
+    async_get_config_entry_diagnostics,
+    async_get_device_diagnostics,
+)
+
+
+async def test_diagnostics(hass: HomeAssistant) -> None:
+    """Test that the counters can be downloaded as diagnostics."""
+    await async_setup_component(
+        hass, "person", {"person": [{"name": "test", "id": "1234"}]}
+    )
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STARTED)
+    await hass.async_block_till_done()
+
+    entry = MockConfigEntry(domain=DOMAIN, data={})
+    entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    assert entry.state is ConfigEntryState.LOADED
+
+    before = (await async_get_config_entry_diagnostics(hass, entry))["counters"]
+    await hass.services.async_call(
+        "select",
+        "select_option",
+        {"entity_id": "select.phq9_1234_q1", "option": "several_days"},
+        blocking=True,
+    )
+    await hass.async_block_till_done()
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+    assert diagnostics["persons"] == 1
+    counters = diagnostics["counters"]
+    assert set(counters["platform_setup_seconds"]) == set(PLATFORMS)
+    person = counters["persons"]["1234"]
+    assert person["recomputes"] == 1
+    # The answer, the total and the last evaluated sensor; the interpretation
+    # stays in the same band.
+    assert person["state_writes"] - before["persons"]["1234"]["state_writes"] == 3
+    # The 17 entities and the reminder schedule.
+    assert person["subscriptions"] == 18
+    assert counters["total"] == person
+    assert counters["reloads"] == 0
+    assert diagnostics["reminders"] == 1
+
+
+async def test_device_diagnostics(hass: HomeAssistant) -> None:
+    """Test that the device of a person links back to the person."""
+    await async_setup_component(
+        hass, "person", {"person": [{"name": "test", "id": "1234"}]}
+    )
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STARTED)
+    await hass.async_block_till_done()
+
+    entry = MockConfigEntry(domain=DOMAIN, data={})
+    entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    # The person is no longer repeated on every state of the question selects.
+    assert "person_entity_id" not in hass.states.get("select.phq9_1234_q1").attributes
+
+    device = dr.async_get(hass).async_get_device(identifiers={(DOMAIN, "1234")})
+    diagnostics = await async_get_device_diagnostics(hass, entry, device)
+
+    assert diagnostics["person"] == "person.test"
+    assert "select.phq9_1234_q1" in diagnostics["entities"]
+    assert len(diagnostics["entities"]) == 17
+    assert diagnostics["counters"]["phq9"]["subscriptions"] == 18
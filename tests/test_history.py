@@ -0,0 +1,113 @@
+"""Tests for the phq9 assessment history and its archive."""
+
+from datetime import timedelta
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.phq9.assessment import assessment_record
+from custom_components.phq9.history import PHQ9History
+from custom_components.phq9.instruments import PHQ2, PHQ9
+
+
+async def test_archive(
+    hass: HomeAssistant, hass_storage: dict[str, Any], tmp_path: Path
+) -> None:
+    """Test that old assessments move to the archive and are still read back."""
+    hass.config.config_dir = str(tmp_path)
+    now = dt_util.now().replace(microsecond=0)
+    records = [
+        assessment_record(PHQ9, now - timedelta(days=days), [answer] * 9 + [answer])
+        for days, answer in ((400, 0), (300, 1), (200, 2), (10, 3))
+    ]
+
+    with patch("custom_components.phq9.history.ARCHIVE_BATCH", 2):
+        history = PHQ9History(hass, "1234", PHQ9, timedelta(days=30))
+        await history.async_import(records)
+
+    assert (tmp_path / ".storage" / "phq9.history.1234.archive").exists()
+    assert hass_storage["phq9.history.1234"]["data"]["records"] == records[3:]
+
+    assert await history.async_get_span(None, None) == (0, 4)
+    assert await history.async_get_records_between(None, None) == records
+    assert (
+        await history.async_get_records_between(now - timedelta(days=250), None)
+        == records[2:]
+    )
+    assert await history.async_get_latest(2) == records[2:]
+    columns = await history.async_get_columns(now - timedelta(days=350), None)
+    assert columns.answers.tolist() == [1] * 9 + [2] * 9 + [3] * 9
+    assert columns.totals.tolist() == [9, 18, 27]
+
+    # An assessment older than the archive is merged into it in order.
+    older = assessment_record(PHQ9, now - timedelta(days=350), [2] * 10)
+    await history.async_import([older])
+    merged = await history.async_get_records_between(None, None)
+    assert [record["total"] for record in merged] == [0, 18, 9, 18, 27]
+    assert hass_storage["phq9.history.1234"]["data"]["records"] == records[3:]
+
+    # Assessments already in the archive or the store are not added again.
+    assert await history.async_import([older, records[0], records[3]]) == []
+    assert await history.async_get_span(None, None) == (0, 5)
+
+    # A store saved before the last archiving does not repeat archived records.
+    hass_storage["phq9.history.1234"]["data"]["records"] = records
+    reloaded = PHQ9History(hass, "1234", PHQ9, timedelta(days=30))
+    assert await reloaded.async_get_span(None, None) == (0, 5)
+    assert (await reloaded.async_get_latest(1))[0] == records[3]
+
+
+async def test_archive_without_difficulty(
+    hass: HomeAssistant, hass_storage: dict[str, Any], tmp_path: Path
+) -> None:
+    """Test that records without a difficulty are archived as they were."""
+    hass.config.config_dir = str(tmp_path)
+    now = dt_util.now().replace(microsecond=0)
+    records = [
+        assessment_record(PHQ2, now - timedelta(days=days), [1, 2])
+        for days in (100, 90, 80)
+    ]
+
+    with patch("custom_components.phq9.history.ARCHIVE_BATCH", 2):
+        history = PHQ9History(hass, "1234_phq2", PHQ2, timedelta(days=30))
+        await history.async_import(records)
+
+    assert hass_storage["phq9.history.1234_phq2"]["data"]["records"] == []
+    assert await history.async_get_records_between(None, None) == records
+
+
+async def test_import_merged_in_order(
+    hass: HomeAssistant, hass_storage: dict[str, Any], tmp_path: Path
+) -> None:
+    """Test that batches of any order are merged in among the recent records."""
+    hass.config.config_dir = str(tmp_path)
+    now = dt_util.now().replace(microsecond=0)
+    history = PHQ9History(hass, "1234", PHQ9)
+    for days in ((10, 30, 20), (25, 5, 15), (1, 35)):
+        await history.async_import(
+            [
+                assessment_record(PHQ9, now - timedelta(days=day), [day % 4] * 10)
+                for day in days
+            ]
+        )
+
+    records = await history.async_get_records_between(None, None)
+    times = [record["timestamp"] for record in records]
+    assert times == [
+        (now - timedelta(days=day)).isoformat()
+        for day in (35, 30, 25, 20, 15, 10, 5, 1)
+    ]
+    columns = await history.async_get_columns(None, None)
+    assert columns.totals.tolist() == [record["total"] for record in records]
+    assert columns.answers.tolist() == [
+        answer for record in records for answer in record["answers"]
+    ]
+    assert (
+        await history.async_get_records_between(
+            now - timedelta(days=26), now - timedelta(days=14)
+        )
+        == records[2:5]
+    )
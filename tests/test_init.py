@@ -0,0 +1,184 @@
+"""Tests for the phq9 integration setup."""
+
+from datetime import timedelta
+from typing import Any
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+from homeassistant.const import EVENT_HOMEASSISTANT_STARTED
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.util import dt as dt_util
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.phq9.const import DOMAIN
+
+
+async def _async_setup(hass: HomeAssistant) -> MockConfigEntry:
+    """Set up a single person and the PHQ-9 config entry."""
+    await async_setup_component(
+        hass, "person", {"person": [{"name": "test", "id": "1234"}]}
+    )
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STARTED)
+    await hass.async_block_till_done()
+
+    entry = MockConfigEntry(domain=DOMAIN, data={})
+    entry.add_to_hass(hass)
+
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert entry.state is ConfigEntryState.LOADED
+    return entry
+
+
+async def test_person_added_without_reload(hass: HomeAssistant) -> None:
+    """Test that a new person only gets their own entities added."""
+    await _async_setup(hass)
+    entity_registry = er.async_get(hass)
+
+    with patch.object(hass.config_entries, "async_reload") as mock_reload:
+        entity_registry.async_get_or_create(
+            "person", "person", "5678", suggested_object_id="jane"
+        )
+        await hass.async_block_till_done()
+
+    mock_reload.assert_not_called()
+    assert hass.states.get("select.phq9_5678_q1") is not None
+    assert hass.states.get("select.phq9_5678_difficulty") is not None
+    assert hass.states.get("sensor.phq9_5678_score") is not None
+    assert hass.states.get("select.phq9_1234_q1") is not None
+
+
+async def test_person_removed_without_reload(hass: HomeAssistant) -> None:
+    """Test that removing a person only removes their own entities."""
+    await _async_setup(hass)
+    entity_registry = er.async_get(hass)
+
+    entity_registry.async_get_or_create(
+        "person", "person", "5678", suggested_object_id="jane"
+    )
+    await hass.async_block_till_done()
+    assert hass.states.get("select.phq9_5678_q1") is not None
+
+    with patch.object(hass.config_entries, "async_reload") as mock_reload:
+        entity_registry.async_remove("person.jane")
+        await hass.async_block_till_done()
+
+    mock_reload.assert_not_called()
+    assert hass.states.get("select.phq9_5678_q1") is None
+    assert hass.states.get("sensor.phq9_5678_score") is None
+    assert entity_registry.async_get_entity_id("select", DOMAIN, "5678_q1") is None
+    assert hass.states.get("select.phq9_1234_q1") is not None
+    assert hass.states.get("sensor.phq9_1234_score") is not None
+
+
+async def test_person_enrollment(hass: HomeAssistant) -> None:
+    """Test that only the people chosen in the options are assessed."""
+    entry = await _async_setup(hass)
+    entity_registry = er.async_get(hass)
+    device_registry = dr.async_get(hass)
+    entity_registry.async_get_or_create(
+        "person", "person", "5678", suggested_object_id="jane"
+    )
+    await hass.async_block_till_done()
+    assert hass.states.get("select.phq9_5678_q1") is not None
+
+    hass.config_entries.async_update_entry(entry, options={"persons": ["1234"]})
+    await hass.async_block_till_done()
+
+    assert hass.states.get("select.phq9_1234_q1") is not None
+    assert hass.states.get("select.phq9_5678_q1") is None
+    assert entity_registry.async_get_entity_id("select", DOMAIN, "5678_q1") is None
+    assert device_registry.async_get_device(identifiers={(DOMAIN, "5678")}) is None
+
+    # People who are not enrolled are ignored as they come and go.
+    with patch.object(hass.config_entries, "async_reload") as mock_reload:
+        entity_registry.async_get_or_create(
+            "person", "person", "9012", suggested_object_id="guest"
+        )
+        await hass.async_block_till_done()
+        entity_registry.async_remove("person.guest")
+        await hass.async_block_till_done()
+
+    mock_reload.assert_not_called()
+    assert hass.states.get("select.phq9_9012_q1") is None
+    assert len(hass.data[DOMAIN]["persons"]) == 1
+
+
+async def test_everyone_enrolled_after_options_saved(hass: HomeAssistant) -> None:
+    """Test that saving the options without choosing people enrolls newcomers."""
+    entry = await _async_setup(hass)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], user_input={"mean_window": 8}
+    )
+    await hass.async_block_till_done()
+    assert entry.options["persons"] == []
+
+    er.async_get(hass).async_get_or_create(
+        "person", "person", "5678", suggested_object_id="jane"
+    )
+    await hass.async_block_till_done()
+
+    assert hass.states.get("select.phq9_1234_q1") is not None
+    assert hass.states.get("select.phq9_5678_q1") is not None
+
+
+async def test_person_index(hass: HomeAssistant) -> None:
+    """Test that the person index follows the registry and its entities exist."""
+    await _async_setup(hass)
+    entity_registry = er.async_get(hass)
+    persons = hass.data[DOMAIN]["persons"]
+
+    assert [person.unique_id for person in persons] == ["1234"]
+    person = persons.get("1234")
+    assert "sensor.phq9_1234_score" in person.entity_ids.values()
+    for unique_id, entity_id in person.entity_ids.items():
+        platform = entity_id.split(".")[0]
+        assert entity_registry.async_get_entity_id(platform, DOMAIN, unique_id) == (
+            entity_id
+        )
+
+    entity_registry.async_update_entity("person.test", new_entity_id="person.renamed")
+    await hass.async_block_till_done()
+    assert persons.get_unique_id("person.renamed") == "1234"
+    assert persons.get_unique_id("person.test") is None
+
+    entity_registry.async_remove("person.renamed")
+    await hass.async_block_till_done()
+    assert len(persons) == 0
+
+
+async def test_reload_keeps_history(
+    hass: HomeAssistant, hass_storage: dict[str, Any]
+) -> None:
+    """Test that an assessment waiting to be saved survives a reload."""
+    entry = await _async_setup(hass)
+
+    for answer in ("several_days", "nearly_every_day"):
+        await hass.services.async_call(
+            DOMAIN,
+            "submit_assessment",
+            {
+                "person": "person.test",
+                "answers": [answer] * 9,
+                "difficulty": "somewhat_difficult",
+            },
+            blocking=True,
+        )
+        if answer == "several_days":
+            await hass.config_entries.async_reload(entry.entry_id)
+    await hass.async_block_till_done()
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=30))
+    await hass.async_block_till_done()
+
+    records = hass_storage["phq9.history.1234"]["data"]["records"]
+    assert [record["total"] for record in records] == [9, 27]
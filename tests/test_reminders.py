@@ -0,0 +1,112 @@
+"""Tests for the phq9 reassessment reminders."""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+from homeassistant.const import EVENT_HOMEASSISTANT_STARTED
+from homeassistant.util import dt as dt_util
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_capture_events,
+    async_fire_time_changed,
+)
+
+from custom_components.phq9.const import DOMAIN
+
+
+async def _async_submit(hass: HomeAssistant, person: str, completed) -> None:
+    """Submit an assessment for a person at the given time."""
+    with patch("homeassistant.util.dt.now", return_value=completed):
+        await hass.services.async_call(
+            DOMAIN,
+            "submit_assessment",
+            {
+                "person": person,
+                "answers": ["several_days"] * 9,
+                "difficulty": "somewhat_difficult",
+            },
+            blocking=True,
+        )
+
+
+async def test_reminders(hass: HomeAssistant) -> None:
+    """Test that a reminder is due once a person goes unassessed too long."""
+    await async_setup_component(
+        hass,
+        "person",
+        {"person": [{"name": "test", "id": "1234"}, {"name": "jane", "id": "5678"}]},
+    )
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STARTED)
+    await hass.async_block_till_done()
+
+    entry = MockConfigEntry(domain=DOMAIN, data={}, options={"reminder_interval": 7})
+    entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    events = async_capture_events(hass, "phq9_reassessment_due")
+    now = dt_util.utcnow()
+    await _async_submit(hass, "person.test", now)
+    await _async_submit(hass, "person.jane", now + timedelta(days=2))
+    # Retaking it moves the reminder on.
+    await _async_submit(hass, "person.test", now + timedelta(days=3))
+
+    reminders = hass.data[DOMAIN]["reminders"]
+    assert reminders.pending == 2
+
+    async_fire_time_changed(hass, now + timedelta(days=8))
+    await hass.async_block_till_done()
+    assert events == []
+
+    async_fire_time_changed(hass, now + timedelta(days=9, seconds=1))
+    await hass.async_block_till_done()
+    assert [event.data["person"] for event in events] == ["person.jane"]
+    assert events[0].data["instrument"] == "phq9"
+
+    async_fire_time_changed(hass, now + timedelta(days=10, seconds=1))
+    await hass.async_block_till_done()
+    assert [event.data["person"] for event in events] == ["person.jane", "person.test"]
+    assert reminders.pending == 0
+
+    # No reminder is due again until the next assessment.
+    async_fire_time_changed(hass, now + timedelta(days=30))
+    await hass.async_block_till_done()
+    assert len(events) == 2
+
+
+async def test_reminders_not_repeated_after_reload(hass: HomeAssistant) -> None:
+    """Test that a reminder already sent is not sent again after a reload."""
+    await async_setup_component(
+        hass, "person", {"person": [{"name": "test", "id": "1234"}]}
+    )
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STARTED)
+    await hass.async_block_till_done()
+
+    entry = MockConfigEntry(domain=DOMAIN, data={}, options={"reminder_interval": 7})
+    entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    events = async_capture_events(hass, "phq9_reassessment_due")
+    now = dt_util.utcnow()
+    await _async_submit(hass, "person.test", now)
+
+    async_fire_time_changed(hass, now + timedelta(days=7, seconds=1))
+    await hass.async_block_till_done()
+    assert len(events) == 1
+
+    for _ in range(2):
+        await hass.config_entries.async_reload(entry.entry_id)
+        await hass.async_block_till_done()
+        async_fire_time_changed(hass, now + timedelta(days=8, seconds=1))
+        await hass.async_block_till_done()
+    assert len(events) == 1
+
+    # Answering again starts a new reminder.
+    await _async_submit(hass, "person.test", now + timedelta(days=9))
+    async_fire_time_changed(hass, now + timedelta(days=16, seconds=1))
+    await hass.async_block_till_done()
+    assert len(events) == 2
@@ -0,0 +1,77 @@
+"""Tests for the phq9 batch scoring."""
+
+from pathlib import Path
+import random
+import subprocess
+import sys
+
+import pytest
+
+from custom_components.phq9 import scoring
+from custom_components.phq9.instruments import GAD7, PHQ2, PHQ9, Instrument
+from custom_components.phq9.scoring import score_batch
+
+
+@pytest.fixture(params=["numpy", "python"])
+def numpy_or_python(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch):
+    """Score with NumPy, then again as if NumPy was not installed."""
+    if request.param == "python":
+        monkeypatch.setattr(scoring, "np", None)
+
+
+@pytest.mark.parametrize("instrument", [PHQ9, PHQ2, GAD7], ids=lambda i: i.key)
+def test_score_batch(numpy_or_python, instrument: Instrument) -> None:
+    """Test that a batch scores the same as each assessment on its own."""
+    rng = random.Random(instrument.key)
+    responses = [
+        [
+            rng.randrange(len(instrument.answer_keys))
+            for _ in range(instrument.item_count)
+        ]
+        + ([rng.randrange(4)] if instrument.difficulty_keys else [])
+        for _ in range(500)
+    ]
+    # The lowest and highest scores, at the edges of the bands.
+    responses.append([0] * instrument.answer_count)
+    responses.append([len(instrument.answer_keys) - 1] * instrument.answer_count)
+
+    totals, bands = score_batch(instrument, responses)
+
+    expected = [instrument.score(response) for response in responses]
+    assert list(totals) == expected
+    assert list(bands) == [instrument.interpretation_by_score[t] for t in expected]
+    assert totals[-1] == instrument.max_score
+
+
+def test_score_batch_empty(numpy_or_python) -> None:
+    """Test that an empty batch has no scores."""
+    totals, bands = score_batch(PHQ9, [])
+    assert len(totals) == len(bands) == 0
+
+
+@pytest.mark.parametrize(
+    "responses", [[[0] * 8], [[0] * 8 + [4]], [[0] * 8 + [-1]]], ids=str
+)
+def test_score_batch_invalid(numpy_or_python, responses) -> None:
+    """Test that short responses and unknown answers are rejected."""
+    with pytest.raises(ValueError):
+        score_batch(PHQ9, responses)
+
+
+def test_import_without_homeassistant() -> None:
+    """Test that the scoring modules do not need Home Assistant installed."""
+    code = """
+import sys
+sys.modules["homeassistant"] = None
+from custom_components.phq9.instruments import PHQ9
+from custom_components.phq9.scoring import score_batch
+totals, bands = score_batch(PHQ9, [[3] * 9])
+assert list(totals) == [27] and list(bands) == ["severe"]
+loaded = [name for name, module in sys.modules.items() if module is not None]
+assert not any(name.startswith("homeassistant") for name in loaded)
+"""
+    subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        cwd=Path(__file__).parent.parent,
+    )
@@ -1,16 +1,27 @@
 """Tests for the phq9 sensor platform."""
 
+from datetime import timedelta
+from typing import Any
 from unittest.mock import patch
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, State
 from homeassistant.setup import async_setup_component
 from homeassistant.components.person import async_setup
-from homeassistant.const import EVENT_HOMEASSISTANT_STARTED
+from homeassistant.const import EVENT_HOMEASSISTANT_STARTED, EVENT_STATE_CHANGED
 from homeassistant.config_entries import ConfigEntryState
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.util import dt as dt_util
 
-from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_capture_events,
+    async_fire_time_changed,
+    mock_restore_cache_with_extra_data,
+)
 
+from custom_components.phq9.assessment import assessment_record
 from custom_components.phq9.const import DOMAIN
+from custom_components.phq9.instruments import PHQ9
 
 DOMAIN = "phq9"
 
@@ -34,7 +45,7 @@ async def test_sensors_created_for_person(hass: HomeAssistant) -> None:
     assert entry.state is ConfigEntryState.LOADED
 
     # Check that the sensors were created
-    # Example: <state select.phq9_1234_q9=not_at_all; options=['not_at_all', 'several_days', 'more_than_half_the_days', 'nearly_every_day'], person_entity_id=person.test @ 2025-11-22T20:23:15.366788-08:00>
+    # Example: <state select.phq9_1234_q9=not_at_all; options=['not_at_all', 'several_days', 'more_than_half_the_days', 'nearly_every_day'] @ 2025-11-22T20:23:15.366788-08:00>
     assert hass.states.get("select.phq9_1234_q1") is not None
     assert hass.states.get("select.phq9_1234_q2") is not None
     assert hass.states.get("select.phq9_1234_q3") is not None
@@ -47,6 +58,16 @@ async def test_sensors_created_for_person(hass: HomeAssistant) -> None:
     assert hass.states.get("select.phq9_1234_difficulty") is not None
 
     assert hass.states.get("sensor.phq9_1234_total_score") is None
+    assert (
+        hass.states.get("sensor.phq9_1234_score").attributes["friendly_name"]
+        == "test PHQ-9 Total Score"
+    )
+    assert (
+        hass.states.get("binary_sensor.phq9_1234_meaningful_change").attributes[
+            "friendly_name"
+        ]
+        == "test PHQ-9 Meaningful Change"
+    )
     # assert hass.states.get("sensor.phq9_1234_last_evaluated") is None
     print(hass.states.get("sensor.phq9_1234_score_interpretation"))
     # assert hass.states.get("sensor.phq9_1234_score_interpretation").state == "none_minimal"
@@ -70,17 +91,21 @@ async def test_total_score_sensor_updates(hass: HomeAssistant) -> None:
 
     assert entry.state is ConfigEntryState.LOADED
 
-    # Set the state of the select entities
+    # Answer the questions through the select entities
     for i in range(9):
-        hass.states.async_set(f"select.phq9_1234_q{i+1}", "several_days")
-        await hass.async_block_till_done()
+        await hass.services.async_call(
+            "select",
+            "select_option",
+            {"entity_id": f"select.phq9_1234_q{i+1}", "option": "several_days"},
+            blocking=True,
+        )
 
     # Check that the total score sensor has updated
     assert hass.states.get("sensor.phq9_1234_score").state == "9"
 
 
 async def test_score_interpretation_sensor_updates(hass: HomeAssistant) -> None:
-    """Test that the score interpretation sensor updates when the total score sensor changes."""
+    """Test that the score interpretation sensor updates when the total score changes."""
     # Setup a mock person
     await async_setup_component(
         hass, "person", {"person": [{"name": "test", "id": "1234"}]}
@@ -97,12 +122,446 @@ async def test_score_interpretation_sensor_updates(hass: HomeAssistant) -> None:
 
     assert entry.state is ConfigEntryState.LOADED
 
-    # Set the state of the total score sensor
-    hass.states.async_set("sensor.phq9_1234_score", "15")
-    await hass.async_block_till_done()
+    # Answer enough questions to reach a total score of 15
+    for i in range(5):
+        await hass.services.async_call(
+            "select",
+            "select_option",
+            {"entity_id": f"select.phq9_1234_q{i+1}", "option": "nearly_every_day"},
+            blocking=True,
+        )
+
+    assert hass.states.get("sensor.phq9_1234_score").state == "15"
 
     # Check that the score interpretation sensor has updated
     assert (
         hass.states.get("sensor.phq9_1234_score_interpretation").state
         == "moderately_severe"
     )
+
+
+async def test_last_evaluated_sensor_updates(hass: HomeAssistant) -> None:
+    """Test that the last evaluated sensor updates when an answer changes."""
+    await async_setup_component(
+        hass, "person", {"person": [{"name": "test", "id": "1234"}]}
+    )
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STARTED)
+    await hass.async_block_till_done()
+
+    entry = MockConfigEntry(domain=DOMAIN, data={})
+    entry.add_to_hass(hass)
+
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert hass.states.get("sensor.phq9_1234_last_evaluated").state == "unknown"
+
+    await hass.services.async_call(
+        "select",
+        "select_option",
+        {"entity_id": "select.phq9_1234_difficulty", "option": "very_difficult"},
+        blocking=True,
+    )
+
+    assert hass.states.get("sensor.phq9_1234_last_evaluated").state != "unknown"
+    assert hass.states.get("sensor.phq9_1234_score").state == "0"
+
+
+async def test_trend_sensors_update(hass: HomeAssistant) -> None:
+    """Test that the trend sensors follow completed assessments."""
+    await async_setup_component(
+        hass, "person", {"person": [{"name": "test", "id": "1234"}]}
+    )
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STARTED)
+    await hass.async_block_till_done()
+
+    entry = MockConfigEntry(domain=DOMAIN, data={})
+    entry.add_to_hass(hass)
+
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    for answer in ("not_at_all", "several_days", "nearly_every_day"):
+        await hass.services.async_call(
+            DOMAIN,
+            "submit_assessment",
+            {
+                "person": "person.test",
+                "answers": [answer] * 9,
+                "difficulty": "somewhat_difficult",
+            },
+            blocking=True,
+        )
+
+    # Totals of 0, 9 and 27
+    assert hass.states.get("sensor.phq9_1234_rolling_mean").state == "12.0"
+    assert hass.states.get("sensor.phq9_1234_score_change").state == "18"
+    assert hass.states.get("sensor.phq9_1234_score_slope").state == "13.5"
+    assert hass.states.get("binary_sensor.phq9_1234_meaningful_change").state == "on"
+
+
+async def test_trend_windows_from_options(hass: HomeAssistant) -> None:
+    """Test that the trend windows are taken from the config entry options."""
+    await async_setup_component(
+        hass, "person", {"person": [{"name": "test", "id": "1234"}]}
+    )
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STARTED)
+    await hass.async_block_till_done()
+
+    entry = MockConfigEntry(
+        domain=DOMAIN, data={}, options={"mean_window": 2, "slope_window": 2}
+    )
+    entry.add_to_hass(hass)
+
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    for answer in ("not_at_all", "several_days", "several_days"):
+        await hass.services.async_call(
+            DOMAIN,
+            "submit_assessment",
+            {
+                "person": "person.test",
+                "answers": [answer] * 9,
+                "difficulty": "somewhat_difficult",
+            },
+            blocking=True,
+        )
+
+    assert hass.states.get("sensor.phq9_1234_rolling_mean").state == "9.0"
+    assert hass.states.get("sensor.phq9_1234_score_change").state == "0"
+    assert hass.states.get("sensor.phq9_1234_score_slope").state == "0.0"
+    assert hass.states.get("binary_sensor.phq9_1234_meaningful_change").state == "off"
+
+
+async def test_instruments_from_options(hass: HomeAssistant) -> None:
+    """Test that each enabled questionnaire gets its own entities and bands."""
+    await async_setup_component(
+        hass, "person", {"person": [{"name": "test", "id": "1234"}]}
+    )
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STARTED)
+    await hass.async_block_till_done()
+
+    entry = MockConfigEntry(
+        domain=DOMAIN, data={}, options={"instruments": ["phq2", "gad7"]}
+    )
+    entry.add_to_hass(hass)
+
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert hass.states.get("select.phq9_1234_q1") is None
+    assert hass.states.get("select.phq9_1234_phq2_q2") is not None
+    assert hass.states.get("select.phq9_1234_phq2_q3") is None
+    assert hass.states.get("select.phq9_1234_phq2_difficulty") is None
+    assert hass.states.get("select.phq9_1234_gad7_q7") is not None
+    assert hass.states.get("select.phq9_1234_gad7_difficulty") is not None
+
+    for question in range(1, 3):
+        await hass.services.async_call(
+            "select",
+            "select_option",
+            {
+                "entity_id": f"select.phq9_1234_phq2_q{question}",
+                "option": "more_than_half_the_days",
+            },
+            blocking=True,
+        )
+    for question in range(1, 6):
+        await hass.services.async_call(
+            "select",
+            "select_option",
+            {
+                "entity_id": f"select.phq9_1234_gad7_q{question}",
+                "option": "several_days",
+            },
+            blocking=True,
+        )
+
+    assert hass.states.get("sensor.phq9_1234_phq2_score").state == "4"
+    assert (
+        hass.states.get("sensor.phq9_1234_phq2_score_interpretation").state
+        == "positive"
+    )
+    assert hass.states.get("sensor.phq9_1234_gad7_score").state == "5"
+    assert (
+        hass.states.get("sensor.phq9_1234_gad7_score").attributes["friendly_name"]
+        == "test GAD-7 Total Score"
+    )
+    device = dr.async_get(hass).async_get_device(identifiers={(DOMAIN, "1234")})
+    assert device.name == "test"
+    assert hass.states.get("sensor.phq9_1234_gad7_score_interpretation").state == "mild"
+
+
+async def test_answers_coalesced(hass: HomeAssistant) -> None:
+    """Test that answers within the coalescing window update the score once."""
+    await async_setup_component(
+        hass, "person", {"person": [{"name": "test", "id": "1234"}]}
+    )
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STARTED)
+    await hass.async_block_till_done()
+
+    entry = MockConfigEntry(domain=DOMAIN, data={}, options={"coalesce_window": 5})
+    entry.add_to_hass(hass)
+
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    events = async_capture_events(hass, EVENT_STATE_CHANGED)
+    for question in range(1, 6):
+        await hass.services.async_call(
+            "select",
+            "select_option",
+            {"entity_id": f"select.phq9_1234_q{question}", "option": "several_days"},
+            blocking=True,
+        )
+    await hass.async_block_till_done()
+
+    # The selects follow straight away, the score only once the window closes.
+    assert hass.states.get("select.phq9_1234_q5").state == "several_days"
+    assert hass.states.get("sensor.phq9_1234_score").state == "0"
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=5))
+    await hass.async_block_till_done()
+
+    assert hass.states.get("sensor.phq9_1234_score").state == "5"
+    assert hass.states.get("sensor.phq9_1234_score_interpretation").state == "mild"
+    changed = [event.data["entity_id"] for event in events]
+    # Five selects, then the total, interpretation and last evaluated sensors.
+    assert len(changed) == len(set(changed)) == 8
+
+
+async def test_state_restored_on_startup(hass: HomeAssistant) -> None:
+    """Test that answers and scores are restored with one write per entity."""
+    mock_restore_cache_with_extra_data(
+        hass,
+        [
+            *(
+                (State(f"select.phq9_1234_q{i+1}", "nearly_every_day"), {})
+                for i in range(5)
+            ),
+            (State("select.phq9_1234_difficulty", "very_difficult"), {}),
+            (
+                State("sensor.phq9_1234_score", "15"),
+                {"native_value": 15, "native_unit_of_measurement": None},
+            ),
+            (
+                State("sensor.phq9_1234_score_interpretation", "moderately_severe"),
+                {
+                    "native_value": "moderately_severe",
+                    "native_unit_of_measurement": None,
+                },
+            ),
+            (
+                State("sensor.phq9_1234_rolling_mean", "12.0"),
+                {
+                    "native_value": 12.0,
+                    "native_unit_of_measurement": None,
+                    "scores": [9, 15],
+                },
+            ),
+            (
+                State("sensor.phq9_1234_score_change", "6"),
+                {"native_value": 6, "native_unit_of_measurement": None},
+            ),
+            (State("binary_sensor.phq9_1234_meaningful_change", "on"), {}),
+        ],
+    )
+    await async_setup_component(
+        hass, "person", {"person": [{"name": "test", "id": "1234"}]}
+    )
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STARTED)
+    await hass.async_block_till_done()
+
+    events = async_capture_events(hass, EVENT_STATE_CHANGED)
+
+    entry = MockConfigEntry(domain=DOMAIN, data={})
+    entry.add_to_hass(hass)
+
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    changed = [event.data["entity_id"] for event in events]
+    assert len(changed) == len(set(changed))
+
+    assert hass.states.get("select.phq9_1234_q1").state == "nearly_every_day"
+    assert hass.states.get("select.phq9_1234_q6").state == "not_at_all"
+    assert hass.states.get("select.phq9_1234_difficulty").state == "very_difficult"
+    assert hass.states.get("sensor.phq9_1234_score").state == "15"
+    assert (
+        hass.states.get("sensor.phq9_1234_score_interpretation").state
+        == "moderately_severe"
+    )
+    assert hass.states.get("sensor.phq9_1234_rolling_mean").state == "12.0"
+    assert hass.states.get("binary_sensor.phq9_1234_meaningful_change").state == "on"
+
+    # The restored answers and trend carry on from where they were left
+    await hass.services.async_call(
+        "select",
+        "select_option",
+        {"entity_id": "select.phq9_1234_q6", "option": "several_days"},
+        blocking=True,
+    )
+    assert hass.states.get("sensor.phq9_1234_score").state == "16"
+
+    await hass.services.async_call(
+        DOMAIN,
+        "submit_assessment",
+        {
+            "person": "person.test",
+            "answers": ["nearly_every_day"] * 7 + ["not_at_all"] * 2,
+            "difficulty": "very_difficult",
+        },
+        blocking=True,
+    )
+    assert hass.states.get("sensor.phq9_1234_rolling_mean").state == "15.0"
+    assert hass.states.get("sensor.phq9_1234_score_change").state == "6"
+
+
+async def test_trend_restored_from_history(
+    hass: HomeAssistant, hass_storage: dict[str, Any]
+) -> None:
+    """Test that the trend falls back to the history without saved scores."""
+    now = dt_util.now()
+    hass_storage["phq9.history.1234"] = {
+        "version": 1,
+        "key": "phq9.history.1234",
+        "data": {
+            "records": [
+                assessment_record(PHQ9, now - timedelta(days=days), answers)
+                for days, answers in ((14, [1] * 9 + [0]), (7, [3] * 5 + [0] * 5))
+            ]
+        },
+    }
+    await async_setup_component(
+        hass, "person", {"person": [{"name": "test", "id": "1234"}]}
+    )
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STARTED)
+    await hass.async_block_till_done()
+
+    entry = MockConfigEntry(domain=DOMAIN, data={})
+    entry.add_to_hass(hass)
+    # The rolling mean, which saves the scores of the trend, is disabled.
+    er.async_get(hass).async_get_or_create(
+        "sensor",
+        DOMAIN,
+        "1234_rolling_mean",
+        suggested_object_id="phq9_1234_rolling_mean",
+        config_entry=entry,
+        disabled_by=er.RegistryEntryDisabler.USER,
+    )
+
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert hass.states.get("sensor.phq9_1234_rolling_mean") is None
+    assert hass.states.get("sensor.phq9_1234_score_change").state == "6"
+    assert hass.states.get("binary_sensor.phq9_1234_meaningful_change").state == "on"
+
+    await hass.services.async_call(
+        DOMAIN,
+        "submit_assessment",
+        {
+            "person": "person.test",
+            "answers": ["several_days"] * 7 + ["not_at_all"] * 2,
+            "difficulty": "not_difficult_at_all",
+        },
+        blocking=True,
+    )
+    assert hass.states.get("sensor.phq9_1234_score_change").state == "-8"
+
+
+async def test_compact_trend_restored_from_history(
+    hass: HomeAssistant, hass_storage: dict[str, Any]
+) -> None:
+    """Test that compact mode also falls back to the history for the trend."""
+    hass_storage["phq9.history.1234"] = {
+        "version": 1,
+        "key": "phq9.history.1234",
+        "data": {
+            "records": [
+                assessment_record(
+                    PHQ9, dt_util.now() - timedelta(days=days), [answer] * 10
+                )
+                for days, answer in ((14, 2), (7, 1))
+            ]
+        },
+    }
+    await async_setup_component(
+        hass, "person", {"person": [{"name": "test", "id": "1234"}]}
+    )
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STARTED)
+    await hass.async_block_till_done()
+
+    entry = MockConfigEntry(domain=DOMAIN, data={}, options={"compact": True})
+    entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    state = hass.states.get("sensor.phq9_1234_assessment")
+    assert state.attributes["rolling_mean"] == 13.5
+    assert state.attributes["score_change"] == -9
+
+
+async def test_compact_mode(hass: HomeAssistant) -> None:
+    """Test that compact mode keeps the whole assessment in a single sensor."""
+    mock_restore_cache_with_extra_data(
+        hass,
+        [
+            (
+                State("sensor.phq9_1234_assessment", "3"),
+                {
+                    "native_value": 3,
+                    "native_unit_of_measurement": None,
+                    "scores": [8, 3],
+                    "answers": [1, 1, 1, 0, 0, 0, 0, 0, 0, 2],
+                    "last_evaluated": "2024-01-01T00:00:00+00:00",
+                },
+            ),
+        ],
+    )
+    await async_setup_component(
+        hass, "person", {"person": [{"name": "test", "id": "1234"}]}
+    )
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STARTED)
+    await hass.async_block_till_done()
+
+    entry = MockConfigEntry(domain=DOMAIN, data={}, options={"compact": True})
+    entry.add_to_hass(hass)
+
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    entity_registry = er.async_get(hass)
+    assert [
+        registry_entry.entity_id
+        for registry_entry in er.async_entries_for_config_entry(
+            entity_registry, entry.entry_id
+        )
+    ] == ["sensor.phq9_1234_assessment"]
+    assert hass.states.get("select.phq9_1234_q1") is None
+
+    state = hass.states.get("sensor.phq9_1234_assessment")
+    assert state.attributes["friendly_name"] == "test PHQ-9 Assessment"
+    assert state.state == "3"
+    assert state.attributes["answers"][:4] == ["several_days"] * 3 + ["not_at_all"]
+    assert state.attributes["difficulty"] == "very_difficult"
+    assert state.attributes["score_change"] == -5
+    assert state.attributes["meaningful_change"] is True
+
+    events = async_capture_events(hass, EVENT_STATE_CHANGED)
+    await hass.services.async_call(
+        DOMAIN,
+        "set_answer",
+        {"person": "person.test", "question": 4, "answer": "nearly_every_day"},
+        blocking=True,
+    )
+
+    assert len(events) == 1
+    state = hass.states.get("sensor.phq9_1234_assessment")
+    assert state.state == "6"
+    assert state.attributes["answers"][3] == "nearly_every_day"
+    assert state.attributes["interpretation"] == "mild"
+    assert state.attributes["last_evaluated"] > dt_util.parse_datetime(
+        "2024-01-01T00:00:00+00:00"
+    )
@@ -0,0 +1,783 @@
+"""Tests for the phq9 services."""
+
+import csv
+from datetime import timedelta
+import json
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+from freezegun.api import FrozenDateTimeFactory
+import pytest
+
+from homeassistant.core import Context, HomeAssistant
+from homeassistant.setup import async_setup_component
+from homeassistant.const import EVENT_HOMEASSISTANT_STARTED, EVENT_STATE_CHANGED
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.exceptions import (
+    ServiceValidationError,
+    Unauthorized,
+)
+from homeassistant.util import dt as dt_util
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    MockUser,
+    async_capture_events,
+    async_fire_time_changed,
+)
+
+from custom_components.phq9.assessment import assessment_record
+from custom_components.phq9.const import DOMAIN
+from custom_components.phq9.history import PHQ9History, SAVE_DELAY
+from custom_components.phq9.instruments import PHQ9
+
+
+async def _async_setup(hass: HomeAssistant) -> MockConfigEntry:
+    """Set up two people and the PHQ-9 config entry."""
+    await async_setup_component(
+        hass,
+        "person",
+        {"person": [{"name": "test", "id": "1234"}, {"name": "jane", "id": "5678"}]},
+    )
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STARTED)
+    await hass.async_block_till_done()
+
+    entry = MockConfigEntry(domain=DOMAIN, data={})
+    entry.add_to_hass(hass)
+
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert entry.state is ConfigEntryState.LOADED
+    return entry
+
+
+async def test_submit_assessment(hass: HomeAssistant) -> None:
+    """Test that a whole questionnaire is applied with one write per entity."""
+    await _async_setup(hass)
+    events = async_capture_events(hass, EVENT_STATE_CHANGED)
+
+    await hass.services.async_call(
+        DOMAIN,
+        "submit_assessment",
+        {
+            "person": "person.test",
+            "answers": ["nearly_every_day"] * 5 + ["not_at_all"] * 4,
+            "difficulty": "very_difficult",
+        },
+        blocking=True,
+    )
+    await hass.async_block_till_done()
+
+    assert hass.states.get("select.phq9_1234_q1").state == "nearly_every_day"
+    assert hass.states.get("select.phq9_1234_q9").state == "not_at_all"
+    assert hass.states.get("select.phq9_1234_difficulty").state == "very_difficult"
+    assert hass.states.get("sensor.phq9_1234_score").state == "15"
+    assert (
+        hass.states.get("sensor.phq9_1234_score_interpretation").state
+        == "moderately_severe"
+    )
+
+    changed = [event.data["entity_id"] for event in events]
+    # Five questions, the difficulty, the three score sensors and the rolling
+    # mean, each written once
+    assert len(changed) == len(set(changed)) == 10
+    assert "sensor.phq9_1234_score" in changed
+
+
+async def test_submit_assessment_event(hass: HomeAssistant) -> None:
+    """Test that each completed assessment fires a single event."""
+    await _async_setup(hass)
+    events = async_capture_events(hass, "phq9_assessment_completed")
+
+    for answer in ("several_days", "nearly_every_day"):
+        await hass.services.async_call(
+            DOMAIN,
+            "submit_assessment",
+            {
+                "person": "person.test",
+                "answers": [answer] * 9,
+                "difficulty": "very_difficult",
+            },
+            blocking=True,
+        )
+    await hass.services.async_call(
+        "select",
+        "select_option",
+        {"entity_id": "select.phq9_1234_q1", "option": "not_at_all"},
+        blocking=True,
+    )
+    await hass.async_block_till_done()
+
+    assert len(events) == 2
+    data = events[1].data
+    assert data["person"] == "person.test"
+    assert data["instrument"] == "phq9"
+    assert data["answers"] == ["nearly_every_day"] * 9
+    assert data["difficulty"] == "very_difficult"
+    assert data["total"] == 27
+    assert data["band"] == "severe"
+    assert data["change"] == 18
+    assert events[0].data["change"] is None
+
+
+async def _async_answer(hass: HomeAssistant, answers: dict[str, str]) -> None:
+    """Answer questions of person.test through their selects."""
+    for question, option in answers.items():
+        await hass.services.async_call(
+            "select",
+            "select_option",
+            {"entity_id": f"select.phq9_1234_{question}", "option": option},
+            blocking=True,
+        )
+    await hass.async_block_till_done()
+
+
+async def test_select_answers_complete_assessment(hass: HomeAssistant) -> None:
+    """Test that answering every select completes an assessment."""
+    await _async_setup(hass)
+    events = async_capture_events(hass, "phq9_assessment_completed")
+    items = {f"q{i + 1}": "several_days" for i in range(9)}
+
+    await _async_answer(hass, items)
+    assert events == []
+
+    # The answer to the difficulty completes the questionnaire.
+    await _async_answer(hass, {"difficulty": "very_difficult"})
+    assert len(events) == 1
+    assert events[0].data["answers"] == ["several_days"] * 9
+    assert events[0].data["difficulty"] == "very_difficult"
+    assert events[0].data["total"] == 9
+    history = hass.data[DOMAIN]["assessments"]["1234"].history
+    assert [record["total"] for record in await history.async_get_latest(5)] == [9]
+
+    # Answers only count again once every question has been answered again,
+    # including those left as they were.
+    await _async_answer(hass, {"q1": "nearly_every_day"})
+    assert len(events) == 1
+    await _async_answer(
+        hass, {**items, "q1": "nearly_every_day", "difficulty": "very_difficult"}
+    )
+    assert len(events) == 2
+    assert events[1].data["total"] == 11
+    assert events[1].data["change"] == 2
+    assert hass.states.get("sensor.phq9_1234_score_change").state == "2"
+    assert hass.states.get("sensor.phq9_1234_rolling_mean").state == "10.0"
+
+
+async def test_select_answers_complete_when_window_closes(
+    hass: HomeAssistant,
+) -> None:
+    """Test that with a coalescing window the assessment completes as it closes."""
+    entry = await _async_setup(hass)
+    hass.config_entries.async_update_entry(entry, options={"coalesce_window": 5})
+    await hass.async_block_till_done()
+    events = async_capture_events(hass, "phq9_assessment_completed")
+
+    await _async_answer(
+        hass,
+        {
+            **{f"q{i + 1}": "several_days" for i in range(9)},
+            "difficulty": "very_difficult",
+            "q9": "not_at_all",
+        },
+    )
+    assert events == []
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=5))
+    await hass.async_block_till_done()
+    assert len(events) == 1
+    assert events[0].data["total"] == 8
+
+
+async def test_submit_assessment_batch(hass: HomeAssistant) -> None:
+    """Test that several people can be assessed in a single call."""
+    await _async_setup(hass)
+
+    await hass.services.async_call(
+        DOMAIN,
+        "submit_assessment",
+        {
+            "assessments": [
+                {
+                    "person": "person.test",
+                    "answers": ["several_days"] * 9,
+                    "difficulty": "somewhat_difficult",
+                },
+                {
+                    "person": "person.jane",
+                    "answers": ["nearly_every_day"] * 9,
+                    "difficulty": "extremely_difficult",
+                },
+            ]
+        },
+        blocking=True,
+    )
+    await hass.async_block_till_done()
+
+    assert hass.states.get("sensor.phq9_1234_score").state == "9"
+    assert hass.states.get("sensor.phq9_5678_score").state == "27"
+    assert hass.states.get("sensor.phq9_5678_score_interpretation").state == "severe"
+
+
+async def test_submit_assessment_unknown_person(hass: HomeAssistant) -> None:
+    """Test that a batch with an unknown person is rejected as a whole."""
+    await _async_setup(hass)
+
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(
+            DOMAIN,
+            "submit_assessment",
+            {
+                "assessments": [
+                    {
+                        "person": "person.test",
+                        "answers": ["several_days"] * 9,
+                        "difficulty": "somewhat_difficult",
+                    },
+                    {
+                        "person": "person.nobody",
+                        "answers": ["several_days"] * 9,
+                        "difficulty": "somewhat_difficult",
+                    },
+                ]
+            },
+            blocking=True,
+        )
+
+    assert hass.states.get("sensor.phq9_1234_score").state == "0"
+
+
+async def test_submit_assessment_instrument(hass: HomeAssistant) -> None:
+    """Test that answers are checked against the questionnaire they are for."""
+    await async_setup_component(
+        hass, "person", {"person": [{"name": "test", "id": "1234"}]}
+    )
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STARTED)
+    await hass.async_block_till_done()
+
+    entry = MockConfigEntry(
+        domain=DOMAIN, data={}, options={"instruments": ["phq9", "phq2"]}
+    )
+    entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    await hass.services.async_call(
+        DOMAIN,
+        "submit_assessment",
+        {
+            "person": "person.test",
+            "instrument": "phq2",
+            "answers": ["nearly_every_day", "several_days"],
+        },
+        blocking=True,
+    )
+
+    assert hass.states.get("sensor.phq9_1234_phq2_score").state == "4"
+    assert hass.states.get("sensor.phq9_1234_score").state == "0"
+
+    for submission in (
+        # Nine answers to a two question instrument.
+        {"instrument": "phq2", "answers": ["several_days"] * 9},
+        # PHQ-2 has no difficulty question.
+        {
+            "instrument": "phq2",
+            "answers": ["several_days"] * 2,
+            "difficulty": "very_difficult",
+        },
+        # PHQ-9 needs its difficulty.
+        {"answers": ["several_days"] * 9},
+        # GAD-7 is not enabled.
+        {"instrument": "gad7", "answers": ["several_days"] * 7},
+    ):
+        with pytest.raises(ServiceValidationError):
+            await hass.services.async_call(
+                DOMAIN,
+                "submit_assessment",
+                {"person": "person.test", **submission},
+                blocking=True,
+            )
+
+    assert hass.states.get("sensor.phq9_1234_phq2_score").state == "4"
+
+
+async def test_set_answer(hass: HomeAssistant) -> None:
+    """Test that a single answer can be set as its select would."""
+    await _async_setup(hass)
+
+    await hass.services.async_call(
+        DOMAIN,
+        "set_answer",
+        {"person": "person.jane", "question": 2, "answer": "nearly_every_day"},
+        blocking=True,
+    )
+    await hass.services.async_call(
+        DOMAIN,
+        "set_answer",
+        {"person": "person.jane", "question": "difficulty", "answer": "very_difficult"},
+        blocking=True,
+    )
+
+    assert hass.states.get("select.phq9_5678_q2").state == "nearly_every_day"
+    assert hass.states.get("select.phq9_5678_difficulty").state == "very_difficult"
+    assert hass.states.get("sensor.phq9_5678_score").state == "3"
+
+    for data in (
+        {"question": 10, "answer": "several_days"},
+        {"question": 1, "answer": "very_difficult"},
+        {"question": 1, "answer": "several_days", "instrument": "gad7"},
+    ):
+        with pytest.raises(ServiceValidationError):
+            await hass.services.async_call(
+                DOMAIN,
+                "set_answer",
+                {"person": "person.jane", **data},
+                blocking=True,
+            )
+
+    assert hass.states.get("sensor.phq9_5678_score").state == "3"
+
+
+async def test_submit_assessment_history(
+    hass: HomeAssistant, hass_storage: dict[str, Any], freezer: FrozenDateTimeFactory
+) -> None:
+    """Test that submitted assessments are kept and written once per burst."""
+    await _async_setup(hass)
+
+    for answer in ("several_days", "nearly_every_day"):
+        await hass.services.async_call(
+            DOMAIN,
+            "submit_assessment",
+            {
+                "person": "person.test",
+                "answers": [answer] * 9,
+                "difficulty": "somewhat_difficult",
+            },
+            blocking=True,
+        )
+    await hass.async_block_till_done()
+
+    assert "phq9.history.1234" not in hass_storage
+
+    freezer.tick(timedelta(seconds=SAVE_DELAY))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+
+    records = hass_storage["phq9.history.1234"]["data"]["records"]
+    assert [record["total"] for record in records] == [9, 27]
+    assert records[1]["answers"] == [3] * 9
+    assert records[1]["difficulty"] == 1
+    assert records[1]["band"] == "severe"
+    assert "phq9.history.5678" not in hass_storage
+
+
+async def _async_submit_history(hass: HomeAssistant) -> None:
+    """Submit an assessment for each person a day apart."""
+    now = dt_util.utcnow()
+    for days, person, answer in (
+        (2, "person.test", "several_days"),
+        (1, "person.jane", "nearly_every_day"),
+        (0, "person.test", "nearly_every_day"),
+    ):
+        with patch(
+            "homeassistant.util.dt.now", return_value=now - timedelta(days=days)
+        ):
+            await hass.services.async_call(
+                DOMAIN,
+                "submit_assessment",
+                {
+                    "person": person,
+                    "answers": [answer] * 9,
+                    "difficulty": "somewhat_difficult",
+                },
+                blocking=True,
+            )
+
+
+async def test_export_csv(hass: HomeAssistant, tmp_path: Path) -> None:
+    """Test that everyone's assessments can be exported as CSV."""
+    hass.config.config_dir = str(tmp_path)
+    await _async_setup(hass)
+    await _async_submit_history(hass)
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        "export",
+        {"filename": "exports/phq9.csv"},
+        blocking=True,
+        return_response=True,
+    )
+
+    assert response == {
+        "path": str(tmp_path / "phq9" / "exports" / "phq9.csv"),
+        "assessments": 3,
+    }
+    with open(tmp_path / "phq9" / "exports" / "phq9.csv", encoding="utf-8") as file:
+        rows = list(csv.DictReader(file))
+    assert [(row["person"], row["total"]) for row in rows] == [
+        ("person.test", "9"),
+        ("person.test", "27"),
+        ("person.jane", "27"),
+    ]
+    assert rows[0]["q1"] == "1"
+    assert rows[0]["difficulty"] == "somewhat_difficult"
+    assert rows[0]["band"] == "mild"
+
+
+async def test_export_jsonl_range(hass: HomeAssistant, tmp_path: Path) -> None:
+    """Test that a date range of one person can be exported as JSON Lines."""
+    hass.config.config_dir = str(tmp_path)
+    await _async_setup(hass)
+    await _async_submit_history(hass)
+
+    await hass.services.async_call(
+        DOMAIN,
+        "export",
+        {
+            "person": "person.test",
+            "format": "jsonl",
+            "start": dt_util.utcnow() - timedelta(days=1),
+            "filename": "test.jsonl",
+        },
+        blocking=True,
+    )
+
+    with open(tmp_path / "phq9" / "test.jsonl", encoding="utf-8") as file:
+        records = [json.loads(line) for line in file]
+    assert len(records) == 1
+    assert records[0]["person"] == "person.test"
+    assert records[0]["total"] == 27
+    assert records[0]["q9"] == 3
+
+
+async def test_export_in_chunks(hass: HomeAssistant, tmp_path: Path) -> None:
+    """Test that the history is read a chunk at a time while exporting."""
+    hass.config.config_dir = str(tmp_path)
+    await _async_setup(hass)
+    await _async_submit_history(hass)
+    history = hass.data[DOMAIN]["assessments"]["1234"].history
+    await history.async_import(
+        [
+            assessment_record(PHQ9, dt_util.now() - timedelta(days=days), [1] * 9 + [0])
+            for days in range(10, 20)
+        ]
+    )
+
+    slices = []
+    get_slice = PHQ9History.async_get_slice
+
+    async def async_get_slice(self, first, last):
+        records = await get_slice(self, first, last)
+        slices.append(len(records))
+        return records
+
+    with patch("custom_components.phq9.export.CHUNK_SIZE", 4), patch.object(
+        PHQ9History, "async_get_slice", async_get_slice
+    ):
+        response = await hass.services.async_call(
+            DOMAIN,
+            "export",
+            {"filename": "phq9.csv"},
+            blocking=True,
+            return_response=True,
+        )
+
+    assert response["assessments"] == 13
+    assert slices == [4, 4, 4, 1]
+
+
+async def test_export_outside_folder(hass: HomeAssistant, tmp_path: Path) -> None:
+    """Test that an export is only written to the phq9 or an allowed folder."""
+    hass.config.config_dir = str(tmp_path / "config")
+    await _async_setup(hass)
+
+    for filename in (
+        "../configuration.yaml",
+        "../.storage/auth",
+        str(tmp_path / "config" / "secrets.yaml"),
+        str(tmp_path / "escaped.csv"),
+    ):
+        with pytest.raises(ServiceValidationError):
+            await hass.services.async_call(
+                DOMAIN, "export", {"filename": filename}, blocking=True
+            )
+    assert list(tmp_path.rglob("*.*")) == []
+
+    (tmp_path / "exports").mkdir()
+    hass.config.allowlist_external_dirs = {str(tmp_path / "exports")}
+    response = await hass.services.async_call(
+        DOMAIN,
+        "export",
+        {"filename": str(tmp_path / "exports" / "phq9.csv")},
+        blocking=True,
+        return_response=True,
+    )
+    assert response["path"] == str(tmp_path / "exports" / "phq9.csv")
+
+
+async def test_export_overwrite(hass: HomeAssistant, tmp_path: Path) -> None:
+    """Test that an existing file is only replaced when asked to."""
+    hass.config.config_dir = str(tmp_path)
+    await _async_setup(hass)
+    (tmp_path / "phq9").mkdir()
+    (tmp_path / "phq9" / "phq9.csv").write_text("kept", encoding="utf-8")
+
+    with pytest.raises(ServiceValidationError, match="already exists"):
+        await hass.services.async_call(
+            DOMAIN, "export", {"filename": "phq9.csv"}, blocking=True
+        )
+    assert (tmp_path / "phq9" / "phq9.csv").read_text(encoding="utf-8") == "kept"
+
+    await hass.services.async_call(
+        DOMAIN, "export", {"filename": "phq9.csv", "overwrite": True}, blocking=True
+    )
+    assert (tmp_path / "phq9" / "phq9.csv").read_text(encoding="utf-8") != "kept"
+
+
+async def test_export_admin_only(
+    hass: HomeAssistant, hass_read_only_user: MockUser, tmp_path: Path
+) -> None:
+    """Test that only an administrator can export."""
+    hass.config.config_dir = str(tmp_path)
+    await _async_setup(hass)
+
+    with pytest.raises(Unauthorized):
+        await hass.services.async_call(
+            DOMAIN,
+            "export",
+            {"filename": "phq9.csv"},
+            blocking=True,
+            context=Context(user_id=hass_read_only_user.id),
+        )
+    assert not (tmp_path / "phq9" / "phq9.csv").exists()
+
+
+async def test_analyze(hass: HomeAssistant) -> None:
+    """Test that everyone's assessments are summarized together."""
+    await _async_setup(hass)
+    await _async_submit_history(hass)
+
+    response = await hass.services.async_call(
+        DOMAIN, "analyze", {}, blocking=True, return_response=True
+    )
+
+    assert response["assessments"] == 3
+    assert response["persons"] == 2
+    assert response["total"] == {
+        "mean": 21.0,
+        "p10": pytest.approx(12.6),
+        "p25": 18.0,
+        "p50": 27.0,
+        "p75": 27.0,
+        "p90": 27.0,
+    }
+    assert (
+        response["items"]
+        == [
+            {
+                "not_at_all": 0,
+                "several_days": 1,
+                "more_than_half_the_days": 0,
+                "nearly_every_day": 2,
+            }
+        ]
+        * 9
+    )
+    assert response["risk_item"] == {
+        "item": 9,
+        "endorsed": 3,
+        "rate": 1.0,
+        "persons": ["person.test", "person.jane"],
+    }
+    transitions = response["band_transitions"]
+    assert transitions["mild"]["severe"] == 1
+    assert sum(sum(row.values()) for row in transitions.values()) == 1
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        "analyze",
+        {"person": "person.jane", "end": dt_util.utcnow() - timedelta(days=2)},
+        blocking=True,
+        return_response=True,
+    )
+    assert response["assessments"] == 0
+    assert response["total"]["mean"] is None
+    assert response["risk_item"]["rate"] is None
+
+
+async def test_import(hass: HomeAssistant, tmp_path: Path) -> None:
+    """Test that a file of past assessments is imported without replaying it."""
+    hass.config.config_dir = str(tmp_path)
+    await _async_setup(hass)
+    await _async_submit_history(hass)
+    await hass.services.async_call(
+        DOMAIN, "export", {"filename": "phq9.csv"}, blocking=True
+    )
+
+    with open(tmp_path / "phq9" / "import.csv", "w", encoding="utf-8") as file:
+        file.write("timestamp," + ",".join(f"q{i + 1}" for i in range(9)))
+        file.write(",difficulty\n")
+        for days in range(10, 0, -1):
+            timestamp = (dt_util.utcnow() - timedelta(days=days)).isoformat()
+            file.write(f"{timestamp},{','.join(['2'] * 9)},very_difficult\n")
+        timestamp = dt_util.utcnow().isoformat()
+        file.write(f"{timestamp},{','.join(['nearly_every_day'] * 9)},3\n")
+
+    events = async_capture_events(hass, EVENT_STATE_CHANGED)
+    response = await hass.services.async_call(
+        DOMAIN,
+        "import",
+        {"filename": "import.csv", "person": "person.jane"},
+        blocking=True,
+        return_response=True,
+    )
+    await hass.async_block_till_done()
+
+    assert response == {"persons": 1, "assessments": 11}
+    assert hass.states.get("sensor.phq9_5678_score").state == "27"
+    assert hass.states.get("sensor.phq9_5678_rolling_mean").state == str(
+        (18 + 18 + 27 + 27) / 4
+    )
+    assert hass.states.get("select.phq9_5678_difficulty").state == (
+        "extremely_difficult"
+    )
+    changed = [event.data["entity_id"] for event in events]
+    assert len(changed) == len(set(changed))
+    assert all("5678" in entity_id for entity_id in changed)
+
+    # The history holds the imported assessments in time order, along with the
+    # assessment submitted before.
+    await hass.services.async_call(
+        DOMAIN,
+        "export",
+        {"person": "person.jane", "format": "jsonl", "filename": "jane.jsonl"},
+        blocking=True,
+    )
+    with open(tmp_path / "phq9" / "jane.jsonl", encoding="utf-8") as file:
+        totals = [json.loads(line)["total"] for line in file]
+    assert totals == [18] * 9 + [27, 18, 27]
+
+    # The exported file can be imported back, without repeating anything.
+    response = await hass.services.async_call(
+        DOMAIN,
+        "import",
+        {"filename": "phq9.csv"},
+        blocking=True,
+        return_response=True,
+    )
+    assert response == {"persons": 2, "assessments": 0}
+    response = await hass.services.async_call(
+        DOMAIN,
+        "import",
+        {"filename": "import.csv", "person": "person.jane"},
+        blocking=True,
+        return_response=True,
+    )
+    assert response == {"persons": 1, "assessments": 0}
+    history = hass.data[DOMAIN]["assessments"]["5678"].history
+    assert await history.async_get_span(None, None) == (0, 12)
+    history = hass.data[DOMAIN]["assessments"]["1234"].history
+    assert await history.async_get_span(None, None) == (0, 2)
+
+
+async def test_import_in_batches(hass: HomeAssistant, tmp_path: Path) -> None:
+    """Test that a file is written to the history a chunk at a time."""
+    hass.config.config_dir = str(tmp_path)
+    await _async_setup(hass)
+    (tmp_path / "phq9").mkdir()
+    with open(tmp_path / "phq9" / "import.jsonl", "w", encoding="utf-8") as file:
+        for days in range(11):
+            row = {
+                "person": "person.test" if days % 2 else "person.jane",
+                "timestamp": (dt_util.utcnow() - timedelta(days=days)).isoformat(),
+                **{f"q{i + 1}": "several_days" for i in range(9)},
+                "difficulty": "very_difficult",
+            }
+            file.write(json.dumps(row) + "\n")
+
+    batches = []
+    history_import = PHQ9History.async_import
+
+    async def async_import(self, records):
+        batches.append(len(records))
+        return await history_import(self, records)
+
+    events = async_capture_events(hass, EVENT_STATE_CHANGED)
+    with patch("custom_components.phq9.importer.CHUNK_SIZE", 4), patch.object(
+        PHQ9History, "async_import", async_import
+    ), patch.object(PHQ9History, "_async_index") as index:
+        response = await hass.services.async_call(
+            DOMAIN,
+            "import",
+            {"filename": "import.jsonl"},
+            blocking=True,
+            return_response=True,
+        )
+    await hass.async_block_till_done()
+
+    assert response == {"persons": 2, "assessments": 11}
+    # Each chunk of four rows is split between the two people.
+    assert batches == [2, 2, 2, 2, 2, 1]
+    index.assert_not_called()
+    changed = [event.data["entity_id"] for event in events]
+    assert len(changed) == len(set(changed))
+    history = hass.data[DOMAIN]["assessments"]["5678"].history
+    records = await history.async_get_records_between(None, None)
+    assert [record["timestamp"] for record in records] == sorted(
+        record["timestamp"] for record in records
+    )
+    assert len(records) == 6
+
+
+async def test_import_invalid(hass: HomeAssistant, tmp_path: Path) -> None:
+    """Test that a file with an invalid row is rejected as a whole."""
+    hass.config.config_dir = str(tmp_path)
+    await _async_setup(hass)
+    (tmp_path / "phq9").mkdir()
+
+    with open(tmp_path / "phq9" / "import.jsonl", "w", encoding="utf-8") as file:
+        answers = {f"q{i + 1}": "several_days" for i in range(9)}
+        timestamp = dt_util.utcnow().isoformat()
+        for difficulty in ("very_difficult", "not_an_answer"):
+            row = {"timestamp": timestamp, **answers, "difficulty": difficulty}
+            file.write(json.dumps(row) + "\n")
+
+    with pytest.raises(ServiceValidationError, match="Line 2: difficulty") as err:
+        await hass.services.async_call(
+            DOMAIN,
+            "import",
+            {"filename": "import.jsonl", "person": "person.test"},
+            blocking=True,
+        )
+    assert "not_an_answer" not in str(err.value)
+    assert hass.states.get("sensor.phq9_1234_score").state == "0"
+
+
+async def test_import_outside_folder(
+    hass: HomeAssistant, hass_read_only_user: MockUser, tmp_path: Path
+) -> None:
+    """Test that only an administrator can import, and only from allowed files."""
+    hass.config.config_dir = str(tmp_path)
+    await _async_setup(hass)
+    (tmp_path / "secrets.yaml").write_text("password: hunter2\n", encoding="utf-8")
+
+    for filename in ("../secrets.yaml", str(tmp_path / "secrets.yaml")):
+        with pytest.raises(ServiceValidationError) as err:
+            await hass.services.async_call(
+                DOMAIN,
+                "import",
+                {"filename": filename, "person": "person.test"},
+                blocking=True,
+            )
+        assert "hunter2" not in str(err.value)
+
+    with pytest.raises(Unauthorized):
+        await hass.services.async_call(
+            DOMAIN,
+            "import",
+            {"filename": "import.csv", "person": "person.test"},
+            blocking=True,
+            context=Context(user_id=hass_read_only_user.id),
+        )
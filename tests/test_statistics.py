@@ -0,0 +1,162 @@
+"""Tests for the phq9 long-term statistics."""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+
+from homeassistant.components.recorder import Recorder
+from homeassistant.components.recorder.statistics import (
+    list_statistic_ids,
+    statistics_during_period,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+from homeassistant.const import EVENT_HOMEASSISTANT_STARTED
+from homeassistant.util import dt as dt_util
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.components.recorder.common import (
+    async_wait_recording_done,
+)
+
+from custom_components.phq9.assessment import assessment_record
+from custom_components.phq9.const import DOMAIN
+from custom_components.phq9.history import PHQ9History
+from custom_components.phq9.instruments import PHQ9
+from custom_components.phq9.statistics import async_import_statistics
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(recorder_mock, enable_custom_integrations):
+    """Enable custom integrations, setting up the recorder before hass."""
+    yield
+
+
+async def test_assessment_statistics(
+    recorder_mock: Recorder, hass: HomeAssistant
+) -> None:
+    """Test that completed assessments are added as long-term statistics."""
+    await async_setup_component(
+        hass, "person", {"person": [{"name": "test", "id": "1234"}]}
+    )
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STARTED)
+    await hass.async_block_till_done()
+
+    entry = MockConfigEntry(domain=DOMAIN, data={})
+    entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    start = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+    await hass.services.async_call(
+        DOMAIN,
+        "submit_assessment",
+        {
+            "person": "person.test",
+            "answers": ["nearly_every_day"] + ["several_days"] * 8,
+            "difficulty": "somewhat_difficult",
+        },
+        blocking=True,
+    )
+    await async_wait_recording_done(hass)
+
+    statistic_ids = await recorder_mock.async_add_executor_job(list_statistic_ids, hass)
+    assert {"phq9:1234_total", "phq9:1234_q1", "phq9:1234_q9"} <= {
+        statistic["statistic_id"] for statistic in statistic_ids
+    }
+
+    stats = await recorder_mock.async_add_executor_job(
+        statistics_during_period,
+        hass,
+        start,
+        None,
+        {"phq9:1234_total", "phq9:1234_q1"},
+        "hour",
+        None,
+        {"mean", "max"},
+    )
+    assert stats["phq9:1234_total"][0]["mean"] == 11
+    assert stats["phq9:1234_q1"][0]["max"] == 3
+
+
+async def test_assessment_statistics_same_hour(
+    recorder_mock: Recorder, hass: HomeAssistant
+) -> None:
+    """Test that assessments in the same hour share one row of statistics."""
+    await async_setup_component(
+        hass, "person", {"person": [{"name": "test", "id": "1234"}]}
+    )
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STARTED)
+    await hass.async_block_till_done()
+
+    entry = MockConfigEntry(domain=DOMAIN, data={})
+    entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    start = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+    for minutes, answer in ((10, "nearly_every_day"), (20, "not_at_all")):
+        with patch(
+            "homeassistant.util.dt.now",
+            return_value=dt_util.as_local(start + timedelta(minutes=minutes)),
+        ):
+            await hass.services.async_call(
+                DOMAIN,
+                "submit_assessment",
+                {
+                    "person": "person.test",
+                    "answers": [answer] * 9,
+                    "difficulty": "somewhat_difficult",
+                },
+                blocking=True,
+            )
+        await hass.async_block_till_done()
+    await async_wait_recording_done(hass)
+
+    stats = await recorder_mock.async_add_executor_job(
+        statistics_during_period,
+        hass,
+        start,
+        None,
+        {"phq9:1234_total"},
+        "hour",
+        None,
+        {"mean", "min", "max"},
+    )
+    assert len(stats["phq9:1234_total"]) == 1
+    assert stats["phq9:1234_total"][0]["mean"] == 13.5
+    assert stats["phq9:1234_total"][0]["min"] == 0
+    assert stats["phq9:1234_total"][0]["max"] == 27
+
+
+async def test_statistics_read_history_once(
+    recorder_mock: Recorder, hass: HomeAssistant
+) -> None:
+    """Test that the hours of many records are worked out from one read."""
+    start = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+    history = PHQ9History(hass, "1234", PHQ9)
+    records = [
+        assessment_record(
+            PHQ9, start - timedelta(hours=hours, minutes=minutes), [answer] * 10
+        )
+        for hours in (30, 20, 10)
+        for minutes, answer in ((40, 0), (20, 3))
+    ]
+    await history.async_import(records)
+
+    with patch.object(
+        history,
+        "async_get_records_between",
+        wraps=history.async_get_records_between,
+    ) as get_records, patch(
+        "custom_components.phq9.statistics.async_add_external_statistics"
+    ) as add_statistics:
+        await async_import_statistics(hass, "1234", PHQ9, "test", history, records)
+
+    get_records.assert_called_once()
+    total = add_statistics.call_args_list[0].args[2]
+    assert [row["start"] for row in total] == [
+        start - timedelta(hours=hours) for hours in (31, 21, 11)
+    ]
+    assert {row["mean"] for row in total} == {13.5}
@@ -0,0 +1,131 @@
+"""Tests for the phq9 websocket commands."""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+from homeassistant.const import EVENT_HOMEASSISTANT_STARTED
+from homeassistant.util import dt as dt_util
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.phq9.const import DOMAIN
+
+
+async def _async_setup_history(hass: HomeAssistant) -> list:
+    """Set up a person with five assessments; returns their completion times."""
+    await async_setup_component(
+        hass, "person", {"person": [{"name": "test", "id": "1234"}]}
+    )
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STARTED)
+    await hass.async_block_till_done()
+
+    entry = MockConfigEntry(domain=DOMAIN, data={})
+    entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    now = dt_util.now().replace(microsecond=0)
+    # The middle two assessments were completed at the same time.
+    times = [now - timedelta(days=days) for days in (3, 2, 1, 1, 0)]
+    for completed, answer in zip(
+        times,
+        (
+            "not_at_all",
+            "several_days",
+            "more_than_half_the_days",
+            "nearly_every_day",
+            "several_days",
+        ),
+    ):
+        with patch("homeassistant.util.dt.now", return_value=completed):
+            await hass.services.async_call(
+                DOMAIN,
+                "submit_assessment",
+                {
+                    "person": "person.test",
+                    "answers": [answer] * 9,
+                    "difficulty": "somewhat_difficult",
+                },
+                blocking=True,
+            )
+    return times
+
+
+async def test_list_assessments(hass: HomeAssistant, hass_ws_client) -> None:
+    """Test that the history is listed a page at a time."""
+    times = await _async_setup_history(hass)
+    client = await hass_ws_client(hass)
+
+    totals = []
+    cursor = None
+    for _ in range(3):
+        await client.send_json_auto_id(
+            {
+                "type": "phq9/assessments/list",
+                "person": "person.test",
+                "limit": 2,
+                **({"cursor": cursor} if cursor else {}),
+            }
+        )
+        response = await client.receive_json()
+        assert response["success"]
+        totals.extend(record["total"] for record in response["result"]["assessments"])
+        if (cursor := response["result"]["cursor"]) is None:
+            break
+
+    assert totals == [0, 9, 18, 27, 9]
+    assert cursor is None
+
+    await client.send_json_auto_id(
+        {
+            "type": "phq9/assessments/list",
+            "person": "person.test",
+            "start": times[1].isoformat(),
+            "end": times[2].isoformat(),
+        }
+    )
+    response = await client.receive_json()
+    assert [record["total"] for record in response["result"]["assessments"]] == [
+        9,
+        18,
+        27,
+    ]
+    assert response["result"]["cursor"] is None
+
+
+async def test_aggregate_assessments(hass: HomeAssistant, hass_ws_client) -> None:
+    """Test that the history within a time range is summarized."""
+    times = await _async_setup_history(hass)
+    client = await hass_ws_client(hass)
+
+    await client.send_json_auto_id(
+        {
+            "type": "phq9/assessments/aggregate",
+            "person": "person.test",
+            "start": times[2].isoformat(),
+        }
+    )
+    response = await client.receive_json()
+
+    assert response["success"]
+    assert response["result"] == {
+        "count": 3,
+        "total": {"min": 9, "max": 27, "mean": 18.0},
+        "items": [2.0] * 9,
+        "bands": {
+            "none_minimal": 0,
+            "mild": 1,
+            "moderate": 0,
+            "moderately_severe": 1,
+            "severe": 1,
+        },
+    }
+
+    await client.send_json_auto_id(
+        {"type": "phq9/assessments/aggregate", "person": "person.nobody"}
+    )
+    response = await client.receive_json()
+    assert not response["success"]
+    assert response["error"]["code"] == "not_found"